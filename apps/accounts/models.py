@@ -10,6 +10,7 @@ from django.core.mail import EmailMultiAlternatives, send_mail
 from django.db import models
 from django.template.loader import render_to_string
 from django.utils.translation import ugettext_lazy as _
+from model_utils import FieldTracker
 
 from sharky.mixins import UUIDPrimaryKeyMixin
 
@@ -97,6 +98,9 @@ class EmailUser(AbstractBaseUser, PermissionsMixin, UUIDPrimaryKeyMixin):
         verbose_name_plural = _("users")
 
     objects = EmailUserManager()
+    tracker = FieldTracker(
+        fields=["is_borrower_active", "is_borrower", "first_name", "last_name", "email"]
+    )
 
     # Core Django Functionality
     def get_full_name(self) -> str:
@@ -1,9 +1,49 @@
-from dateutil.relativedelta import relativedelta
+import codecs
+
 from django.contrib import admin, messages
 from django.contrib.humanize.templatetags.humanize import intcomma
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from . import models
+from .exports import csv_response, export_queryset
+from .forms import LoanImportForm
+from .imports import import_loans
+from .jobs import TASKS, enqueue
+
+
+def export_csv(model, queryset, filename):
+    """
+    Returns a response which streams the rows of the model in the queryset as CSV.
+    """
+    return csv_response(
+        model,
+        export_queryset(model, queryset),
+        f"{filename}-{timezone.localdate():%Y%m%d}.csv",
+    )
+
+
+def enqueue_job(request, name, queryset):
+    """
+    Queues the task on the selected objects, see `apps.lending.jobs`, and links to
+    the status page of the job.
+    """
+    job = enqueue(name, queryset, user=request.user)
+    messages.success(
+        request,
+        format_html(
+            '{} <a href="{}">{}</a>',
+            _("%(task)s of %(count)s object(s) was queued.")
+            % {"task": TASKS[name].description, "count": job.total},
+            reverse("admin:lending_job_change", args=(job.pk,)),
+            _("Follow its progress."),
+        ),
+    )
 
 
 class AmortizationAdminInline(admin.TabularInline):
@@ -41,7 +81,11 @@ class LoanSourceAdmin(admin.ModelAdmin):
     Admin view for :model:`lending.LoanSource`
     """
 
-    actions = ["generate_capital_source_payments"]
+    actions = [
+        "generate_capital_source_payments",
+        "export_capital_source_payments",
+        "export_loan_source_amortizations",
+    ]
     model = models.LoanSource
     inlines = [CapitalSourcePaymentAdminInline, LoanSourceAmortizationAdminInline]
     list_display = (
@@ -52,6 +96,7 @@ class LoanSourceAdmin(admin.ModelAdmin):
         "interest_rate",
     )
     list_filter = ("capital_source__source", "capital_source__bank")
+    list_select_related = ("loan__borrower", "capital_source")
     search_fields = ("capital_source__bank__name", "capital_source__name")
 
     def get_source_name_from_capital_source(self, obj):
@@ -61,41 +106,43 @@ class LoanSourceAdmin(admin.ModelAdmin):
 
     def generate_capital_source_payments(self, request, queryset):
         """
-        Generates capita source payments for the selected loan sources.
+        Queues the generation of the capital source payments of the selected loan
+        sources.
         """
-        for source in queryset:
-            # The number of payments will depend on whether the payment schedule is
-            # monthly or bi-monthly. If monthly, then the number of payments will be
-            # equal to the loan's term. If bi-monthly, it means there will be 2 payments
-            # for each month which should be equal to twice the value of term.
-            loan = source.loan
-            count = loan.term if loan.is_payment_schedule_monthly else loan.term * 2
-
-            payments = []
-            due_date = loan.first_payment_date
-            for schedule in range(count):
-                payments.append(
-                    models.CapitalSourcePayment(
-                        loan_source=source,
-                        amount=source.capital_source_payment_amount,
-                        due_date=due_date,
-                    )
-                )
-
-                if loan.is_payment_schedule_monthly:
-                    due_date += relativedelta(months=1)
-                else:
-                    due_date += relativedelta(days=15)
-
-            if payments:
-                models.CapitalSourcePayment.objects.bulk_create(payments)
-
-        messages.success(request, _("Successfully generated capital source payments."))
+        enqueue_job(request, "generate_capital_source_payments", queryset)
 
     generate_capital_source_payments.short_description = _(
         "Generate Capital Source Payments"
     )
 
+    def export_capital_source_payments(self, request, queryset):
+        """
+        Exports the capital source payments of the selected loan sources as CSV.
+        """
+        return export_csv(
+            models.CapitalSourcePayment,
+            models.CapitalSourcePayment.objects.filter(loan_source__in=queryset),
+            "capital-source-payments",
+        )
+
+    export_capital_source_payments.short_description = _(
+        "Export Capital Source Payments"
+    )
+
+    def export_loan_source_amortizations(self, request, queryset):
+        """
+        Exports the amortizations of the selected loan sources as CSV.
+        """
+        return export_csv(
+            models.LoanSourceAmortization,
+            models.LoanSourceAmortization.objects.filter(source__in=queryset),
+            "loan-source-amortizations",
+        )
+
+    export_loan_source_amortizations.short_description = _(
+        "Export Loan Source Amortizations"
+    )
+
 
 class LoanSourceAdminInline(admin.StackedInline):
     """
@@ -134,7 +181,7 @@ class LoanAdmin(admin.ModelAdmin):
     Admin view for :model:`lending.Loan`
     """
 
-    actions = ["generate_amortization", "pre_terminate"]
+    actions = ["generate_amortization", "pre_terminate", "export_amortizations"]
     list_display = (
         "borrower",
         "loan_date",
@@ -158,12 +205,66 @@ class LoanAdmin(admin.ModelAdmin):
     )
     search_fields = ("borrower__first_name", "borrower__last_name")
     inlines = [LoanSourceAdminInline, AmortizationAdminInline]
+    change_list_template = "admin/lending/loan/change_list.html"
+
+    def get_queryset(self, request):
+        """
+        Annotates the financials of each loan, see `LoanQuerySet.with_financials`, so
+        the columns computed from them neither query per row nor prevent sorting.
+        """
+        queryset = super().get_queryset(request)
+        return queryset.select_related("borrower").with_financials()
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="lending_loan_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """
+        Imports the loans of an uploaded CSV file, see `import_loans`, and displays
+        the report of the import.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied()
+
+        report = None
+        form = LoanImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            lines = codecs.iterdecode(form.cleaned_data["file"], "utf-8-sig")
+            try:
+                report = import_loans(lines, dry_run=form.cleaned_data["dry_run"])
+            except (UnicodeDecodeError, ValueError) as error:
+                form.add_error("file", str(error))
+
+        if report and not report.dry_run and not report.errors:
+            messages.success(
+                request,
+                _("Imported %(loans)s loans and %(amortizations)s amortizations.")
+                % {"loans": report.loans, "amortizations": report.amortizations},
+            )
+            return HttpResponseRedirect(reverse("admin:lending_loan_changelist"))
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": _("Import loans"),
+            "form": form,
+            "report": report,
+        }
+        return TemplateResponse(request, "admin/lending/loan/import.html", context)
 
     def amount_display(self, obj):
         amount = int(obj.amount) if obj.amount % 1 == 0 else obj.amount
         return intcomma(amount)
 
     amount_display.short_description = _("Amount")
+    amount_display.admin_order_field = "amount"
 
     def interest_amount(self, obj):
         amount = (
@@ -173,6 +274,8 @@ class LoanAdmin(admin.ModelAdmin):
         )
         return intcomma(amount)
 
+    interest_amount.admin_order_field = "interest_amount"
+
     def interest_rate_display(self, obj):
         amount = (
             int(obj.interest_rate) if obj.interest_rate % 1 == 0 else obj.interest_rate
@@ -180,6 +283,7 @@ class LoanAdmin(admin.ModelAdmin):
         return f"{amount}%"
 
     interest_rate_display.short_description = _("Interest Rate")
+    interest_rate_display.admin_order_field = "interest_rate"
 
     def interest_gained(self, obj):
         amount = (
@@ -189,12 +293,18 @@ class LoanAdmin(admin.ModelAdmin):
         )
         return intcomma(amount)
 
+    interest_gained.admin_order_field = "interest_gained"
+
     def next_payment_due_date(self, obj):
-        return obj.next_payment_due_date if obj.next_payment_due_date else "N/A"
+        return obj.next_unpaid_due_date or "N/A"
+
+    next_payment_due_date.admin_order_field = "next_unpaid_due_date"
 
     def remaining_payment_terms(self, obj):
         return obj.remaining_payment_terms
 
+    remaining_payment_terms.admin_order_field = "unpaid_amortizations"
+
     def total_principal_receivables(self, obj):
         """
         Returns the total principal receivables of the loan.
@@ -206,51 +316,119 @@ class LoanAdmin(admin.ModelAdmin):
         )
         return intcomma(amount)
 
+    total_principal_receivables.admin_order_field = "total_principal_receivables"
+
     def generate_amortization(self, request, queryset):
         """
-        Generates the amortization for the selected loans.
+        Queues the generation of the amortization of the selected loans.
         """
-        for loan in queryset:
-            # The number of amortization will depend on whether the payment schedule is
-            # monthly or bi-monthly. If monthly, then the number of amortization will be
-            # equal to the loan's term. If bi-monthly, it means there will be 2 payments
-            # for each month which should be equal to twice the value of term.
-            count = loan.term if loan.is_payment_schedule_monthly else loan.term * 2
-
-            amortization = []
-            due_date = loan.first_payment_date
-            for schedule in range(count):
-                amortization.append(
-                    models.Amortization(
-                        loan=loan,
-                        amount_due=loan.amortization_amount_due,
-                        due_date=due_date,
-                        amount_gained=(
-                            loan.amortization_amount_due
-                            - loan.sources.all().total_deductibles()
-                        ),
-                    )
-                )
-
-                if loan.is_payment_schedule_monthly:
-                    due_date += relativedelta(months=1)
-                else:
-                    due_date += relativedelta(days=15)
-
-            if amortization:
-                models.Amortization.objects.bulk_create(amortization)
-
-        messages.success(request, _("Successfully generated amortization."))
+        enqueue_job(request, "generate_amortizations", queryset)
 
     generate_amortization.short_description = _("Generate Loan Amortization")
 
     def pre_terminate(self, request, queryset):
         """
-        Pre-terminates the selected loans.
+        Queues the pre-termination of the selected loans.
         """
-        for loan in queryset:
-            loan.pre_terminate()
-
-        messages.success(request, _("Successfully pre-terminated selected loans."))
+        enqueue_job(request, "pre_terminate", queryset)
 
     pre_terminate.short_description = _("Pre-terminate selected Loans")
+
+    def export_amortizations(self, request, queryset):
+        """
+        Exports the amortization schedules of the selected loans as CSV.
+        """
+        return export_csv(
+            models.Amortization,
+            models.Amortization.objects.filter(
+                loan__in=queryset.order_by().values("pk")
+            ),
+            "amortizations",
+        )
+
+    export_amortizations.short_description = _("Export Amortization Schedules")
+
+
+@admin.register(models.DueReminder)
+class DueReminderAdmin(admin.ModelAdmin):
+    """
+    Admin view for :model:`lending.DueReminder`
+    """
+
+    list_display = ("amortization", "kind", "sent")
+    list_filter = ("kind",)
+    list_select_related = ("amortization__loan__borrower",)
+    raw_id_fields = ("amortization",)
+    date_hierarchy = "sent"
+
+
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin view for :model:`lending.Job`. Jobs are queued by the bulk actions and
+    can only be viewed, the page of a job being the status page of the action. The
+    change permission is needed to retry them.
+    """
+
+    actions = ["retry"]
+    change_form_template = "admin/lending/job/change_form.html"
+    list_display = (
+        "name",
+        "status",
+        "progress_display",
+        "attempts",
+        "created_by",
+        "created",
+        "finished",
+    )
+    list_filter = ("status", "name")
+    list_select_related = ("created_by",)
+    fields = (
+        "name",
+        "status",
+        "progress_display",
+        "attempts",
+        "max_attempts",
+        "result",
+        "error",
+        "created_by",
+        "created",
+        "run_after",
+        "started",
+        "finished",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            "show_save": False,
+            "show_save_and_continue": False,
+        }
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    def progress_display(self, obj):
+        return f"{obj.processed} of {obj.total} ({obj.progress}%)"
+
+    progress_display.short_description = _("Progress")
+
+    def retry(self, request, queryset):
+        """
+        Queues the selected failed jobs again, from where they stopped.
+        """
+        count = queryset.filter(status=models.Job.STATUSES.failed).update(
+            status=models.Job.STATUSES.queued,
+            attempts=0,
+            run_after=timezone.now(),
+            finished=None,
+            modified=timezone.now(),
+        )
+        messages.success(
+            request, _("%(count)s job(s) queued again.") % {"count": count}
+        )
+
+    retry.short_description = _("Retry failed jobs")
+    retry.allowed_permissions = ("change",)
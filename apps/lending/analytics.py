@@ -0,0 +1,158 @@
+"""
+Monthly aggregations used by the graphs in the dashboard page.
+"""
+import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import (
+    DecimalField,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import TruncMonth
+
+from .models import Amortization, CapitalSource, LoanSource, MonthlyLedger
+
+
+def month_range(start: datetime.date, months: int) -> List[datetime.date]:
+    """
+    Returns the first day of each month in the window starting from the month of
+    `start`.
+    """
+    first = datetime.date(start.year, start.month, 1)
+    return [first + relativedelta(months=i) for i in range(months)]
+
+
+def monthly_totals(
+    date_field: str, filters: Optional[Q] = None, group_by: Sequence[str] = ()
+) -> QuerySet:
+    """
+    Returns the interest gained and the principal receivables of amortizations
+    grouped by the month of `date_field`(either `due_date` or `paid_date`) and the
+    `group_by` fields. `filters` narrows down the amortizations considered.
+
+    A loan source's principal receivable is counted once per month even if the loan
+    has more than one amortization in it(bi-monthly schedules).
+    """
+    filters = filters or Q()
+    receivables = (
+        LoanSource.objects.filter(
+            loan=OuterRef("loan"),
+            capital_source__source=CapitalSource.SOURCES.savings,
+            capital_source__provider__isnull=True,
+        )
+        .order_by()
+        .values("loan")
+        .annotate(total=Sum(F("amount") / F("loan__term")))
+        .values("total")
+    )
+    # An earlier amortization of the same loan within the same month which already
+    # accounts for the principal of that month.
+    earlier = Amortization.objects.filter(
+        Q(**{f"{date_field}__lt": OuterRef(date_field)})
+        | Q(**{date_field: OuterRef(date_field), "pk__lt": OuterRef("pk")}),
+        ~Q(amort_type=Amortization.AMORTIZATION_TYPES.interest_only),
+        filters,
+        loan=OuterRef("loan"),
+        **{f"{date_field}__gte": OuterRef("month")},
+    )
+
+    return (
+        Amortization.objects.filter(filters, **{f"{date_field}__isnull": False})
+        .annotate(month=TruncMonth(date_field))
+        .annotate(
+            receivable=Subquery(receivables, output_field=DecimalField()),
+            has_earlier=Exists(earlier),
+        )
+        .order_by()
+        .values("month", *group_by)
+        .annotate(
+            interest=Sum(
+                "amount_gained",
+                filter=(
+                    ~Q(amort_type=Amortization.AMORTIZATION_TYPES.principal_only)
+                    & Q(is_preterminated=False)
+                ),
+            ),
+            principal=Sum(
+                "receivable",
+                filter=(
+                    ~Q(amort_type=Amortization.AMORTIZATION_TYPES.interest_only)
+                    & Q(has_earlier=False)
+                ),
+            ),
+        )
+    )
+
+
+def monthly_series(
+    date_field: str,
+    start: datetime.date,
+    months: int = 12,
+    filters: Optional[Q] = None,
+) -> Dict[str, List[Any]]:
+    """
+    Returns the interest gained and the principal receivables of amortizations
+    bucketed by the month of `date_field`(either `due_date` or `paid_date`) for a
+    window of `months` months starting from the month of `start`. `filters` further
+    narrows down the amortizations considered.
+
+    Both series are computed in a single grouped query regardless of the window
+    length, see `monthly_totals`. Months without amortizations are `None`.
+    """
+    buckets = month_range(start, months)
+    end = buckets[-1] + relativedelta(months=1)
+    window = Q(**{f"{date_field}__gte": buckets[0], f"{date_field}__lt": end})
+    totals = {
+        row["month"]: row
+        for row in monthly_totals(date_field, window & (filters or Q()))
+    }
+
+    return to_series(buckets, totals)
+
+
+def ledger_series(
+    date_field: str,
+    start: datetime.date,
+    months: int = 12,
+    filters: Optional[Q] = None,
+) -> Dict[str, List[Any]]:
+    """
+    Same as `monthly_series` but reads the totals from :model:`lending.MonthlyLedger`
+    which only has a row per month and borrower. `filters` applies to the ledger.
+    """
+    interest, principal = MonthlyLedger.SERIES_FIELDS[date_field]
+    buckets = month_range(start, months)
+    rows = (
+        MonthlyLedger.objects.filter(
+            filters or Q(),
+            month__gte=buckets[0],
+            month__lte=buckets[-1],
+        )
+        .order_by()
+        .values("month")
+        .annotate(interest=Sum(interest), principal=Sum(principal))
+    )
+    totals = {row["month"]: row for row in rows}
+
+    return to_series(buckets, totals)
+
+
+def to_series(
+    buckets: List[datetime.date], totals: Dict[datetime.date, Dict[str, Any]]
+) -> Dict[str, List[Any]]:
+    """
+    Returns the graph data of the monthly totals, filling the months without totals
+    with `None`.
+    """
+    return {
+        "labels": [month.strftime("%b %Y") for month in buckets],
+        "interest_data": [totals.get(month, {}).get("interest") for month in buckets],
+        "principal_data": [totals.get(month, {}).get("principal") for month in buckets],
+    }
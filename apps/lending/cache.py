@@ -0,0 +1,106 @@
+"""
+Caching of data derived from the lending models.
+
+Every cached value is keyed by a data version which is bumped whenever lending data
+changes, so a change invalidates every snapshot at once without having to know which
+keys depend on it. Each borrower also has its own version, bumped along with the data
+version whenever their data changes, so snapshots of the data of a single borrower
+survive changes to the others.
+"""
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, TypeVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+DATA_VERSION_KEY = "lending:version"
+BORROWERS_VERSION_KEY = "lending:borrowers:version"
+
+T = TypeVar("T")
+
+
+def borrower_version_key(borrower_id) -> str:
+    """
+    Returns the key of the version of the lending data of a borrower.
+    """
+    return f"lending:borrower:{borrower_id}:version"
+
+
+def get_data_version(key: str = DATA_VERSION_KEY) -> str:
+    """
+    Returns the current version of the lending data, or of the data versioned under
+    `key`.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+
+    return version
+
+
+def bump_data_version(key: str = DATA_VERSION_KEY, borrowers: Iterable = ()) -> None:
+    """
+    Invalidates every snapshot, along with those of the given borrower IDs, once the
+    current transaction is committed. Bumping before the commit would let a
+    concurrent request cache the old data under the new version.
+    """
+    keys = [key, *(borrower_version_key(pk) for pk in set(borrowers) - {None})]
+    transaction.on_commit(
+        lambda: cache.set_many({name: uuid.uuid4().hex for name in keys}, None)
+    )
+
+
+def get_snapshot(name: str, compute: Callable[[], T]) -> T:
+    """
+    Returns the cached snapshot with the given name, computing and caching it if the
+    lending data changed since it was last computed.
+
+    Snapshots also expire after `LENDING_CACHE_TIMEOUT` seconds, which bounds how
+    stale they can get when the cache is not shared between processes. They are kept
+    per day since some of the values depend on the current date.
+    """
+    key = f"lending:snapshot:{name}:{get_data_version()}:{timezone.localdate()}"
+    return cache.get_or_set(key, compute, settings.LENDING_CACHE_TIMEOUT)
+
+
+def get_user_snapshot(name: str, user, compute: Callable[[], T]) -> T:
+    """
+    Returns the cached snapshot with the given name of the lending data visible to
+    the user, computing and caching it if that data changed since it was last
+    computed.
+
+    Superusers see the data of every borrower so their snapshots are keyed by the
+    data version, while the snapshots of a borrower are keyed by the version of that
+    borrower only. Like `get_snapshot`, they expire and are kept per day.
+    """
+    version_key = (
+        DATA_VERSION_KEY if user.is_superuser else borrower_version_key(user.pk)
+    )
+    key = (
+        f"lending:snapshot:{name}:{user.pk}:{get_data_version(version_key)}:"
+        f"{timezone.localdate()}"
+    )
+    return cache.get_or_set(key, compute, settings.LENDING_CACHE_TIMEOUT)
+
+
+def get_borrowers_list() -> List[Dict[str, Any]]:
+    """
+    Returns the ID and full name of every borrower, cached until a user changes.
+    """
+
+    def compute():
+        return [
+            {"pk": user.pk, "full_name": user.get_full_name()}
+            for user in get_user_model()
+            .objects.filter(is_borrower=True)
+            .only("pk", "email", "first_name", "last_name")
+            .order_by("first_name", "last_name", "email")
+        ]
+
+    key = f"lending:borrowers:{get_data_version(BORROWERS_VERSION_KEY)}"
+    return cache.get_or_set(key, compute, settings.LENDING_CACHE_TIMEOUT)
@@ -1,10 +1,15 @@
-from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
 
-User = get_user_model()
+from .cache import get_borrowers_list
 
 
 def borrowers(request):
     """
-    Returns the list of borrowers.
+    Returns the list of borrowers displayed to superusers. The list is only fetched
+    once a template uses it, see `apps.lending.cache.get_borrowers_list`.
     """
-    return {"borrowers_list": User.objects.filter(is_borrower=True)}
+
+    def get_list():
+        return get_borrowers_list() if request.user.is_superuser else []
+
+    return {"borrowers_list": SimpleLazyObject(get_list)}
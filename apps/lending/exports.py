@@ -0,0 +1,140 @@
+"""
+Streaming CSV exports of the amortization schedules and capital source payments.
+"""
+import csv
+import datetime
+from typing import Iterator, Optional, Sequence, Tuple, Type
+
+from django.db.models import Model, QuerySet
+from django.http import StreamingHttpResponse
+
+from .models import Amortization, CapitalSourcePayment, LoanSourceAmortization
+
+EXPORT_CHUNK_SIZE = 2000
+
+PAST_DUE = "past-due"
+UPCOMING = "upcoming"
+DUE_FILTERS = (PAST_DUE, UPCOMING)
+
+# The header and field of each column, per exported model.
+EXPORT_COLUMNS = {
+    Amortization: (
+        ("Borrower", "loan__borrower__email"),
+        ("First Name", "loan__borrower__first_name"),
+        ("Last Name", "loan__borrower__last_name"),
+        ("Loan", "loan_id"),
+        ("Loan Date", "loan__loan_date"),
+        ("Due Date", "due_date"),
+        ("Amount Due", "amount_due"),
+        ("Amount Gained", "amount_gained"),
+        ("Type", "amort_type"),
+        ("Paid Date", "paid_date"),
+        ("Pre-terminated", "is_preterminated"),
+    ),
+    LoanSourceAmortization: (
+        ("Borrower", "source__loan__borrower__email"),
+        ("Loan", "source__loan_id"),
+        ("Bank", "source__capital_source__bank__name"),
+        ("Capital Source", "source__capital_source__name"),
+        ("Due Date", "due_date"),
+        ("Amount", "amount"),
+        ("Paid Date", "paid_date"),
+        ("Pre-terminated", "is_preterminated"),
+        ("Pre-termination Interest Rate", "pretermindated_interest_rate"),
+    ),
+    CapitalSourcePayment: (
+        ("Provider", "loan_source__capital_source__provider__email"),
+        ("Bank", "loan_source__capital_source__bank__name"),
+        ("Capital Source", "loan_source__capital_source__name"),
+        ("Borrower", "loan_source__loan__borrower__email"),
+        ("Loan", "loan_source__loan_id"),
+        ("Due Date", "due_date"),
+        ("Amount", "amount"),
+        ("Paid Date", "paid_date"),
+    ),
+}
+
+# The lookup of the borrower of each exported model.
+BORROWER_LOOKUPS = {
+    Amortization: "loan__borrower",
+    LoanSourceAmortization: "source__loan__borrower",
+    CapitalSourcePayment: "loan_source__loan__borrower",
+}
+
+
+class Echo:
+    """
+    A file-like object which returns what is written to it instead of buffering it,
+    so `csv.writer` can produce the rows of a streaming response.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def due_queryset(
+    queryset: QuerySet, due: str, today: Optional[datetime.date] = None
+) -> QuerySet:
+    """
+    Returns the rows of the queryset in the past due or upcoming lists as of
+    `today`(the current date if not given), see `DueQuerySet`.
+    """
+    if due == PAST_DUE:
+        return queryset.past_due(today)
+    if due == UPCOMING:
+        return queryset.upcoming(today)
+
+    raise ValueError(f"Unknown due filter: {due}")
+
+
+def export_queryset(
+    model: Type[Model],
+    queryset: Optional[QuerySet] = None,
+    due: Optional[str] = None,
+    borrower=None,
+) -> QuerySet:
+    """
+    Returns the rows to export of the model, optionally narrowed down to the rows of
+    the past due or upcoming lists(see `due_queryset`) and the rows of a borrower.
+    """
+    queryset = model.objects.all() if queryset is None else queryset
+    if due:
+        queryset = due_queryset(queryset, due)
+    if borrower is not None:
+        queryset = queryset.filter(**{BORROWER_LOOKUPS[model]: borrower})
+
+    return queryset.order_by("due_date", "pk")
+
+
+def csv_rows(
+    queryset: QuerySet,
+    columns: Sequence[Tuple[str, str]],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Yields the header and every row of the queryset as CSV lines.
+
+    Only the exported columns are selected and the rows are fetched `chunk_size` at a
+    time through a server-side cursor, so memory does not grow with the number of
+    rows.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, field in columns])
+    rows = queryset.values_list(*[field for header, field in columns]).iterator(
+        chunk_size=chunk_size
+    )
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(
+    model: Type[Model], queryset: QuerySet, filename: str
+) -> StreamingHttpResponse:
+    """
+    Returns a response which streams the queryset as a CSV attachment.
+    """
+    response = StreamingHttpResponse(
+        csv_rows(queryset, EXPORT_COLUMNS[model]), content_type="text/csv"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
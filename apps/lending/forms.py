@@ -0,0 +1,20 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+
+
+class LoanImportForm(forms.Form):
+    """
+    Upload form of the CSV file of loans to import.
+    """
+
+    file = forms.FileField(
+        help_text=_(
+            "CSV file with a row per loan source. Rows of the same loan share the loan "
+            "reference and must be consecutive."
+        )
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        help_text=_("Only validate the file and report what would be imported."),
+    )
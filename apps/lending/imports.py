@@ -0,0 +1,282 @@
+"""
+Bulk import of loans, their sources and amortizations from CSV files.
+
+Each row of the file is a source of a loan. Rows of the same loan share the `loan`
+reference, must be consecutive and repeat the details of the loan.
+"""
+import csv
+from contextlib import nullcontext
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from apps.accounts.models import EmailUser
+
+from .ledger import rebuild_ledger
+from .models import CapitalSource, Loan, LoanSource
+from .schedules import BATCH_SIZE, chunked, generate_amortizations
+
+REQUIRED_COLUMNS = (
+    "loan",
+    "borrower",
+    "loan_date",
+    "first_payment_date",
+    "amount",
+    "interest_rate",
+    "term",
+    "bank",
+    "capital_source",
+    "source_amount",
+)
+
+# The model field of each column of the loan and of its source.
+LOAN_FIELDS = {
+    "borrower_name": "borrower_name",
+    "loan_date": "loan_date",
+    "first_payment_date": "first_payment_date",
+    "amount": "amount",
+    "interest_rate": "interest_rate",
+    "term": "term",
+    "payment_schedule": "payment_schedule",
+}
+SOURCE_FIELDS = {
+    "source_amount": "amount",
+    "source_interest_rate": "interest_rate",
+    "monthly_amortization": "monthly_amortization",
+    "loan_applied_date": "loan_applied_date",
+    "loan_received_date": "loan_received_date",
+}
+
+Row = Tuple[int, Dict[str, str]]
+CapitalSources = Dict[Tuple[str, str], Optional[CapitalSource]]
+
+
+class ImportReport:
+    """
+    The outcome of an import: the number of rows read, the number of objects created
+    and the errors of the loans which were skipped.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.loans = 0
+        self.sources = 0
+        self.amortizations = 0
+        self.borrowers = set()
+        self.errors: List[Tuple[int, str, str]] = []
+
+    def add_error(self, line: int, reference: str, message: str):
+        self.errors.append((line, reference, message))
+
+    def write_errors(self, file):
+        """
+        Writes the errors as CSV with the line and loan reference of each error.
+        """
+        writer = csv.writer(file)
+        writer.writerow(["line", "loan", "error"])
+        writer.writerows(self.errors)
+
+
+def value(row: Dict[str, str], column: str) -> str:
+    return (row.get(column) or "").strip()
+
+
+def clean_fields(
+    model: Type[models.Model], fields: Dict[str, str], row: Dict[str, str]
+) -> Tuple[Dict[str, object], List[str]]:
+    """
+    Returns the values of the model fields in the row, validated the same way as the
+    model, and the errors of the invalid ones. Empty columns fall back to the
+    default of their field.
+    """
+    values, errors = {}, []
+    for column, name in fields.items():
+        field = model._meta.get_field(name)
+        raw = value(row, column)
+        if not raw and field.has_default():
+            values[name] = field.get_default()
+            continue
+
+        try:
+            values[name] = field.clean(
+                raw if raw or field.empty_strings_allowed else None, None
+            )
+        except ValidationError as error:
+            errors.append(f"{column}: {' '.join(error.messages)}")
+
+    return values, errors
+
+
+def capital_source_lookup() -> CapitalSources:
+    """
+    Returns the capital sources by the name or abbreviation of their bank and their
+    name, case insensitively. Names matching more than one capital source map to
+    `None`.
+    """
+    lookup: CapitalSources = {}
+    for capital_source in CapitalSource.objects.select_related("bank"):
+        bank = capital_source.bank
+        for bank_name in {bank.name, bank.abbreviation} - {""}:
+            key = (bank_name.casefold(), capital_source.name.casefold())
+            lookup[key] = None if key in lookup else capital_source
+
+    return lookup
+
+
+def read_loans(
+    lines: Iterable[str], report: ImportReport
+) -> Iterator[Tuple[str, List[Row]]]:
+    """
+    Yields the reference and the numbered rows of each loan in the CSV lines.
+    """
+    reader = csv.DictReader(lines)
+    missing = [
+        column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())
+    ]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}.")
+
+    seen = set()
+    numbered = enumerate(reader, start=2)
+    for reference, rows in groupby(numbered, key=lambda row: value(row[1], "loan")):
+        rows = list(rows)
+        report.rows += len(rows)
+        if not reference:
+            message = "loan: This field cannot be blank."
+        elif reference in seen:
+            message = "loan: The rows of a loan must be consecutive."
+        else:
+            seen.add(reference)
+            yield reference, rows
+            continue
+
+        for line, row in rows:
+            report.add_error(line, reference, message)
+
+
+def build_loan(
+    reference: str,
+    rows: List[Row],
+    borrowers: Dict[str, EmailUser],
+    capital_sources: CapitalSources,
+) -> Tuple[Loan, List[LoanSource], List[Tuple[int, str, str]]]:
+    """
+    Returns the unsaved loan and sources of the rows and the errors found in them.
+    """
+    errors = []
+    first_line, first = rows[0]
+    loan_values, messages = clean_fields(Loan, LOAN_FIELDS, first)
+    if "term" in loan_values and loan_values["term"] < 1:
+        messages.append("term: Ensure this value is greater than or equal to 1.")
+
+    email = value(first, "borrower")
+    borrower = borrowers.get(email)
+    if email and borrower is None:
+        messages.append(f"borrower: No borrower with the email {email}.")
+    elif email and not borrower.is_borrower:
+        messages.append(f"borrower: {email} is not a borrower.")
+    elif not email and not loan_values.get("borrower_name"):
+        messages.append("borrower: Either the borrower or borrower_name is required.")
+    errors += [(first_line, reference, message) for message in messages]
+
+    loan = Loan(borrower=borrower, **loan_values)
+    details = [value(first, column) for column in ("borrower", *LOAN_FIELDS)]
+    sources = []
+    for line, row in rows:
+        source_values, messages = clean_fields(LoanSource, SOURCE_FIELDS, row)
+        if details != [value(row, column) for column in ("borrower", *LOAN_FIELDS)]:
+            messages.append(f"loan: The details differ from line {first_line}.")
+
+        bank, name = value(row, "bank"), value(row, "capital_source")
+        key = (bank.casefold(), name.casefold())
+        capital_source = capital_sources.get(key)
+        if key not in capital_sources:
+            messages.append(f"capital_source: No capital source {name} in {bank}.")
+        elif capital_source is None:
+            messages.append(f"capital_source: More than one {name} in {bank}.")
+        errors += [(line, reference, message) for message in messages]
+
+        sources.append(
+            LoanSource(loan=loan, capital_source=capital_source, **source_values)
+        )
+
+    return loan, sources, errors
+
+
+def import_batch(
+    batch: List[Tuple[str, List[Row]]],
+    capital_sources: CapitalSources,
+    report: ImportReport,
+):
+    """
+    Validates the loans of the batch and creates the valid ones, along with their
+    sources and amortizations, in a single transaction. Borrowers are fetched once
+    for the whole batch.
+    """
+    emails = {value(rows[0][1], "borrower") for reference, rows in batch}
+    borrowers = {
+        borrower.email: borrower
+        for borrower in EmailUser.objects.filter(email__in=emails - {""})
+    }
+
+    loans, sources = [], []
+    for reference, rows in batch:
+        loan, loan_sources, errors = build_loan(
+            reference, rows, borrowers, capital_sources
+        )
+        if errors:
+            report.errors += errors
+            continue
+
+        loans.append(loan)
+        sources += loan_sources
+
+    if not loans:
+        return
+
+    with transaction.atomic():
+        Loan.objects.bulk_create(loans)
+        LoanSource.objects.bulk_create(sources)
+        report.amortizations += generate_amortizations(
+            Loan.objects.filter(pk__in=[loan.pk for loan in loans]),
+            refresh_ledger=False,
+        )
+
+    report.loans += len(loans)
+    report.sources += len(sources)
+    report.borrowers.update(loan.borrower_id for loan in loans)
+
+
+def import_loans(
+    lines: Iterable[str], dry_run: bool = False, batch_size: int = BATCH_SIZE
+) -> ImportReport:
+    """
+    Imports the loans of the CSV lines and returns the report of the import.
+
+    The file is read as it is imported and the loans are validated and created
+    `batch_size` at a time, each batch in its own transaction. Loans with an invalid
+    row are skipped and reported. The capital sources are looked up from memory. The
+    ledger of the borrowers is rebuilt once every batch is imported.
+
+    In a dry run everything is validated and created the same way but rolled back at
+    the end, so the report tells what the import would do.
+    """
+    report = ImportReport(dry_run)
+    capital_sources = capital_source_lookup()
+    with transaction.atomic() if dry_run else nullcontext():
+        for batch in chunked(read_loans(lines, report), batch_size):
+            import_batch(batch, capital_sources, report)
+
+        # The ledger of a borrower is rebuilt once rather than for every batch
+        # which has loans of the borrower.
+        if report.borrowers:
+            rebuild_ledger(report.borrowers)
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    report.errors.sort(key=lambda error: error[0])
+    return report
@@ -0,0 +1,151 @@
+"""
+A queue of the bulk actions of the admin, run by `manage.py run_lending_worker`
+instead of within the request which asked for them.
+
+Jobs are rows of :model:`lending.Job`, claimed by workers with `SELECT ... FOR
+UPDATE SKIP LOCKED` so several workers can share the queue. The objects of a job
+are processed in chunks, each in its own transaction along with the progress of the
+job, which keeps the job locked while the chunk runs. A failed job is retried later
+from the first chunk which was not processed, which is safe as every action skips
+what it has already done.
+"""
+import datetime
+import traceback
+from typing import Callable, Dict, NamedTuple, Optional, Type
+
+from django.db import transaction
+from django.db.models import Model, Q, QuerySet
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import Job, Loan, LoanSource
+from .schedules import chunked, generate_amortizations, generate_capital_source_payments
+
+CHUNK_SIZE = 100
+
+# The delay before retrying a failed job, multiplied by the number of attempts.
+RETRY_DELAY = datetime.timedelta(minutes=1)
+
+# The time after which a running job which is not locked by a chunk and whose
+# progress has not been saved is assumed to have been abandoned by its worker, and
+# can be claimed again.
+STALE_AFTER = datetime.timedelta(minutes=15)
+
+
+class Task(NamedTuple):
+    """
+    An action which can be queued: the model of the objects it acts on, a function
+    acting on a queryset of them which returns how many objects it changed or
+    created, and its description.
+    """
+
+    model: Type[Model]
+    func: Callable[[QuerySet], int]
+    description: str
+
+
+def pre_terminate(queryset: QuerySet) -> int:
+    return len(queryset.pre_terminate())
+
+
+TASKS: Dict[str, Task] = {
+    "generate_amortizations": Task(
+        Loan, generate_amortizations, _("Generate loan amortization")
+    ),
+    "generate_capital_source_payments": Task(
+        LoanSource,
+        generate_capital_source_payments,
+        _("Generate capital source payments"),
+    ),
+    "pre_terminate": Task(Loan, pre_terminate, _("Pre-terminate loans")),
+}
+
+
+def enqueue(name: str, queryset: QuerySet, user=None, **kwargs) -> Job:
+    """
+    Queues the task to run on the objects of the queryset.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+
+    object_ids = [
+        str(pk) for pk in queryset.order_by("pk").values_list("pk", flat=True)
+    ]
+    return Job.objects.create(
+        name=name, object_ids=object_ids, created_by=user, **kwargs
+    )
+
+
+def claim_job(now: Optional[datetime.datetime] = None) -> Optional[Job]:
+    """
+    Marks the next job to run as running and returns it, or returns `None` if there
+    is none. Queued jobs are run in the order they are due, along with the running
+    jobs abandoned by their worker.
+    """
+    now = now or timezone.now()
+    runnable = Q(status=Job.STATUSES.queued, run_after__lte=now) | Q(
+        status=Job.STATUSES.running, modified__lt=now - STALE_AFTER
+    )
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(runnable)
+            .order_by("run_after", "created")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = Job.STATUSES.running
+        job.attempts += 1
+        job.started = job.started or now
+        job.save()
+
+    return job
+
+
+def run_job(job: Job, chunk_size: int = CHUNK_SIZE) -> Job:
+    """
+    Runs a claimed job from its first unprocessed object, `chunk_size` objects at a
+    time. If a chunk fails, its changes are rolled back and the job is queued again
+    after `RETRY_DELAY`, or marked as failed once it has used all of its attempts.
+    The job is left as it is if another worker claimed it again in the meantime.
+    """
+    if job.attempts > job.max_attempts:
+        # Claimed again after being abandoned on its last attempt.
+        job.status = Job.STATUSES.failed
+        job.error = job.error or "The job was abandoned by its worker."
+        job.finished = timezone.now()
+        job.save()
+        return job
+
+    try:
+        task = TASKS[job.name]
+        for chunk in chunked(job.object_ids[job.processed :], chunk_size):
+            with transaction.atomic():
+                # Locked until the chunk is done, so it cannot be claimed again
+                # however long the chunk takes.
+                locked = Job.objects.select_for_update().get(pk=job.pk)
+                if locked.attempts != job.attempts:
+                    return locked
+
+                count = task.func(task.model.objects.filter(pk__in=chunk))
+                job.processed += len(chunk)
+                job.result = {"count": (job.result or {}).get("count", 0) + count}
+                job.save(update_fields=["processed", "result", "modified"])
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.STATUSES.queued
+            job.run_after = timezone.now() + RETRY_DELAY * job.attempts
+        else:
+            job.status = Job.STATUSES.failed
+            job.finished = timezone.now()
+        job.save()
+        return job
+
+    job.status = Job.STATUSES.succeeded
+    job.finished = timezone.now()
+    job.error = ""
+    job.save()
+    return job
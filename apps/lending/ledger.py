@@ -0,0 +1,106 @@
+"""
+Maintenance of the monthly totals stored in :model:`lending.MonthlyLedger`.
+"""
+import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .analytics import monthly_totals
+from .models import MonthlyLedger
+
+BATCH_SIZE = 1000
+
+
+def month_of(date: Optional[datetime.date]) -> Optional[datetime.date]:
+    """
+    Returns the first day of the month of the date.
+    """
+    return date.replace(day=1) if date else None
+
+
+def rebuild_ledger(
+    borrowers: Optional[Iterable] = None,
+    months: Optional[Iterable[Optional[datetime.date]]] = None,
+) -> int:
+    """
+    Recomputes the ledger rows of the given borrower IDs(every borrower if not given)
+    for the months of the given dates(every month if not given). Returns the number
+    of rows written.
+    """
+    scope = Q()
+    ledger_scope = Q()
+    if borrowers is not None:
+        borrowers = set(borrowers)
+        scope &= Q(loan__borrower__in=borrowers - {None})
+        ledger_scope &= Q(borrower__in=borrowers - {None})
+        if None in borrowers:
+            scope |= Q(loan__borrower__isnull=True)
+            ledger_scope |= Q(borrower__isnull=True)
+
+    due_scope = paid_scope = scope
+    if months is not None:
+        months = {month_of(date) for date in months} - {None}
+        if not months:
+            return 0
+
+        ledger_scope &= Q(month__in=months)
+        due_scope &= in_months("due_date", months)
+        paid_scope &= in_months("paid_date", months)
+
+    rows: Dict[Tuple, Dict] = {}
+    due = monthly_totals("due_date", due_scope, group_by=("loan__borrower",)).annotate(
+        due=Sum("amount_due"),
+        gained=Sum("amount_gained", filter=Q(is_preterminated=False)),
+    )
+    for row in due:
+        rows[row["month"], row["loan__borrower"]] = {
+            "amount_due": row["due"],
+            "amount_gained": row["gained"],
+            "interest_gained": row["interest"],
+            "principal_receivable": row["principal"],
+        }
+
+    paid = monthly_totals(
+        "paid_date", paid_scope, group_by=("loan__borrower",)
+    ).annotate(paid=Sum("amount_due"))
+    for row in paid:
+        rows.setdefault((row["month"], row["loan__borrower"]), {}).update(
+            {
+                "amount_paid": row["paid"],
+                "interest_returned": row["interest"],
+                "principal_returned": row["principal"],
+            }
+        )
+
+    ledgers = [
+        MonthlyLedger(
+            month=month,
+            borrower_id=borrower,
+            **{"amount_due": 0, "amount_paid": 0, **values},
+        )
+        for (month, borrower), values in rows.items()
+    ]
+    with transaction.atomic():
+        MonthlyLedger.objects.filter(ledger_scope).delete()
+        MonthlyLedger.objects.bulk_create(ledgers, batch_size=BATCH_SIZE)
+
+    return len(ledgers)
+
+
+def in_months(date_field: str, months: Iterable[datetime.date]) -> Q:
+    """
+    Returns the filter matching dates within any of the months.
+    """
+    condition = Q()
+    for month in months:
+        condition |= Q(
+            **{
+                f"{date_field}__gte": month,
+                f"{date_field}__lt": month + relativedelta(months=1),
+            }
+        )
+
+    return condition
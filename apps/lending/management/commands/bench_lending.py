@@ -0,0 +1,335 @@
+import datetime
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from unittest import mock
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+from apps.lending.jobs import claim_job, run_job
+from apps.lending.models import Amortization, Job, Loan, LoanSource
+from apps.lending.synthetic import generate_loan_book
+
+PAGES = (
+    "dashboard",
+    "lending:loans-active",
+    "lending:past-due-list",
+    "lending:upcoming-due-list",
+    "lending:borrowers-detail",
+    "lending:earnings-graph",
+    "lending:money-returned-graph",
+    "lending:loan-sources-graph",
+    "admin:lending_loan_changelist",
+    "admin:lending_loansource_changelist",
+)
+
+# The date the loan book and the pages are as of by default, so the reports of runs
+# on different days can be compared.
+AS_OF = datetime.date(2021, 6, 30)
+
+ACTIONS = (
+    ("admin:lending_loan_changelist", "generate_amortization"),
+    ("admin:lending_loan_changelist", "pre_terminate"),
+    ("admin:lending_loansource_changelist", "generate_capital_source_payments"),
+)
+
+
+def percentile(samples, percent):
+    """
+    Returns the given percentile of the samples.
+    """
+    if len(samples) == 1:
+        return samples[0]
+
+    return statistics.quantiles(samples, n=100, method="inclusive")[percent - 1]
+
+
+class QueryCounter:
+    """
+    An execute wrapper counting the queries of every connection it is added to.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.count += 1
+
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts the queries run within the block, on the connection of this thread as
+    well as the connections opened by the worker threads of the async views.
+    """
+    counter = QueryCounter()
+    wrapped = [connection]
+
+    def add_counter(sender, connection, **kwargs):
+        if counter not in connection.execute_wrappers:
+            connection.execute_wrappers.append(counter)
+            wrapped.append(connection)
+
+    connection.execute_wrappers.append(counter)
+    connection_created.connect(add_counter)
+    try:
+        yield counter
+    finally:
+        connection_created.disconnect(add_counter)
+        for wrapper in wrapped:
+            wrapper.execute_wrappers.remove(counter)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the lending pages and admin actions against a synthetic loan book "
+        "and reports their latency, query count and peak memory as JSON. The loan "
+        "book is generated in a throwaway test database, the configured database is "
+        "left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--borrowers", type=int, default=100)
+        parser.add_argument("--loans-per-borrower", type=int, default=5)
+        parser.add_argument(
+            "--sources-per-loan", type=int, default=2, choices=range(1, 5)
+        )
+        parser.add_argument(
+            "--term",
+            type=int,
+            default=12,
+            help=(
+                "Term of every loan in months. Loans have this many amortizations if "
+                "paid monthly and twice as many if paid bi-monthly."
+            ),
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--as-of",
+            type=datetime.date.fromisoformat,
+            default=AS_OF,
+            help=(
+                "The date the loan book is generated and the pages are measured as of, "
+                f"YYYY-MM-DD. Defaults to {AS_OF.isoformat()}."
+            ),
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of timed runs of each page and action.",
+        )
+        parser.add_argument(
+            "--selection",
+            type=int,
+            default=100,
+            help="Number of objects selected when running the admin actions.",
+        )
+        parser.add_argument(
+            "--output", help="File to write the report to. Defaults to stdout."
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        # Like the test runner, run with DEBUG disabled so the timings are not skewed
+        # by the debug machinery.
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # The pages filter past due and upcoming amortizations by the current date,
+        # which is moved to noon of the date of the loan book.
+        now = timezone.make_aware(
+            datetime.datetime.combine(options["as_of"], datetime.time(12))
+        )
+        try:
+            with mock.patch("django.utils.timezone.now", return_value=now):
+                report = self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def benchmark(self, options):
+        """
+        Generates the loan book and measures every page and admin action.
+        """
+        started = time.perf_counter()
+        borrowers = generate_loan_book(
+            borrowers=options["borrowers"],
+            loans_per_borrower=options["loans_per_borrower"],
+            sources_per_loan=options["sources_per_loan"],
+            term=options["term"],
+            seed=options["seed"],
+            as_of=options["as_of"],
+        )
+        generation = time.perf_counter() - started
+
+        admin = EmailUser.objects.create_superuser("bench@example.com", "bench")
+        self.client = Client()
+        self.client.force_login(admin)
+
+        results = []
+        for name in PAGES:
+            args = (borrowers[0].pk,) if name == "lending:borrowers-detail" else ()
+            path = reverse(name, args=args)
+            results.append(
+                self.measure(
+                    name,
+                    "GET",
+                    path,
+                    lambda: self.client.get(
+                        path, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+                    ),
+                    options["repeat"],
+                )
+            )
+
+        selections = {
+            "admin:lending_loan_changelist": Loan.objects.order_by(
+                "borrower__email", "first_payment_date", "amount", "payment_schedule"
+            ),
+            "admin:lending_loansource_changelist": LoanSource.objects.filter(
+                capital_source__provider__isnull=False
+            ).order_by("loan__borrower__email", "loan__first_payment_date", "amount"),
+        }
+        for name, action in ACTIONS:
+            path = reverse(name)
+            data = {
+                "action": action,
+                "index": 0,
+                "_selected_action": [
+                    str(pk)
+                    for pk in selections[name].values_list("pk", flat=True)[
+                        : options["selection"]
+                    ]
+                ],
+            }
+            results.append(
+                self.measure(
+                    f"{name}:{action}",
+                    "POST",
+                    path,
+                    lambda: self.rolled_back(lambda: self.run_action(path, data)),
+                    options["repeat"],
+                )
+            )
+
+        return {
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "parameters": {
+                key: options[key]
+                for key in (
+                    "borrowers",
+                    "loans_per_borrower",
+                    "sources_per_loan",
+                    "term",
+                    "seed",
+                    "repeat",
+                    "selection",
+                )
+            },
+            "as_of": options["as_of"].isoformat(),
+            "data": {
+                "borrowers": len(borrowers),
+                "loans": Loan.objects.count(),
+                "loan_sources": LoanSource.objects.count(),
+                "amortizations": Amortization.objects.count(),
+                "generation_s": round(generation, 3),
+            },
+            "results": results,
+        }
+
+    def run_action(self, path, data):
+        """
+        Posts the admin action, then runs the job it queued the way a worker would,
+        so the work of the action is measured along with its request.
+        """
+        response = self.client.post(path, data)
+        queued = Job.objects.filter(status=Job.STATUSES.queued)
+        # Jobs are queued at the actual time, while the current date of the
+        # benchmark is moved back to the date of the loan book.
+        while latest := queued.aggregate(latest=Max("run_after"))["latest"]:
+            job = run_job(claim_job(now=latest))
+            if job.status == Job.STATUSES.failed:
+                raise CommandError(f"{job.name} failed:\n{job.error}")
+
+        return response
+
+    def rolled_back(self, request):
+        """
+        Makes the request within a transaction which is rolled back afterwards, so
+        every run of an admin action starts from the same data.
+        """
+        with transaction.atomic():
+            response = request()
+            transaction.set_rollback(True)
+
+        return response
+
+    def measure(self, name, method, path, request, repeat):
+        """
+        Returns the latency percentiles, the number of queries and the peak memory
+        of the request. The cache is cleared before every run so cached pages are
+        measured computing their data.
+
+        The first run warms up and counts the queries, and memory is traced in a
+        separate run so tracing does not skew the timings.
+        """
+        cache.clear()
+        with count_queries() as queries:
+            response = request()
+        query_count = queries.count
+
+        if response.status_code >= 400:
+            raise CommandError(f"{method} {path} returned {response.status_code}.")
+
+        timings = []
+        for _ in range(repeat):
+            cache.clear()
+            started = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        cache.clear()
+        tracemalloc.start()
+        try:
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "name": name,
+            "method": method,
+            "path": path,
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "queries": query_count,
+            "peak_memory_kib": round(peak / 1024, 1),
+        }
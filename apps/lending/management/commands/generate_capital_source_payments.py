@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.lending.models import LoanSource
+from apps.lending.schedules import BATCH_SIZE, generate_capital_source_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the payments to third-party capital source providers. Existing "
+        "payments are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "loan_sources",
+            nargs="*",
+            help=(
+                "IDs of the loan sources to generate payments for. Defaults to every "
+                "loan source whose capital source has a third-party provider."
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = LoanSource.objects.filter(capital_source__provider__isnull=False)
+        if options["loan_sources"]:
+            queryset = LoanSource.objects.filter(pk__in=options["loan_sources"])
+
+        count = generate_capital_source_payments(
+            queryset, batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated {count} capital source payment(s).")
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.lending.imports import import_loans
+from apps.lending.schedules import BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports loans, their sources and amortizations from a CSV file with a row "
+        "per loan source. Loans with invalid rows are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path of the CSV file to import.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validates the file and reports what would be imported.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of loans validated and created per transaction.",
+        )
+        parser.add_argument(
+            "--errors", help="File to write the errors to as CSV. Defaults to stderr."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["file"], newline="", encoding="utf-8-sig") as lines:
+                report = import_loans(
+                    lines,
+                    dry_run=options["dry_run"],
+                    batch_size=options["batch_size"],
+                )
+        except (OSError, UnicodeDecodeError, ValueError) as error:
+            raise CommandError(error)
+
+        if report.errors and options["errors"]:
+            with open(options["errors"], "w", newline="") as errors:
+                report.write_errors(errors)
+        elif report.errors:
+            report.write_errors(self.stderr)
+
+        verb = "Would import" if report.dry_run else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {report.loans} loan(s), {report.sources} loan source(s) and "
+                f"{report.amortizations} amortization(s) from {report.rows} row(s)."
+            )
+        )
+        if report.errors:
+            self.stdout.write(
+                self.style.WARNING(f"{len(report.errors)} error(s) in skipped loans.")
+            )
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.lending.models import Loan, LoanQuerySet
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the amortization rollup fields of every loan, or only verifies them "
+        "when --check is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report loans whose rollups are out of sync without fixing them.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            stale = self.get_stale_loans()
+            for loan in stale:
+                self.stdout.write(f"Out of sync: {loan}")
+
+            if stale:
+                raise CommandError(f"{len(stale)} loan(s) have out of sync rollups.")
+
+            self.stdout.write(self.style.SUCCESS("All loan rollups are consistent."))
+            return
+
+        with transaction.atomic():
+            count = Loan.objects.refresh_rollups()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups of {count} loan(s)."))
+
+    def get_stale_loans(self):
+        """
+        Returns the loans whose stored rollups differ from the ones computed from
+        their amortizations.
+        """
+        fields = LoanQuerySet.ROLLUP_FIELDS
+        computed = {
+            f"computed_{field}": expression
+            for field, expression in Loan.objects.computed_rollups().items()
+        }
+        queryset = Loan.objects.select_related("borrower").annotate(**computed)
+        return [
+            loan
+            for loan in queryset.iterator()
+            if any(
+                getattr(loan, field) != getattr(loan, f"computed_{field}")
+                for field in fields
+            )
+        ]
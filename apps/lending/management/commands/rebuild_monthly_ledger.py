@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.lending.ledger import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuilds every row of the monthly ledger from the amortizations."
+
+    def handle(self, *args, **options):
+        count = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} monthly ledger row(s)."))
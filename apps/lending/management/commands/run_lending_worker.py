@@ -0,0 +1,59 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.lending.jobs import CHUNK_SIZE, claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the queued lending jobs, such as the bulk actions of the admin. Several "
+        "workers can run at the same time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no more jobs to run instead of waiting for more.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait before checking for jobs again when there is none.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+
+        while not self.stopping:
+            close_old_connections()
+            job = claim_job()
+            if job is None:
+                if options["once"]:
+                    break
+
+                time.sleep(options["interval"])
+                continue
+
+            job = run_job(job, chunk_size=options["chunk_size"])
+            style = self.style.SUCCESS if job.is_finished else self.style.WARNING
+            if job.status == job.STATUSES.failed:
+                style = self.style.ERROR
+            self.stdout.write(
+                style(
+                    f"{job.name} {job.pk}: {job.get_status_display()}, "
+                    f"{job.processed} of {job.total} processed."
+                )
+            )
+
+    def stop(self, signum, frame):
+        """
+        Stops once the job being run is done.
+        """
+        self.stopping = True
@@ -0,0 +1,46 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.lending.reminders import BATCH_SIZE, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Emails the borrowers the amortizations which are past due or due soon. "
+        "Amortizations already reminded of are skipped, so this can be run as often "
+        "as needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=datetime.date.fromisoformat,
+            help="The date to send the reminders as of, YYYY-MM-DD. Defaults to today.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="The number of days ahead an amortization is due soon. Defaults to 7.",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the reminders to send without sending them.",
+        )
+
+    def handle(self, *args, **options):
+        report = send_due_reminders(
+            as_of=options["date"],
+            days=options["days"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        verb = "Would send" if report.dry_run else "Sent"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {report.messages} reminder(s) of {report.past_due} past due "
+                f"and {report.upcoming} upcoming amortization(s)."
+            )
+        )
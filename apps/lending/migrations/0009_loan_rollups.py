@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 01:49
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_rollups(apps, schema_editor):
+    Amortization = apps.get_model('lending', 'Amortization')
+    Loan = apps.get_model('lending', 'Loan')
+    amortizations = Amortization.objects.filter(loan=OuterRef('pk')).order_by().values('loan')
+    paid = amortizations.filter(paid_date__isnull=False)
+    unpaid = amortizations.filter(paid_date__isnull=True)
+    Loan.objects.update(
+        paid_amortizations=Coalesce(Subquery(paid.annotate(total=Count('pk')).values('total')), 0),
+        unpaid_amortizations=Coalesce(Subquery(unpaid.annotate(total=Count('pk')).values('total')), 0),
+        next_unpaid_due_date=Subquery(unpaid.annotate(first=Min('due_date')).values('first')),
+        outstanding_amount_due=Coalesce(
+            Subquery(unpaid.annotate(total=Sum('amount_due')).values('total')),
+            Value(0),
+            output_field=DecimalField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lending', '0008_capitalsourcepayment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='next_unpaid_due_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='outstanding_amount_due',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=11),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='paid_amortizations',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='unpaid_amortizations',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:00
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lending', '0009_loan_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyLedger',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField(help_text='The first day of the month.')),
+                ('amount_due', models.DecimalField(decimal_places=2, help_text='Total amount due of the amortizations due within the month.', max_digits=11)),
+                ('amount_gained', models.DecimalField(blank=True, decimal_places=2, help_text='Total amount gained from the amortizations due within the month, excluding pre-terminated ones.', max_digits=11, null=True)),
+                ('interest_gained', models.DecimalField(blank=True, decimal_places=2, help_text='Same as the amount gained, also excluding principal only amortizations.', max_digits=11, null=True)),
+                ('principal_receivable', models.DecimalField(blank=True, decimal_places=2, help_text='Principal from savings account sources of the loans due within the month.', max_digits=11, null=True)),
+                ('amount_paid', models.DecimalField(decimal_places=2, help_text='Total amount due of the amortizations paid within the month.', max_digits=11)),
+                ('interest_returned', models.DecimalField(blank=True, decimal_places=2, help_text='Interest gained from the amortizations paid within the month.', max_digits=11, null=True)),
+                ('principal_returned', models.DecimalField(blank=True, decimal_places=2, help_text='Principal from savings account sources of the loans paid within the month.', max_digits=11, null=True)),
+                ('borrower', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_ledgers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Monthly Ledger',
+                'verbose_name_plural': 'Monthly Ledgers',
+                'ordering': ('month',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyledger',
+            constraint=models.UniqueConstraint(fields=('month', 'borrower'), name='unique_monthly_ledger'),
+        ),
+    ]
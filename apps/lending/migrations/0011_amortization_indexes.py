@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lending', '0010_monthlyledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='amortization',
+            index=models.Index(fields=['loan', 'due_date'], name='amortization_loan_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='amortization',
+            index=models.Index(condition=models.Q(('paid_date__isnull', True)), fields=['due_date'], name='amortization_unpaid_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='amortization',
+            index=models.Index(fields=['due_date', 'amort_type'], name='amortization_due_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='amortization',
+            index=models.Index(fields=['paid_date', 'amort_type'], name='amortization_paid_type_idx'),
+        ),
+    ]
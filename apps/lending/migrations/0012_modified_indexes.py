@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lending', '0011_amortization_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='amortization',
+            index=models.Index(fields=['modified'], name='amortization_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['modified'], name='loan_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loansource',
+            index=models.Index(fields=['modified'], name='loansource_modified_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:26
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lending', '0013_loan_active_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DueReminder',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('upcoming', 'Upcoming'), ('past_due', 'Past Due')], max_length=16)),
+                ('sent', models.DateTimeField(default=django.utils.timezone.now)),
+                ('amortization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='lending.amortization')),
+            ],
+            options={
+                'verbose_name': 'Due Reminder',
+                'verbose_name_plural': 'Due Reminders',
+                'ordering': ('sent',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='duereminder',
+            constraint=models.UniqueConstraint(fields=('amortization', 'kind'), name='unique_due_reminder'),
+        ),
+    ]
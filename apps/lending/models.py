@@ -1,18 +1,42 @@
 import datetime
 import math
+import uuid
 from decimal import Decimal
+from typing import Any, Dict, Optional
 
 from django.contrib.auth import get_user_model
 from django.contrib.humanize.templatetags.humanize import intcomma
-from django.db import models
-from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    DecimalField,
+    F,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Concat, Floor
+from django.dispatch import Signal
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from model_utils import Choices
+from model_utils import Choices, FieldTracker
 from model_utils.models import TimeStampedModel
 
 from sharky.mixins import UUIDPrimaryKeyMixin
 
+from .cache import bump_data_version
+from .utils import RoundHalfEven, annotated_property
+
+# Sent by `LoanQuerySet.pre_terminate` with the borrowers of the pre-terminated
+# loans, since its bulk updates send no model signals.
+loans_pre_terminated = Signal()
+
 
 class Bank(UUIDPrimaryKeyMixin):
     """
@@ -82,6 +106,58 @@ class CapitalSource(UUIDPrimaryKeyMixin, TimeStampedModel):
         return self.source == self.SOURCES.savings
 
 
+class DueQuerySet(models.QuerySet):
+    """
+    Custom queryset for the installments with a due date which are paid by a
+    borrower. The dates are compared to `as_of` instead of the current date when
+    given, so the same rows can be listed, cached or benchmarked for a fixed date.
+    """
+
+    # The lookup of the borrower of the installments.
+    borrower_lookup: str
+    upcoming_days = 7
+
+    def unpaid(self):
+        """
+        Filters the unpaid installments of active borrowers.
+        """
+        return self.filter(paid_date__isnull=True).exclude(
+            **{f"{self.borrower_lookup}__is_borrower_active": False}
+        )
+
+    def past_due(self, as_of: Optional[datetime.date] = None):
+        """
+        Filters the unpaid installments due on or before `as_of`(the current date if
+        not given).
+        """
+        as_of = as_of or timezone.localdate()
+        return self.unpaid().filter(due_date__lte=as_of)
+
+    def upcoming(
+        self, as_of: Optional[datetime.date] = None, days: Optional[int] = None
+    ):
+        """
+        Filters the unpaid installments due within `days`(`upcoming_days` if not
+        given) after `as_of`(the current date if not given).
+        """
+        as_of = as_of or timezone.localdate()
+        days = self.upcoming_days if days is None else days
+        return self.unpaid().filter(
+            due_date__range=(
+                as_of + datetime.timedelta(days=1),
+                as_of + datetime.timedelta(days=days),
+            )
+        )
+
+
+class CapitalSourcePaymentQuerySet(DueQuerySet):
+    """
+    Custom queryset for :model:`lending.CapitalSourcePayment`
+    """
+
+    borrower_lookup = "loan_source__loan__borrower"
+
+
 class CapitalSourcePayment(UUIDPrimaryKeyMixin):
     """
     Stores information about the payment made to a capital source provider.
@@ -96,6 +172,8 @@ class CapitalSourcePayment(UUIDPrimaryKeyMixin):
     due_date = models.DateField()
     paid_date = models.DateField(blank=True, null=True)
 
+    objects = CapitalSourcePaymentQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Capital Source Payment")
         verbose_name_plural = _("Capital Source Payments")
@@ -111,12 +189,12 @@ class LoanSourceQuerySet(models.QuerySet):
     Custom queryset for :model:`lending.LoanSource`
     """
 
-    def total_deductibles(self):
+    def with_deductibles(self):
         """
-        Returns the total deductibles from the overall interest from the selected loan
-        sources.
+        Annotates each loan source with the amount deducted from the interest of its
+        loan on every amortization.
         """
-        amount = self.annotate(
+        return self.annotate(
             deductibles=Case(
                 When(
                     capital_source__source=CapitalSource.SOURCES.savings,
@@ -137,10 +215,174 @@ class LoanSourceQuerySet(models.QuerySet):
                 default=Value(0),
                 output_field=DecimalField(),
             )
-        ).aggregate(total=Sum("deductibles"))
+        )
+
+    def total_deductibles(self):
+        """
+        Returns the total deductibles from the overall interest from the selected loan
+        sources.
+        """
+        amount = self.with_deductibles().aggregate(total=Sum("deductibles"))
         return math.floor(amount["total"]) if amount["total"] else 0
 
 
+class LoanQuerySet(models.QuerySet):
+    """
+    Custom queryset for :model:`lending.Loan`
+    """
+
+    ROLLUP_FIELDS = (
+        "paid_amortizations",
+        "unpaid_amortizations",
+        "next_unpaid_due_date",
+        "outstanding_amount_due",
+    )
+
+    def computed_rollups(self) -> Dict[str, models.Expression]:
+        """
+        Returns the expressions computing each rollup field from the amortizations of
+        the loan.
+        """
+        amortizations = (
+            Amortization.objects.filter(loan=OuterRef("pk")).order_by().values("loan")
+        )
+        paid = amortizations.filter(paid_date__isnull=False)
+        unpaid = amortizations.filter(paid_date__isnull=True)
+        return {
+            "paid_amortizations": Coalesce(
+                Subquery(paid.annotate(total=Count("pk")).values("total")), 0
+            ),
+            "unpaid_amortizations": Coalesce(
+                Subquery(unpaid.annotate(total=Count("pk")).values("total")), 0
+            ),
+            "next_unpaid_due_date": Subquery(
+                unpaid.annotate(first=Min("due_date")).values("first")
+            ),
+            "outstanding_amount_due": Coalesce(
+                Subquery(unpaid.annotate(total=Sum("amount_due")).values("total")),
+                Value(0),
+                output_field=DecimalField(),
+            ),
+        }
+
+    def with_financials(self):
+        """
+        Annotates the computed financial properties of each loan so they can be read
+        without a query per loan. The values are the same as the ones computed by the
+        properties of :model:`lending.Loan` with the same names.
+        """
+        monthly = Q(payment_schedule=Loan.PAYMENT_SCHEDULES.monthly)
+        amortization_count = Case(
+            When(monthly, then=F("term")),
+            default=F("term") * 2,
+        )
+        interest_amount = RoundHalfEven(F("amount") * (F("interest_rate") / 100))
+        amortization_amount_due = RoundHalfEven(
+            F("amount") / amortization_count
+            + Case(
+                When(monthly, then=interest_amount),
+                default=interest_amount / 2,
+                output_field=DecimalField(),
+            )
+        )
+        deductibles = (
+            LoanSource.objects.filter(loan=OuterRef("pk"))
+            .with_deductibles()
+            .order_by()
+            .values("loan")
+            .annotate(total=Sum("deductibles"))
+            .values("total")
+        )
+        total_deductibles = Coalesce(
+            Floor(Subquery(deductibles)), Value(0), output_field=DecimalField()
+        )
+        receivables = (
+            LoanSource.objects.filter(
+                loan=OuterRef("pk"),
+                capital_source__source=CapitalSource.SOURCES.savings,
+                capital_source__provider__isnull=True,
+            )
+            .order_by()
+            .values("loan")
+            .annotate(total=Sum(F("amount") / F("loan__term")))
+            .values("total")
+        )
+        return self.annotate(
+            amortization_amount_due=amortization_amount_due,
+            interest_amount=interest_amount,
+            total_deductibles=total_deductibles,
+            interest_gained=Floor(amortization_amount_due - total_deductibles),
+            remaining_payment_terms=F("unpaid_amortizations"),
+            total_principal_receivables=Floor(
+                Coalesce(Subquery(receivables), Value(0), output_field=DecimalField())
+                * F("unpaid_amortizations")
+                / Case(When(monthly, then=Value(1)), default=Value(2))
+            ),
+        )
+
+    def pre_terminate(self) -> Dict[uuid.UUID, Dict[str, Any]]:
+        """
+        Pre-terminates the selected loans. All of their remaining amortizations are
+        recalculated using a 1% interest rate, see `Loan.pre_terminate`.
+
+        The remaining amortizations of every selected loan and then the loans
+        themselves are updated in two statements within a single transaction. Returns
+        a summary keyed by the loan ID with the number of amortizations which were
+        pre-terminated and their new amount due.
+        """
+        value = RoundHalfEven(
+            F("amount") * Decimal("0.01") + RoundHalfEven(F("amount") / F("term"))
+        )
+        remaining = (
+            Amortization.objects.filter(loan=OuterRef("pk"), paid_date__isnull=True)
+            .order_by()
+            .values("loan")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        loans = Loan.objects.filter(pk__in=self.values("pk"))
+
+        with transaction.atomic():
+            rows = list(
+                loans.annotate(
+                    remaining=Coalesce(Subquery(remaining), 0),
+                    value=value,
+                ).values("pk", "borrower", "remaining", "value")
+            )
+            summary = {
+                row["pk"]: {
+                    "amortizations": row["remaining"],
+                    "amount_due": row["value"],
+                }
+                for row in rows
+            }
+            Amortization.objects.filter(loan__in=loans, paid_date__isnull=True).update(
+                amount_due=Subquery(
+                    Loan.objects.filter(pk=OuterRef("loan"))
+                    .annotate(amount_due=value)
+                    .values("amount_due")
+                ),
+                paid_date=timezone.now(),
+                is_preterminated=True,
+                modified=timezone.now(),
+            )
+            loans.update(
+                is_completed=True, modified=timezone.now(), **self.computed_rollups()
+            )
+            borrowers = {row["borrower"] for row in rows}
+            loans_pre_terminated.send(sender=Loan, borrowers=borrowers)
+            bump_data_version(borrowers=borrowers)
+
+        return summary
+
+    def refresh_rollups(self) -> int:
+        """
+        Recomputes the rollup fields of the selected loans from their amortizations in
+        a single statement. Returns the number of loans updated.
+        """
+        return self.update(**self.computed_rollups())
+
+
 class Loan(UUIDPrimaryKeyMixin, TimeStampedModel):
     """
     Stores main information about a loan made.
@@ -173,16 +415,59 @@ class Loan(UUIDPrimaryKeyMixin, TimeStampedModel):
     is_completed = models.BooleanField(default=False)
     loan_date = models.DateField()
 
+    # Rollups of the loan's amortizations. These are kept up to date whenever an
+    # amortization is saved or deleted, see `LoanQuerySet.refresh_rollups`.
+    paid_amortizations = models.PositiveIntegerField(default=0, editable=False)
+    unpaid_amortizations = models.PositiveIntegerField(default=0, editable=False)
+    next_unpaid_due_date = models.DateField(blank=True, null=True, editable=False)
+    outstanding_amount_due = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        default=0,
+        editable=False,
+    )
+
+    objects = LoanQuerySet.as_manager()
+    tracker = FieldTracker(fields=["borrower", "amount", "term", "payment_schedule"])
+
     class Meta:
         verbose_name = _("Loan")
         verbose_name_plural = _("Loans")
         ordering = ("-loan_date",)
+        indexes = [
+            # Pages the active loans by keyset, see `apps.lending.pagination`.
+            models.Index(
+                fields=("loan_date", "id"),
+                condition=Q(is_completed=False),
+                name="loan_active_date_idx",
+            ),
+            models.Index(fields=("modified",), name="loan_modified_idx"),
+        ]
 
     def __str__(self) -> str:
         amount = intcomma(self.amount)
         return f"{self.borrower} | {amount} | {self.loan_date}"
 
-    @property
+    def save(self, *args, **kwargs) -> None:
+        """
+        Saves the loan. Once it is created, its rollup fields are left out of the
+        update since they are only written by `LoanQuerySet.refresh_rollups`, so
+        saving a loan loaded before its amortizations changed keeps them up to date.
+        """
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in LoanQuerySet.ROLLUP_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @annotated_property
     def amortization_amount_due(self) -> Decimal:
         """
         The amount due for each amortization for this loan.
@@ -204,16 +489,14 @@ class Loan(UUIDPrimaryKeyMixin, TimeStampedModel):
         """
         Returns the number of amortizations paid over the duration of the term.
         """
-        made = self.amortizations.filter(paid_date__isnull=False).count()
-        return f"{made} out of {self.term}"
+        return f"{self.paid_amortizations} out of {self.term}"
 
     @property
     def next_payment_due_date(self) -> datetime.date:
         """
         Returns the next payment due date based on the unpaid amortization.
         """
-        amortization = self.amortizations.filter(paid_date__isnull=True).first()
-        return amortization.due_date if amortization else None
+        return self.next_unpaid_due_date
 
     @property
     def is_payment_schedule_monthly(self) -> bool:
@@ -230,7 +513,7 @@ class Loan(UUIDPrimaryKeyMixin, TimeStampedModel):
         amount = self.amount / self.term
         return round(amount, 2)
 
-    @property
+    @annotated_property
     def interest_amount(self) -> Decimal:
         """
         The amount gained from the interest rate of the loan.
@@ -255,14 +538,20 @@ class Loan(UUIDPrimaryKeyMixin, TimeStampedModel):
         total = self.interest_amount + self.total_interest
         return round(total, 2)
 
-    @property
+    @annotated_property
+    def total_deductibles(self) -> int:
+        """
+        Returns the total amount deducted from each amortization by the sources of the
+        loan.
+        """
+        return self.sources.all().total_deductibles()
+
+    @annotated_property
     def interest_gained(self) -> Decimal:
         """
         Returns the total interest gained depending on the sources of the loan.
         """
-        gained_amount = (
-            self.amortization_amount_due - self.sources.all().total_deductibles()
-        )
+        gained_amount = self.amortization_amount_due - self.total_deductibles
         return math.floor(gained_amount)
 
     @property
@@ -274,16 +563,16 @@ class Loan(UUIDPrimaryKeyMixin, TimeStampedModel):
         total = self.interest_gained * self.term
         return round(total, 2)
 
-    @property
+    @annotated_property
     def remaining_payment_terms(self) -> int:
         """
         Returns the remaining payment terms until all payments for the loan is
         completed. This is equivalent to the number of unpaid amortizations for the
         loan.
         """
-        return self.amortizations.filter(paid_date__isnull=True).count()
+        return self.unpaid_amortizations
 
-    @property
+    @annotated_property
     def total_principal_receivables(self) -> Decimal:
         """
         Returns the total principal receivables for the selected loan. This will only
@@ -315,14 +604,15 @@ class Loan(UUIDPrimaryKeyMixin, TimeStampedModel):
 
         The value will be assigned to all remaining amortization of the loan.
         """
-        value = (self.amount * Decimal("0.01")) + self.principal_amount
-        self.amortizations.filter(paid_date__isnull=True).update(
-            amount_due=value,
-            paid_date=timezone.now(),
-            is_preterminated=True,
-        )
-        self.is_completed = True
-        self.save(update_fields=["is_completed"])
+        Loan.objects.filter(pk=self.pk).pre_terminate()
+        self.refresh_from_db(fields=("is_completed", *LoanQuerySet.ROLLUP_FIELDS))
+
+    def refresh_rollups(self) -> None:
+        """
+        Recomputes the rollup fields of this loan from its amortizations.
+        """
+        Loan.objects.filter(pk=self.pk).refresh_rollups()
+        self.refresh_from_db(fields=LoanQuerySet.ROLLUP_FIELDS)
 
 
 class LoanSource(UUIDPrimaryKeyMixin, TimeStampedModel):
@@ -377,11 +667,12 @@ class LoanSource(UUIDPrimaryKeyMixin, TimeStampedModel):
         verbose_name = _("Loan Source")
         verbose_name_plural = _("Loan Sources")
         ordering = ("-created",)
+        indexes = [models.Index(fields=("modified",), name="loansource_modified_idx")]
 
     def __str__(self) -> str:
         return f"{self.loan} -> {self.capital_source}"
 
-    @property
+    @annotated_property
     def interest_amount(self) -> Decimal:
         """
         The amount gained from the interest rate of the selected source. This will only
@@ -399,7 +690,7 @@ class LoanSource(UUIDPrimaryKeyMixin, TimeStampedModel):
         """
         The amount to be paid to a capital source if a third-party provider exists.
         """
-        if self.capital_source.provider:
+        if self.capital_source.provider_id:
             loan = self.loan
             amortization_count = (
                 loan.term if loan.is_payment_schedule_monthly else loan.term * 2
@@ -416,6 +707,14 @@ class LoanSource(UUIDPrimaryKeyMixin, TimeStampedModel):
         return 0
 
 
+class LoanSourceAmortizationQuerySet(DueQuerySet):
+    """
+    Custom queryset for :model:`lending.LoanSourceAmortization`
+    """
+
+    borrower_lookup = "source__loan__borrower"
+
+
 class LoanSourceAmortization(UUIDPrimaryKeyMixin):
     """
     The monthly amortization for a certain loan source if the source came from any other
@@ -447,6 +746,8 @@ class LoanSourceAmortization(UUIDPrimaryKeyMixin):
         null=True,
     )
 
+    objects = LoanSourceAmortizationQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Loan Source Amortization")
         verbose_name_plural = _("Loan Source Amortizations")
@@ -456,6 +757,45 @@ class LoanSourceAmortization(UUIDPrimaryKeyMixin):
         return f"{self.source.capital_source.name}: {self.amount} on {self.due_date}"
 
 
+class AmortizationQuerySet(DueQuerySet):
+    """
+    Custom queryset for :model:`lending.Amortization`
+    """
+
+    borrower_lookup = "loan__borrower"
+
+    def with_payment_stage(self):
+        """
+        Annotates the payment stage of each amortization, e.g. "3 of 12", so it can
+        be displayed without two queries per amortization.
+
+        The position counts every amortization of the loan due before this one, paid
+        or not, which is why it can't be a window over the (usually filtered) rows of
+        this queryset. The total comes from the loan's amortization rollups.
+        """
+        earlier = (
+            Amortization.objects.filter(
+                loan=OuterRef("loan"),
+                due_date__lt=OuterRef("due_date"),
+            )
+            .order_by()
+            .values("loan")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return self.annotate(
+            payment_stage=Concat(
+                Cast(Coalesce(Subquery(earlier), 0) + 1, CharField()),
+                Value(" of "),
+                Cast(
+                    F("loan__paid_amortizations") + F("loan__unpaid_amortizations"),
+                    CharField(),
+                ),
+                output_field=CharField(),
+            )
+        )
+
+
 class Amortization(UUIDPrimaryKeyMixin, TimeStampedModel):
     """
     The amortization to be paid by the borrower depending on the payment schedule.
@@ -490,16 +830,43 @@ class Amortization(UUIDPrimaryKeyMixin, TimeStampedModel):
         ),
     )
 
+    objects = AmortizationQuerySet.as_manager()
+    tracker = FieldTracker(fields=["due_date", "paid_date"])
+
     class Meta:
         verbose_name = _("Amortization")
         verbose_name_plural = _("Amortization")
         ordering = ("due_date",)
+        indexes = [
+            models.Index(fields=("loan", "due_date"), name="amortization_loan_due_idx"),
+            models.Index(
+                fields=("due_date",),
+                condition=Q(paid_date__isnull=True),
+                name="amortization_unpaid_due_idx",
+            ),
+            models.Index(
+                fields=("due_date", "amort_type"), name="amortization_due_type_idx"
+            ),
+            models.Index(
+                fields=("paid_date", "amort_type"), name="amortization_paid_type_idx"
+            ),
+            models.Index(fields=("modified",), name="amortization_modified_idx"),
+        ]
 
     def __str__(self) -> str:
         amount_due = intcomma(self.amount_due)
         return f"{self.loan.borrower} | {amount_due} | {self.due_date}"
 
-    @property
+    def save(self, *args, **kwargs) -> None:
+        """
+        Saves the amortization in a single transaction with the refresh of the
+        rollups of its loan, see `apps.lending.signals`. Deletions already run
+        their signals within the transaction of the deletion.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @annotated_property
     def payment_stage(self) -> str:
         """
         Returns information on what stage is the current amortization on.
@@ -507,3 +874,194 @@ class Amortization(UUIDPrimaryKeyMixin, TimeStampedModel):
         current = self.loan.amortizations.filter(due_date__lt=self.due_date).count() + 1
         count = self.loan.amortizations.all().count()
         return f"{current} of {count}"
+
+
+class MonthlyLedger(UUIDPrimaryKeyMixin):
+    """
+    Monthly totals of the amortizations of a borrower. This is derived data kept up
+    to date as amortizations change, see `apps.lending.ledger`, so reports can read a
+    row per month and borrower instead of scanning amortizations.
+
+    Figures under "due" are bucketed by the due date of the amortizations, and
+    figures under "paid" by their paid date.
+    """
+
+    # The fields holding the interest and principal series for each date field, see
+    # `apps.lending.analytics.ledger_series`.
+    SERIES_FIELDS = {
+        "due_date": ("interest_gained", "principal_receivable"),
+        "paid_date": ("interest_returned", "principal_returned"),
+    }
+
+    month = models.DateField(help_text=_("The first day of the month."))
+    borrower = models.ForeignKey(
+        get_user_model(),
+        related_name="monthly_ledgers",
+        on_delete=models.CASCADE,
+        null=True,
+    )
+    amount_due = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        help_text=_("Total amount due of the amortizations due within the month."),
+    )
+    amount_gained = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_(
+            "Total amount gained from the amortizations due within the month, "
+            "excluding pre-terminated ones."
+        ),
+    )
+    interest_gained = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_(
+            "Same as the amount gained, also excluding principal only amortizations."
+        ),
+    )
+    principal_receivable = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_(
+            "Principal from savings account sources of the loans due within the month."
+        ),
+    )
+    amount_paid = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        help_text=_("Total amount due of the amortizations paid within the month."),
+    )
+    interest_returned = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_("Interest gained from the amortizations paid within the month."),
+    )
+    principal_returned = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_(
+            "Principal from savings account sources of the loans paid within the month."
+        ),
+    )
+
+    class Meta:
+        verbose_name = _("Monthly Ledger")
+        verbose_name_plural = _("Monthly Ledgers")
+        ordering = ("month",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=("month", "borrower"), name="unique_monthly_ledger"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.borrower} | {self.month:%b %Y}"
+
+
+class DueReminder(UUIDPrimaryKeyMixin):
+    """
+    A reminder sent to a borrower about an amortization, see
+    `apps.lending.reminders`. Each amortization is reminded of at most once while
+    upcoming and once when past due, however many times the reminders are sent.
+    """
+
+    KINDS = Choices(
+        ("upcoming", _("Upcoming")),
+        ("past_due", _("Past Due")),
+    )
+    amortization = models.ForeignKey(
+        "lending.Amortization",
+        related_name="reminders",
+        on_delete=models.CASCADE,
+    )
+    kind = models.CharField(max_length=16, choices=KINDS)
+    sent = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = _("Due Reminder")
+        verbose_name_plural = _("Due Reminders")
+        ordering = ("sent",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=("amortization", "kind"), name="unique_due_reminder"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.amortization} | {self.get_kind_display()}"
+
+
+class Job(UUIDPrimaryKeyMixin, TimeStampedModel):
+    """
+    A bulk action queued to run outside of the request which asked for it, see
+    `apps.lending.jobs`. The objects to act on are processed in chunks, each in its
+    own transaction, and the job keeps track of how many of them were processed so a
+    retry resumes where the failed attempt stopped.
+    """
+
+    STATUSES = Choices(
+        ("queued", _("Queued")),
+        ("running", _("Running")),
+        ("succeeded", _("Succeeded")),
+        ("failed", _("Failed")),
+    )
+    name = models.CharField(max_length=64)
+    object_ids = models.JSONField(
+        default=list, help_text=_("IDs of the objects to act on.")
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUSES, default=STATUSES.queued, db_index=True
+    )
+    processed = models.PositiveIntegerField(
+        default=0, help_text=_("Number of objects processed so far.")
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(
+        default=timezone.now, help_text=_("The job is not run before this time.")
+    )
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    created_by = models.ForeignKey(
+        get_user_model(),
+        related_name="lending_jobs",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = _("Job")
+        verbose_name_plural = _("Jobs")
+        ordering = ("-created",)
+
+    def __str__(self) -> str:
+        return f"{self.name} | {self.created:%Y-%m-%d %H:%M}"
+
+    @property
+    def total(self) -> int:
+        return len(self.object_ids)
+
+    @property
+    def progress(self) -> int:
+        """
+        Returns the percentage of the objects processed so far.
+        """
+        return self.processed * 100 // self.total if self.total else 100
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUSES.succeeded, self.STATUSES.failed)
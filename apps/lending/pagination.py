@@ -0,0 +1,149 @@
+"""
+Keyset(seek) pagination of the lending lists.
+
+Pages are found from the sort key of the last(or first) row of the previous page
+instead of an offset, so every page costs the same to fetch from an index however
+deep it is. The key of a row is its sort field followed by its primary key, which
+makes it unique.
+"""
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Field, Model, Q, QuerySet
+
+Cursor = Tuple[Any, Any]
+
+
+def resolve_field(model: type, path: str) -> Field:
+    """
+    Returns the field a lookup path such as `loan__loan_date` points to.
+    """
+    *relations, name = path.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+
+    return model._meta.get_field(name)
+
+
+def resolve_value(obj: Model, path: str) -> Any:
+    """
+    Returns the value of the object at a lookup path such as `loan__loan_date`.
+    """
+    for name in path.split("__"):
+        obj = getattr(obj, name)
+
+    return obj
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """
+    Returns the sort key of a row as an opaque URL-safe string.
+    """
+    data = json.dumps([str(value) for value in cursor]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(model: type, field: str, token: str) -> Cursor:
+    """
+    Returns the sort key encoded by `encode_cursor`, converted to the types of the
+    sort field and the primary key. Raises `ValueError` if the token is invalid.
+    """
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        value, pk = json.loads(data)
+        return (
+            resolve_field(model, field).to_python(value),
+            model._meta.pk.to_python(pk),
+        )
+    except (TypeError, ValueError, ValidationError) as error:
+        raise ValueError(f"Invalid cursor: {token}") from error
+
+
+class KeysetPage:
+    """
+    A page of rows along with the cursors of the pages before and after it, which
+    are `None` on the first and last pages.
+    """
+
+    def __init__(
+        self,
+        object_list: List[Model],
+        previous_cursor: Optional[str],
+        next_cursor: Optional[str],
+    ):
+        self.object_list = object_list
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_previous() or self.has_next()
+
+
+def seek(field: str, descending: bool, cursor: Cursor) -> Q:
+    """
+    Returns the condition of the rows sorted after the cursor.
+    """
+    value, pk = cursor
+    lookup = "lt" if descending else "gt"
+    return Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"pk__{lookup}": pk})
+
+
+def paginate(
+    queryset: QuerySet,
+    ordering: Sequence[str],
+    per_page: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+) -> KeysetPage:
+    """
+    Returns the page of `per_page` rows of the queryset, sorted by `ordering`(the
+    sort field, optionally prefixed with "-" for descending order, then "pk" or
+    "-pk" in the same direction), following the `after` cursor or preceding the
+    `before` one. Without either cursor, the first page is returned.
+
+    The sort field must not be nullable. A single query fetches one row more than
+    the page to know whether there is another page in the same direction.
+    """
+    field, _ = ordering
+    descending = field.startswith("-")
+    field = field.lstrip("-")
+    backwards = before is not None and after is None
+    token = before if backwards else after
+
+    queryset = queryset.order_by(*ordering)
+    if backwards:
+        queryset = queryset.reverse()
+    if token is not None:
+        cursor = decode_cursor(queryset.model, field, token)
+        queryset = queryset.filter(seek(field, descending != backwards, cursor))
+
+    rows = list(queryset[: per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def cursor_of(obj):
+        return encode_cursor((resolve_value(obj, field), obj.pk))
+
+    previous_cursor = next_cursor = None
+    if rows and (more if backwards else token is not None):
+        previous_cursor = cursor_of(rows[0])
+    if rows and (token is not None if backwards else more):
+        next_cursor = cursor_of(rows[-1])
+
+    return KeysetPage(rows, previous_cursor, next_cursor)
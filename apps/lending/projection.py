@@ -0,0 +1,316 @@
+"""
+In-memory projection of the cash flows of the active loans.
+
+The active loans and their sources are loaded once, in two queries, into compact
+arrays of whole cents. The cash flows of any number of future months are then
+projected from those arrays with integer arithmetic, instead of the `Decimal`
+properties of every loan, so projecting the whole book takes milliseconds.
+"""
+import datetime
+from array import array
+from bisect import bisect_right
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import DecimalField, F, OuterRef, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .analytics import month_range
+from .cache import get_snapshot
+from .models import CapitalSource, Loan, LoanSource
+from .utils import month_difference
+
+CENTS = 100
+
+# The projected cash flows, see `Portfolio.project`.
+FLOWS = ("interest_gained", "principal_receivable", "capital_source_payments")
+
+
+def to_cents(value: Decimal) -> int:
+    """
+    Returns an amount with at most 2 decimal places as a whole number of cents.
+    """
+    return int(value * CENTS)
+
+
+def to_amount(cents: int) -> Decimal:
+    """
+    Returns a whole number of cents as an amount with 2 decimal places.
+    """
+    return Decimal(cents).scaleb(-2)
+
+
+def round_half_even(numerator: int, denominator: int) -> int:
+    """
+    Returns the fraction rounded to a whole number the same way `round()` rounds a
+    `Decimal`, with halves rounded to the even number.
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    if remainder * 2 > denominator or (remainder * 2 == denominator and quotient % 2):
+        quotient += 1
+
+    return quotient
+
+
+def installment_cents(amount: int, interest_rate: int, term: int, halves: int) -> int:
+    """
+    Returns the cents due on each installment of `amount` cents lent at
+    `interest_rate` hundredths of a percent, paid `halves` times a month over `term`
+    months. This is how `Loan.amortization_amount_due` and
+    `LoanSource.capital_source_payment_amount` are computed: the principal split
+    between the installments plus the monthly interest, itself split in half for
+    bi-monthly schedules.
+    """
+    interest = round_half_even(amount * interest_rate, 100 * 100)
+    installments = term * halves
+    return round_half_even(
+        halves * amount + interest * installments, halves * installments
+    )
+
+
+class Portfolio:
+    """
+    The active loans as parallel arrays, one item per loan, and their sources as
+    parallel arrays, one item per source. Amounts are in cents.
+    """
+
+    def __init__(self):
+        self.loans: List = []
+        self.amounts = array("q")
+        self.interest_rates = array("l")
+        self.terms = array("l")
+        # 1 for monthly schedules and 2 for bi-monthly ones.
+        self.halves = array("b")
+        self.unpaid = array("l")
+        self.next_due_dates: List[Optional[datetime.date]] = []
+        self.interest_gained = array("q")
+        # The principal receivable per month as the numerator and denominator of an
+        # exact fraction of cents, see `Portfolio.principal`. These are too large
+        # for an array.
+        self.receivables: List[int] = []
+        self.receivable_units: List[int] = []
+        self.payments = array("q")
+
+        self.source_loans = array("l")
+        self.source_types: List[str] = []
+        self.source_amounts = array("q")
+        self.source_providers = array("b")
+
+    @classmethod
+    def load(cls, queryset: Optional[QuerySet] = None) -> "Portfolio":
+        """
+        Loads the loans which are not completed(or the selected ones) and their
+        sources.
+
+        What the rounding of the database takes part in, the interest gained and the
+        principal receivable, is annotated by the database the same way
+        `LoanQuerySet.with_financials` does, so the totals match the properties of
+        the loans to the cent.
+        """
+        portfolio = cls()
+        queryset = (
+            Loan.objects.filter(is_completed=False) if queryset is None else queryset
+        )
+        receivables = (
+            LoanSource.objects.filter(
+                loan=OuterRef("pk"),
+                capital_source__source=CapitalSource.SOURCES.savings,
+                capital_source__provider__isnull=True,
+            )
+            .order_by()
+            .values("loan")
+            .annotate(total=Sum(F("amount") / F("loan__term")))
+            .values("total")
+        )
+        rows = (
+            queryset.order_by()
+            .with_financials()
+            .annotate(
+                receivable=Coalesce(
+                    Subquery(receivables), 0, output_field=DecimalField()
+                )
+            )
+            .values_list(
+                "pk",
+                "amount",
+                "interest_rate",
+                "term",
+                "payment_schedule",
+                "unpaid_amortizations",
+                "next_unpaid_due_date",
+                "interest_gained",
+                "receivable",
+            )
+        )
+        index = {}
+        for (
+            pk,
+            amount,
+            interest_rate,
+            term,
+            payment_schedule,
+            unpaid,
+            next_due_date,
+            interest_gained,
+            receivable,
+        ) in rows:
+            index[pk] = len(portfolio.loans)
+            portfolio.loans.append(pk)
+            portfolio.amounts.append(to_cents(amount))
+            portfolio.interest_rates.append(to_cents(interest_rate))
+            portfolio.terms.append(term)
+            portfolio.halves.append(
+                1 if payment_schedule == Loan.PAYMENT_SCHEDULES.monthly else 2
+            )
+            portfolio.unpaid.append(unpaid)
+            portfolio.next_due_dates.append(next_due_date)
+            portfolio.interest_gained.append(to_cents(interest_gained))
+            numerator, denominator = (receivable * CENTS).as_integer_ratio()
+            portfolio.receivables.append(numerator)
+            portfolio.receivable_units.append(denominator)
+
+        sources = (
+            LoanSource.objects.filter(loan__in=queryset.values("pk"))
+            .order_by()
+            .values_list(
+                "loan",
+                "capital_source__source",
+                "amount",
+                "capital_source__provider",
+            )
+        )
+        for loan, source_type, amount, provider in sources:
+            portfolio.source_loans.append(index[loan])
+            portfolio.source_types.append(source_type)
+            portfolio.source_amounts.append(to_cents(amount))
+            portfolio.source_providers.append(provider is not None)
+
+        portfolio.payments = portfolio.capital_source_payments()
+        return portfolio
+
+    def __len__(self) -> int:
+        return len(self.loans)
+
+    def capital_source_payments(self) -> array:
+        """
+        Returns the cents owed to third-party providers on every installment of each
+        loan, see `LoanSource.capital_source_payment_amount`.
+        """
+        payments = array("q", [0]) * len(self)
+        for loan, amount, provider in zip(
+            self.source_loans, self.source_amounts, self.source_providers
+        ):
+            if provider:
+                payments[loan] += installment_cents(
+                    amount,
+                    self.interest_rates[loan],
+                    self.terms[loan],
+                    self.halves[loan],
+                )
+
+        return payments
+
+    def principal(self, loan: int, installments: int) -> int:
+        """
+        Returns the whole cents of principal receivable from the first
+        `installments` unpaid installments of the loan. Like
+        `Loan.total_principal_receivables`, only whole amounts are receivable, so
+        the principal of each installment is the difference of this total between
+        consecutive installments.
+        """
+        numerator = self.receivables[loan] * installments
+        denominator = self.receivable_units[loan] * self.halves[loan] * CENTS
+        return numerator // denominator * CENTS
+
+    def total_interest_gained(self) -> Decimal:
+        """
+        Returns the sum of `Loan.total_interest_gained` of the loans.
+        """
+        return to_amount(
+            sum(gained * term for gained, term in zip(self.interest_gained, self.terms))
+        )
+
+    def total_principal_receivables(self) -> Decimal:
+        """
+        Returns the sum of `Loan.total_principal_receivables` of the loans.
+        """
+        return to_amount(
+            sum(self.principal(loan, self.unpaid[loan]) for loan in range(len(self)))
+        )
+
+    def project(
+        self, months: int = 12, start: Optional[datetime.date] = None
+    ) -> Dict[str, List]:
+        """
+        Returns the interest gained, the principal receivable and the payments owed
+        to capital source providers in each of the `months` months starting from the
+        month of `start`(the current date if not given).
+
+        The unpaid installments of a loan are assumed to be due on consecutive
+        dates of its schedule from its next unpaid due date. Installments already
+        past due are expected in the first month.
+        """
+        start = start or timezone.localdate()
+        buckets = month_range(start, months)
+        # The first day of each month after the first one, to find the month of the
+        # installments of bi-monthly schedules.
+        bounds = [month.toordinal() for month in month_range(start, months + 1)[1:]]
+        flows = {flow: [0] * months for flow in FLOWS}
+        interest, principal, payments = (flows[flow] for flow in FLOWS)
+
+        for loan in range(len(self)):
+            unpaid, first = self.unpaid[loan], self.next_due_dates[loan]
+            if not unpaid or first is None:
+                continue
+
+            halves = self.halves[loan]
+            if halves == 1:
+                offset = month_difference(first, buckets[0])
+                first_month = max(offset, 0)
+            else:
+                ordinal = first.toordinal()
+                first_month = bisect_right(bounds, ordinal)
+
+            gained, owed = self.interest_gained[loan], self.payments[loan]
+            # See `Portfolio.principal`, inlined as it runs for every month.
+            numerator = self.receivables[loan]
+            denominator = self.receivable_units[loan] * halves * CENTS
+            due = received = 0
+            for month in range(first_month, months):
+                # The number of installments due by the end of the month, one a
+                # month or 15 days apart.
+                if halves == 1:
+                    due_by = min(month - offset + 1, unpaid)
+                else:
+                    due_by = min(-((ordinal - bounds[month]) // 15), unpaid)
+
+                interest[month] += gained * (due_by - due)
+                payments[month] += owed * (due_by - due)
+                total = numerator * due_by // denominator * CENTS
+                principal[month] += total - received
+                due, received = due_by, total
+                if due == unpaid:
+                    break
+
+        return {
+            "months": buckets,
+            **{flow: [to_amount(cents) for cents in flows[flow]] for flow in FLOWS},
+        }
+
+    def totals(
+        self, months: int = 12, start: Optional[datetime.date] = None
+    ) -> Dict[str, Decimal]:
+        """
+        Returns the total of each cash flow over the projected months, e.g. what
+        will be earned over the next `months` months, see `Portfolio.project`.
+        """
+        projection = self.project(months, start)
+        return {flow: sum(projection[flow], Decimal("0.00")) for flow in FLOWS}
+
+
+def get_portfolio() -> Portfolio:
+    """
+    Returns the active loans, loaded once and cached until the lending data changes.
+    """
+    return get_snapshot("portfolio", Portfolio.load)
@@ -0,0 +1,141 @@
+"""
+Email reminders of the upcoming and past due amortizations of the borrowers.
+
+Every borrower with amortizations to remind of gets a single message listing them.
+The messages are sent in batches over one connection to the email backend, and each
+reminded amortization is logged in :model:`lending.DueReminder`, so sending the
+reminders again only sends what has not been sent yet.
+"""
+import datetime
+from itertools import groupby
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Case, CharField, Exists, OuterRef, QuerySet, Value, When
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import Amortization, DueReminder
+from .schedules import chunked
+
+BATCH_SIZE = 100
+
+SUBJECT = _("sharky: Amortization reminder")
+HTML_TEMPLATE = "lending/email/due_reminder.html"
+TEXT_TEMPLATE = "lending/email/due_reminder.txt"
+
+
+class ReminderReport:
+    """
+    The outcome of sending the reminders: the number of messages sent, one per
+    borrower, and the number of amortizations reminded of.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.messages = 0
+        self.past_due = 0
+        self.upcoming = 0
+
+
+def due_reminders(
+    as_of: Optional[datetime.date] = None, days: Optional[int] = None
+) -> QuerySet:
+    """
+    Returns the amortizations which are past due or upcoming as of `as_of`(the
+    current date if not given), see `DueQuerySet`, and have not been reminded of
+    yet, ordered by borrower. Amortizations of loans without a borrower are left
+    out as there is no one to remind. The kind of reminder due for each amortization
+    is annotated as `reminder_kind`.
+    """
+    as_of = as_of or timezone.localdate()
+    amortizations = Amortization.objects.all()
+    reminded = DueReminder.objects.filter(
+        amortization=OuterRef("pk"), kind=OuterRef("reminder_kind")
+    )
+    return (
+        (amortizations.past_due(as_of) | amortizations.upcoming(as_of, days))
+        .filter(loan__borrower__isnull=False)
+        .select_related("loan", "loan__borrower")
+        .annotate(
+            reminder_kind=Case(
+                When(due_date__lte=as_of, then=Value(DueReminder.KINDS.past_due)),
+                default=Value(DueReminder.KINDS.upcoming),
+                output_field=CharField(),
+            )
+        )
+        .filter(~Exists(reminded))
+        .order_by("loan__borrower", "due_date", "pk")
+    )
+
+
+def send_due_reminders(
+    as_of: Optional[datetime.date] = None,
+    days: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    dry_run: bool = False,
+) -> ReminderReport:
+    """
+    Sends the reminders of the amortizations returned by `due_reminders`, at most
+    `batch_size` messages at a time. The amortizations of a batch are logged once
+    the batch is sent. With `dry_run`, the messages are built but neither sent nor
+    logged.
+
+    The templates are loaded once and the amortizations are fetched in a single
+    query, so the cost of a run is mostly the rendering and sending of the messages.
+    """
+    report = ReminderReport(dry_run=dry_run)
+    as_of = as_of or timezone.localdate()
+    html_template = get_template(HTML_TEMPLATE)
+    text_template = get_template(TEXT_TEMPLATE)
+
+    reminders = []
+    amortizations = due_reminders(as_of, days)
+    for _borrower, rows in groupby(amortizations, key=lambda row: row.loan.borrower_id):
+        rows = list(rows)
+        context = {
+            "borrower": rows[0].loan.borrower,
+            "as_of": as_of,
+            "past_due": [
+                row for row in rows if row.reminder_kind == DueReminder.KINDS.past_due
+            ],
+            "upcoming": [
+                row for row in rows if row.reminder_kind == DueReminder.KINDS.upcoming
+            ],
+        }
+        message = EmailMultiAlternatives(
+            subject=str(SUBJECT),
+            body=text_template.render(context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[context["borrower"].email],
+        )
+        message.attach_alternative(html_template.render(context), "text/html")
+        reminders.append((message, rows))
+        report.messages += 1
+        report.past_due += len(context["past_due"])
+        report.upcoming += len(context["upcoming"])
+
+    if dry_run or not reminders:
+        return report
+
+    with get_connection(fail_silently=False) as connection:
+        for batch in chunked(reminders, batch_size):
+            connection.send_messages([message for message, rows in batch])
+            log_reminders([row for message, rows in batch for row in rows])
+
+    return report
+
+
+def log_reminders(amortizations: List[Amortization]):
+    """
+    Logs the reminders sent of the amortizations annotated by `due_reminders`.
+    """
+    DueReminder.objects.bulk_create(
+        [
+            DueReminder(amortization=amortization, kind=amortization.reminder_kind)
+            for amortization in amortizations
+        ],
+        ignore_conflicts=True,
+    )
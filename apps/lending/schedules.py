@@ -0,0 +1,142 @@
+"""
+Generation of the payment schedules of loans.
+"""
+import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .cache import bump_data_version
+from .ledger import rebuild_ledger
+from .models import Amortization, CapitalSourcePayment, Loan
+
+BATCH_SIZE = 1000
+
+T = TypeVar("T")
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Splits an iterable into lists of at most `size` items.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def due_dates(loan: Loan) -> List[datetime.date]:
+    """
+    Returns the due dates of every installment of the loan.
+
+    The number of installments will depend on whether the payment schedule is
+    monthly or bi-monthly. If monthly, then the number of installments will be equal
+    to the loan's term, a month apart. If bi-monthly, it means there will be 2
+    payments for each month which should be equal to twice the value of term, 15 days
+    apart.
+    """
+    if loan.is_payment_schedule_monthly:
+        count, step = loan.term, relativedelta(months=1)
+    else:
+        count, step = loan.term * 2, relativedelta(days=15)
+
+    dates = []
+    due_date = loan.first_payment_date
+    for schedule in range(count):
+        dates.append(due_date)
+        due_date += step
+
+    return dates
+
+
+def generate_amortizations(
+    queryset: QuerySet, batch_size: int = BATCH_SIZE, refresh_ledger: bool = True
+) -> int:
+    """
+    Generates the amortizations of the selected loans and returns how many were
+    created. Callers generating many selections in a row can skip `refresh_ledger`
+    and rebuild the ledger of every borrower once at the end.
+
+    The amounts of each loan are computed once through `LoanQuerySet.with_financials`
+    so the whole selection only costs a single query. Installments which already
+    exist for a loan(same due date) are skipped, which makes re-running this safe.
+    """
+    loans = list(queryset.order_by().with_financials())
+    existing = set(
+        Amortization.objects.filter(loan__in=[loan.pk for loan in loans]).values_list(
+            "loan_id", "due_date"
+        )
+    )
+
+    def pending():
+        for loan in loans:
+            amount_due = loan.amortization_amount_due
+            amount_gained = amount_due - loan.total_deductibles
+            for due_date in due_dates(loan):
+                if (loan.pk, due_date) in existing:
+                    continue
+
+                yield Amortization(
+                    loan=loan,
+                    amount_due=amount_due,
+                    due_date=due_date,
+                    amount_gained=amount_gained,
+                )
+
+    created = 0
+    with transaction.atomic():
+        for batch in chunked(pending(), batch_size):
+            Amortization.objects.bulk_create(batch)
+            created += len(batch)
+
+        # Bulk creation skips the signals which keep the rollups, the ledger and the
+        # cached snapshots in sync.
+        Loan.objects.filter(pk__in=[loan.pk for loan in loans]).refresh_rollups()
+        borrowers = {loan.borrower_id for loan in loans}
+        if refresh_ledger:
+            rebuild_ledger(borrowers)
+        bump_data_version(borrowers=borrowers)
+
+    return created
+
+
+def generate_capital_source_payments(
+    queryset: QuerySet, batch_size: int = BATCH_SIZE
+) -> int:
+    """
+    Generates the payments to the capital source providers of the selected loan
+    sources and returns how many were created.
+
+    The loans and capital sources are fetched along with the loan sources and each
+    payment amount is computed once per source. Payments which already exist for a
+    source(same due date) are skipped, which makes re-running this safe.
+    """
+    sources = list(queryset.order_by().select_related("loan", "capital_source"))
+    existing = set(
+        CapitalSourcePayment.objects.filter(
+            loan_source__in=[source.pk for source in sources]
+        ).values_list("loan_source_id", "due_date")
+    )
+
+    def pending():
+        for source in sources:
+            amount = source.capital_source_payment_amount
+            for due_date in due_dates(source.loan):
+                if (source.pk, due_date) in existing:
+                    continue
+
+                yield CapitalSourcePayment(
+                    loan_source=source,
+                    amount=amount,
+                    due_date=due_date,
+                )
+
+    created = 0
+    with transaction.atomic():
+        for batch in chunked(pending(), batch_size):
+            CapitalSourcePayment.objects.bulk_create(batch)
+            created += len(batch)
+
+    return created
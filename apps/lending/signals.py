@@ -0,0 +1,165 @@
+from typing import Tuple
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import BORROWERS_VERSION_KEY, bump_data_version
+from .ledger import rebuild_ledger
+from .models import (
+    Amortization,
+    CapitalSource,
+    Loan,
+    LoanSource,
+    loans_pre_terminated,
+)
+
+# The fields of the loans which the ledger depends on.
+LEDGER_FIELDS = ("borrower", "amount", "term", "payment_schedule")
+# The fields of the users which the cached list of borrowers depends on.
+BORROWERS_LIST_FIELDS = ("is_borrower", "first_name", "last_name", "email")
+
+
+def loan_borrowers(instance) -> Tuple:
+    """
+    Returns the borrower of the loan of an amortization or loan source, or nothing if
+    the loan no longer exists. It is read from the loan when it is loaded, and
+    otherwise queried once per loan for all the receivers of a signal.
+    """
+    if instance._meta.get_field("loan").is_cached(instance):
+        return (instance.loan.borrower_id,)
+
+    cached = getattr(instance, "_loan_borrowers", None)
+    if cached is None or cached[0] != instance.loan_id:
+        borrowers = Loan.objects.filter(pk=instance.loan_id).values_list(
+            "borrower", flat=True
+        )
+        cached = instance._loan_borrowers = (instance.loan_id, tuple(borrowers))
+
+    return cached[1]
+
+
+@receiver(post_save, sender=Amortization)
+@receiver(post_delete, sender=Amortization)
+def refresh_loan_rollups(sender, instance, **kwargs):
+    """
+    Keeps the rollup fields of the loan in sync whenever one of its amortizations is
+    created, paid or removed.
+    """
+    Loan.objects.filter(pk=instance.loan_id).refresh_rollups()
+
+
+@receiver(post_save, sender=Amortization)
+@receiver(post_delete, sender=Amortization)
+def update_amortization_ledger(sender, instance, **kwargs):
+    """
+    Recomputes the ledger of the months the amortization was and is now due or paid
+    within.
+    """
+    rebuild_ledger(
+        loan_borrowers(instance),
+        {
+            instance.due_date,
+            instance.paid_date,
+            instance.tracker.previous("due_date"),
+            instance.tracker.previous("paid_date"),
+        },
+    )
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+def update_loan_ledger(sender, instance, signal, created=False, **kwargs):
+    """
+    Recomputes the ledger of the borrower of the loan, and its previous borrower if
+    it was reassigned, since the loan's terms affect the principal figures. Saves
+    which change none of the terms are skipped.
+    """
+    if signal is post_delete or (
+        not created
+        and any(instance.tracker.has_changed(field) for field in LEDGER_FIELDS)
+    ):
+        rebuild_ledger({instance.borrower_id, instance.tracker.previous("borrower")})
+
+
+@receiver(loans_pre_terminated, sender=Loan)
+def update_pre_terminated_ledger(sender, borrowers, **kwargs):
+    """
+    Recomputes the ledger of the borrowers of pre-terminated loans since their
+    remaining amortizations are paid.
+    """
+    rebuild_ledger(borrowers)
+
+
+@receiver(post_save, sender=LoanSource)
+@receiver(post_delete, sender=LoanSource)
+def update_loan_source_ledger(sender, instance, **kwargs):
+    """
+    Recomputes the ledger of the borrower of the loan since its sources affect the
+    principal figures.
+    """
+    rebuild_ledger(loan_borrowers(instance))
+
+
+@receiver(post_save, sender=Amortization)
+@receiver(post_delete, sender=Amortization)
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+@receiver(post_save, sender=LoanSource)
+@receiver(post_delete, sender=LoanSource)
+def invalidate_snapshots(sender, instance, **kwargs):
+    """
+    Invalidates the cached lending snapshots whenever lending data changes, along
+    with those of the borrower of the loan, and its previous borrower if the loan
+    was reassigned.
+    """
+    if sender is Loan:
+        borrowers = {instance.borrower_id, instance.tracker.previous("borrower")}
+    else:
+        borrowers = loan_borrowers(instance)
+
+    bump_data_version(borrowers=borrowers)
+
+
+@receiver(post_save, sender=CapitalSource)
+@receiver(post_delete, sender=CapitalSource)
+def update_capital_source_data(sender, instance, **kwargs):
+    """
+    Recomputes the ledger of the borrowers whose loans are funded by the capital
+    source and invalidates the cached lending snapshots, since the principal figures
+    and the loan sources graph depend on the kind and provider of the sources. The
+    loan sources of a deleted capital source are deleted before it, along with
+    their own updates.
+    """
+    borrowers = set(
+        Loan.objects.filter(sources__capital_source=instance).values_list(
+            "borrower", flat=True
+        )
+    )
+    if borrowers:
+        rebuild_ledger(borrowers)
+    bump_data_version(borrowers=borrowers)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_snapshots_on_borrower_status(sender, instance, created, **kwargs):
+    """
+    Invalidates the cached lending snapshots when a borrower is activated or
+    deactivated since inactive borrowers are excluded from them.
+    """
+    if not created and instance.tracker.has_changed("is_borrower_active"):
+        bump_data_version(borrowers=[instance.pk])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_borrowers_list(sender, instance, created=True, **kwargs):
+    """
+    Invalidates the cached list of borrowers when a user is created or deleted(which
+    sends no `created`), or when a field the list depends on changes, but not on
+    other changes such as the last login of a user.
+    """
+    if created or any(
+        instance.tracker.has_changed(field) for field in BORROWERS_LIST_FIELDS
+    ):
+        bump_data_version(BORROWERS_VERSION_KEY)
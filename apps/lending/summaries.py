@@ -0,0 +1,110 @@
+"""
+Summaries of the lending data of a single borrower.
+"""
+import datetime
+import math
+from typing import Any, Dict, Optional
+
+from django.db.models import DecimalField, F, OuterRef, Q, QuerySet, Subquery, Sum
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+
+from .models import Amortization, CapitalSource, Loan, LoanSource
+
+
+def past_due_amortizations(borrower: EmailUser, today: datetime.date) -> QuerySet:
+    """
+    Returns the unpaid amortizations of the borrower which are due on or before
+    `today`, along with what is needed to list them. Unlike the list of past due
+    amortizations, they are listed whether or not the borrower is active.
+    """
+    return (
+        Amortization.objects.select_related(
+            "loan",
+            "loan__borrower",
+        )
+        .prefetch_related(
+            "loan__sources",
+            "loan__sources__capital_source",
+        )
+        .filter(
+            loan__borrower=borrower,
+            due_date__lte=today,
+            paid_date__isnull=True,
+        )
+        .with_payment_stage()
+    )
+
+
+def past_due_totals(borrower: EmailUser, today: datetime.date) -> Dict[str, Any]:
+    """
+    Returns the totals of the past due amortizations of the borrower in a single
+    query: the amount payable, the amount earned and the principal receivable from
+    savings account sources of the loans with past due amortizations. Each total is
+    rounded up to a whole amount.
+    """
+
+    def past_due_sum(field):
+        return Subquery(
+            Amortization.objects.filter(
+                loan=OuterRef("pk"), due_date__lte=today, paid_date__isnull=True
+            )
+            .order_by()
+            .values("loan")
+            .annotate(total=Sum(field))
+            .values("total"),
+            output_field=DecimalField(),
+        )
+
+    receivables = (
+        LoanSource.objects.filter(
+            loan=OuterRef("pk"),
+            capital_source__source=CapitalSource.SOURCES.savings,
+            capital_source__provider__isnull=True,
+        )
+        .order_by()
+        .values("loan")
+        .annotate(total=Sum(F("amount") / F("loan__term")))
+        .values("total")
+    )
+    totals = (
+        Loan.objects.filter(borrower=borrower)
+        .annotate(
+            payable=past_due_sum("amount_due"),
+            earned=past_due_sum("amount_gained"),
+            receivable=Subquery(receivables, output_field=DecimalField()),
+        )
+        .aggregate(
+            total_payable=Sum("payable"),
+            total_amount_earned=Sum("earned"),
+            total_principal=Sum("receivable", filter=Q(payable__isnull=False)),
+        )
+    )
+    return {key: math.ceil(total or 0) for key, total in totals.items()}
+
+
+def borrower_summary(
+    borrower: EmailUser, today: Optional[datetime.date] = None
+) -> Dict[str, Any]:
+    """
+    Returns everything displayed in the page of a borrower as of `today`(the current
+    date if not given): the past due totals, see `past_due_totals`, the active loans
+    and the past due amortizations.
+    """
+    today = today or timezone.localdate()
+    summary = past_due_totals(borrower, today)
+    summary.update(
+        {
+            "active_loans": list(
+                borrower.loans.prefetch_related(
+                    "sources",
+                    "sources__capital_source",
+                )
+                .filter(is_completed=False)
+                .with_financials()
+            ),
+            "amortizations": past_due_amortizations(borrower, today),
+        }
+    )
+    return summary
@@ -0,0 +1,166 @@
+"""
+Generation of synthetic loan books used to benchmark and test the lending app at
+realistic volumes.
+"""
+import datetime
+import random
+from decimal import Decimal
+from typing import List, Optional
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+
+from .cache import BORROWERS_VERSION_KEY, bump_data_version
+from .ledger import rebuild_ledger
+from .models import Amortization, Bank, CapitalSource, Loan, LoanSource
+from .schedules import BATCH_SIZE, chunked, due_dates
+
+
+def generate_loan_book(
+    borrowers: int = 100,
+    loans_per_borrower: int = 5,
+    sources_per_loan: int = 2,
+    term: int = 12,
+    seed: int = 0,
+    batch_size: int = BATCH_SIZE,
+    as_of: Optional[datetime.date] = None,
+) -> List[EmailUser]:
+    """
+    Creates a deterministic loan book as of `as_of`(the current date if not given)
+    and returns its borrowers. The same arguments always produce the same loans,
+    relative to `as_of`.
+
+    Every loan has a `term` of months, so it has `term` amortizations if paid monthly
+    or twice as many if paid bi-monthly. Loans are funded by `sources_per_loan` of a
+    savings account, a savings account of a third-party provider, a credit card and a
+    cash loan. Loans start around `term / 2` months before `as_of` so they have both
+    paid and unpaid amortizations, some of which are past due. One borrower in ten
+    is inactive.
+
+    Every row is bulk created, so the signals are skipped and the loan rollups and
+    the ledger are refreshed once at the end.
+    """
+    rng = random.Random(seed)
+    as_of = as_of or timezone.localdate()
+    amort_types = [choice[0] for choice in Amortization.AMORTIZATION_TYPES]
+    schedules = [choice[0] for choice in Loan.PAYMENT_SCHEDULES]
+
+    with transaction.atomic():
+        provider = EmailUser.objects.create_user(
+            f"provider{seed}@loanbook.example.com", is_capital_source_provider=True
+        )
+        bank = Bank.objects.create(name=f"Loan Book Bank {seed}")
+        capital_sources = CapitalSource.objects.bulk_create(
+            [
+                CapitalSource(
+                    source=CapitalSource.SOURCES.savings, bank=bank, name="Savings"
+                ),
+                CapitalSource(
+                    source=CapitalSource.SOURCES.savings,
+                    bank=bank,
+                    name="Provider Savings",
+                    provider=provider,
+                ),
+                CapitalSource(
+                    source=CapitalSource.SOURCES.credit_card,
+                    bank=bank,
+                    name="Credit Card",
+                ),
+                CapitalSource(
+                    source=CapitalSource.SOURCES.loan, bank=bank, name="Loan"
+                ),
+            ]
+        )
+
+        users = EmailUser.objects.bulk_create(
+            [
+                EmailUser(
+                    email=f"borrower{seed}-{index}@loanbook.example.com",
+                    first_name="Borrower",
+                    last_name=str(index),
+                    is_borrower=True,
+                    is_borrower_active=index % 10 != 9,
+                )
+                for index in range(borrowers)
+            ],
+            batch_size=batch_size,
+        )
+
+        loans = []
+        for borrower in users:
+            for _ in range(loans_per_borrower):
+                first_payment_date = (
+                    as_of
+                    - relativedelta(months=term // 2)
+                    + relativedelta(days=rng.randint(0, 30))
+                )
+                loans.append(
+                    Loan(
+                        borrower=borrower,
+                        amount=Decimal(rng.choice([5000, 10000, 25000, 50000])),
+                        interest_rate=Decimal(rng.choice(["3", "4.5", "5"])),
+                        term=term,
+                        payment_schedule=rng.choice(schedules),
+                        loan_date=first_payment_date - relativedelta(months=1),
+                        first_payment_date=first_payment_date,
+                    )
+                )
+        Loan.objects.bulk_create(loans, batch_size=batch_size)
+
+        sources = []
+        for loan in loans:
+            amount = round(loan.amount / sources_per_loan, 2)
+            for capital_source in rng.sample(capital_sources, sources_per_loan):
+                sources.append(
+                    LoanSource(
+                        loan=loan,
+                        capital_source=capital_source,
+                        amount=amount,
+                        interest_rate=(
+                            None if capital_source.is_savings else Decimal("2.5")
+                        ),
+                        monthly_amortization=(
+                            None
+                            if capital_source.is_savings
+                            else round(amount / term * Decimal("1.025"), 2)
+                        ),
+                    )
+                )
+        LoanSource.objects.bulk_create(sources, batch_size=batch_size)
+
+        financials = {
+            loan.pk: loan
+            for loan in Loan.objects.filter(borrower__in=users).with_financials()
+        }
+
+        def amortizations():
+            for loan in loans:
+                amount_due = financials[loan.pk].amortization_amount_due
+                amount_gained = amount_due - financials[loan.pk].total_deductibles
+                for due_date in due_dates(loan):
+                    paid = due_date <= as_of and rng.random() < 0.85
+                    yield Amortization(
+                        loan=loan,
+                        amount_due=amount_due,
+                        amount_gained=amount_gained,
+                        amort_type=rng.choices(amort_types, weights=[8, 1, 1])[0],
+                        due_date=due_date,
+                        paid_date=(
+                            due_date + relativedelta(days=rng.randint(-3, 10))
+                            if paid
+                            else None
+                        ),
+                    )
+
+        for batch in chunked(amortizations(), batch_size):
+            Amortization.objects.bulk_create(batch)
+
+        Loan.objects.filter(borrower__in=users).refresh_rollups()
+        rebuild_ledger([user.pk for user in users])
+        bump_data_version(borrowers=[user.pk for user in users])
+        bump_data_version(BORROWERS_VERSION_KEY)
+
+    return users
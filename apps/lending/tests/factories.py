@@ -0,0 +1,77 @@
+import datetime
+from decimal import Decimal
+
+import factory
+
+from apps.accounts.tests.factories import UserFactory
+
+
+class BankFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for :model:`lending.Bank`
+    """
+
+    name = factory.Sequence(lambda n: f"Bank {n}")
+
+    class Meta:
+        model = "lending.Bank"
+
+
+class CapitalSourceFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for :model:`lending.CapitalSource`
+    """
+
+    source = "savings"
+    bank = factory.SubFactory(BankFactory)
+    name = factory.Sequence(lambda n: f"Account {n}")
+
+    class Meta:
+        model = "lending.CapitalSource"
+
+
+class LoanFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for :model:`lending.Loan`
+    """
+
+    borrower = factory.SubFactory(
+        UserFactory,
+        email=factory.Sequence(lambda n: f"borrower{n}@example.com"),
+        is_borrower=True,
+    )
+    amount = Decimal("10000")
+    interest_rate = Decimal("5")
+    term = 6
+    loan_date = datetime.date(2021, 1, 1)
+    first_payment_date = datetime.date(2021, 2, 1)
+
+    class Meta:
+        model = "lending.Loan"
+
+
+class LoanSourceFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for :model:`lending.LoanSource`
+    """
+
+    loan = factory.SubFactory(LoanFactory)
+    capital_source = factory.SubFactory(CapitalSourceFactory)
+    amount = factory.SelfAttribute("loan.amount")
+
+    class Meta:
+        model = "lending.LoanSource"
+
+
+class AmortizationFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for :model:`lending.Amortization`
+    """
+
+    loan = factory.SubFactory(LoanFactory)
+    amount_due = Decimal("2167")
+    amount_gained = Decimal("500")
+    due_date = factory.SelfAttribute("loan.first_payment_date")
+
+    class Meta:
+        model = "lending.Amortization"
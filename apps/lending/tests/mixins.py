@@ -0,0 +1,121 @@
+import datetime
+import random
+from decimal import Decimal
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+
+from apps.accounts.tests.mixins import AccountsMixin
+from apps.lending.models import Amortization, CapitalSource, Loan
+from apps.lending.views import GraphView
+
+from .factories import (
+    AmortizationFactory,
+    CapitalSourceFactory,
+    LoanFactory,
+    LoanSourceFactory,
+)
+
+# Runs the queries of the graph views in the thread of the test, as their own
+# connections can't see the data of a `TestCase`.
+thread_sensitive_graphs = mock.patch.object(GraphView, "thread_sensitive", True)
+
+
+class LendingMixin(AccountsMixin):
+    """
+    A collection of methods for creating test data for lending app.
+    """
+
+    def create_capital_source(self, **kwargs):
+        return CapitalSourceFactory(**kwargs)
+
+    def create_loan(self, **kwargs):
+        return LoanFactory(**kwargs)
+
+    def create_loan_source(self, **kwargs):
+        return LoanSourceFactory(**kwargs)
+
+    def create_amortization(self, **kwargs):
+        return AmortizationFactory(**kwargs)
+
+    def create_portfolio(
+        self,
+        borrowers: int = 4,
+        loans_per_borrower: int = 3,
+        start: datetime.date = datetime.date(2021, 1, 1),
+        seed: int = 0,
+    ):
+        """
+        Creates a deterministic set of borrowers, loans, loan sources and
+        amortizations mixing every payment schedule, capital source type and
+        amortization type. Some borrowers are inactive and some amortizations are
+        paid or pre-terminated.
+        """
+        rng = random.Random(seed)
+        provider = self.create_user(
+            email=f"provider{seed}@example.com", is_capital_source_provider=True
+        )
+        capital_sources = [
+            self.create_capital_source(source=CapitalSource.SOURCES.savings),
+            self.create_capital_source(
+                source=CapitalSource.SOURCES.savings, provider=provider
+            ),
+            self.create_capital_source(source=CapitalSource.SOURCES.credit_card),
+            self.create_capital_source(source=CapitalSource.SOURCES.loan),
+        ]
+        amort_types = [choice[0] for choice in Amortization.AMORTIZATION_TYPES]
+
+        for index in range(borrowers):
+            borrower = self.create_user(
+                email=f"borrower{seed}-{index}@example.com",
+                first_name=f"Borrower {index}",
+                is_borrower=True,
+                is_borrower_active=index % 4 != 3,
+            )
+            for _ in range(loans_per_borrower):
+                first_payment_date = start + relativedelta(days=rng.randint(0, 300))
+                loan = self.create_loan(
+                    borrower=borrower,
+                    amount=Decimal(rng.choice([5000, 10000, 25000, 50000])),
+                    interest_rate=Decimal(rng.choice(["3", "4.5", "5"])),
+                    term=rng.randint(3, 12),
+                    payment_schedule=rng.choice(
+                        [choice[0] for choice in Loan.PAYMENT_SCHEDULES]
+                    ),
+                    loan_date=first_payment_date - relativedelta(months=1),
+                    first_payment_date=first_payment_date,
+                )
+                for capital_source in rng.sample(capital_sources, rng.randint(1, 2)):
+                    self.create_loan_source(
+                        loan=loan,
+                        capital_source=capital_source,
+                        amount=loan.amount / 2,
+                        interest_rate=(
+                            None if capital_source.is_savings else Decimal("2.5")
+                        ),
+                        monthly_amortization=(
+                            None if capital_source.is_savings else Decimal("1000")
+                        ),
+                    )
+
+                count = loan.term if loan.is_payment_schedule_monthly else loan.term * 2
+                due_date = loan.first_payment_date
+                for _ in range(count):
+                    paid = rng.random() < 0.4
+                    self.create_amortization(
+                        loan=loan,
+                        amount_due=loan.amortization_amount_due,
+                        amount_gained=Decimal(rng.randint(100, 1000)),
+                        amort_type=rng.choices(amort_types, weights=[8, 1, 1])[0],
+                        due_date=due_date,
+                        paid_date=(
+                            due_date + relativedelta(days=rng.randint(-5, 20))
+                            if paid
+                            else None
+                        ),
+                        is_preterminated=paid and rng.random() < 0.1,
+                    )
+                    if loan.is_payment_schedule_monthly:
+                        due_date += relativedelta(months=1)
+                    else:
+                        due_date += relativedelta(days=15)
@@ -0,0 +1,151 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+from apps.lending.cache import (
+    DATA_VERSION_KEY,
+    borrower_version_key,
+    bump_data_version,
+    get_data_version,
+)
+from apps.lending.models import Amortization
+
+from .mixins import LendingMixin
+
+
+class DataVersionTests(LendingMixin, TestCase):
+    """
+    Tests for the versions of the lending data in `apps.lending.cache`.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def versions(self, *keys):
+        return [get_data_version(key) for key in keys]
+
+    def test_bump_borrowers(self):
+        keys = (DATA_VERSION_KEY, borrower_version_key(1), borrower_version_key(2))
+        before = self.versions(*keys)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version(borrowers=[1, None])
+
+        after = self.versions(*keys)
+        self.assertEqual(
+            [old != new for old, new in zip(before, after)], [True, True, False]
+        )
+
+    def test_signals_bump_affected_versions(self):
+        amortization = self.create_amortization()
+        other = self.create_amortization()
+        loan, borrower = amortization.loan, amortization.loan.borrower
+        keys = (
+            borrower_version_key(borrower.pk),
+            borrower_version_key(other.loan.borrower_id),
+        )
+        before = self.versions(*keys)
+        with self.captureOnCommitCallbacks(execute=True):
+            amortization.paid_date = timezone.now().date()
+            amortization.save()
+
+        after = self.versions(*keys)
+        self.assertEqual([old != new for old, new in zip(before, after)], [True, False])
+
+        # Reassigning a loan changes both the previous and the new borrower.
+        before = self.versions(*keys)
+        with self.captureOnCommitCallbacks(execute=True):
+            loan.borrower = other.loan.borrower
+            loan.save()
+
+        self.assertTrue(
+            all(old != new for old, new in zip(before, self.versions(*keys)))
+        )
+
+    def test_signals_look_up_borrower_once(self):
+        amortization = self.create_amortization()
+        lookup = 'SELECT "lending_loan"."borrower_id" FROM'
+
+        def lookups(amortization):
+            with CaptureQueriesContext(connection) as queries:
+                amortization.paid_date = timezone.now().date()
+                amortization.save()
+            return sum(query["sql"].startswith(lookup) for query in queries)
+
+        self.assertEqual(lookups(Amortization.objects.get(pk=amortization.pk)), 1)
+        # Read from the loan when it is loaded.
+        self.assertEqual(
+            lookups(
+                Amortization.objects.select_related("loan").get(pk=amortization.pk)
+            ),
+            0,
+        )
+
+
+class CachedListTests(LendingMixin, TestCase):
+    """
+    Tests that the lists of loans and amortizations are cached per user until the
+    data visible to the user changes.
+    """
+
+    LISTS = ("lending:loans-active", "lending:past-due-list")
+
+    def setUp(self):
+        cache.clear()
+        self.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+        self.amortizations = [
+            self.create_amortization(due_date=timezone.now().date()) for _ in range(2)
+        ]
+        self.borrowers = [
+            amortization.loan.borrower for amortization in self.amortizations
+        ]
+
+    def lists_queried(self, user):
+        """
+        Returns the names of the lists whose objects were fetched from the database
+        when requested by the user.
+        """
+        self.client.force_login(user)
+        queried = []
+        for name in self.LISTS:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(name))
+
+            self.assertEqual(response.status_code, 200)
+            tables = ('FROM "lending_loan"', 'FROM "lending_amortization"')
+            if any(table in query["sql"] for query in queries for table in tables):
+                queried.append(name)
+
+        return queried
+
+    def test_cached_per_user(self):
+        for user in (*self.borrowers, self.admin):
+            self.assertEqual(self.lists_queried(user), list(self.LISTS))
+            self.assertEqual(self.lists_queried(user), [])
+
+        response = self.client.get(reverse("lending:past-due-list"))
+        self.assertEqual(
+            {amortization.pk for amortization in response.context["amortizations"]},
+            {amortization.pk for amortization in self.amortizations},
+        )
+
+    def test_payment_invalidates_borrower(self):
+        for user in (*self.borrowers, self.admin):
+            self.lists_queried(user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.amortizations[0].paid_date = timezone.now().date()
+            self.amortizations[0].save()
+
+        self.assertEqual(self.lists_queried(self.borrowers[0]), list(self.LISTS))
+        self.assertEqual(self.lists_queried(self.borrowers[1]), [])
+        self.assertEqual(self.lists_queried(self.admin), list(self.LISTS))
+
+        response = self.client.get(reverse("lending:past-due-list"))
+        self.assertEqual(
+            [amortization.pk for amortization in response.context["amortizations"]],
+            [self.amortizations[1].pk],
+        )
@@ -0,0 +1,83 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.models import EmailUser
+
+from .mixins import LendingMixin
+
+
+class BorrowersContextProcessorTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.context_processors.borrowers`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+        cls.borrower = cls().create_user(
+            first_name="Juan", last_name="Dela Cruz", is_borrower=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("lending:loans-active"))
+
+        self.assertEqual(response.status_code, 200)
+        borrower_queries = [
+            query
+            for query in queries
+            if 'WHERE "accounts_emailuser"."is_borrower"' in query["sql"]
+        ]
+        return response, len(borrower_queries)
+
+    def test_superuser(self):
+        self.client.force_login(self.admin)
+        response, count = self.get_page()
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            list(response.context["borrowers_list"]),
+            [{"pk": self.borrower.pk, "full_name": "Juan Dela Cruz"}],
+        )
+        self.assertContains(response, "Juan Dela Cruz")
+
+        response, count = self.get_page()
+        self.assertEqual(count, 0)
+        self.assertContains(response, "Juan Dela Cruz")
+
+    def test_invalidated_when_user_changes(self):
+        self.client.force_login(self.admin)
+        self.get_page()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.borrower.first_name = "Pedro"
+            self.borrower.save()
+
+        response, count = self.get_page()
+        self.assertEqual(count, 1)
+        self.assertContains(response, "Pedro Dela Cruz")
+
+    def test_kept_on_login(self):
+        self.client.force_login(self.admin)
+        self.get_page()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(self.borrower)
+            self.client.force_login(self.admin)
+            self.borrower.phone = "09171234567"
+            self.borrower.save()
+
+        response, count = self.get_page()
+        self.assertEqual(count, 0)
+
+    def test_not_fetched_for_borrowers(self):
+        self.client.force_login(self.borrower)
+        response, count = self.get_page()
+
+        self.assertEqual(count, 0)
+        self.assertNotContains(response, "collapseBorrowers")
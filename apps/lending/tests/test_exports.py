@@ -0,0 +1,163 @@
+import csv
+import io
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.models import EmailUser
+from apps.lending.exports import EXPORT_COLUMNS
+from apps.lending.models import (
+    Amortization,
+    CapitalSourcePayment,
+    Loan,
+    LoanSource,
+    LoanSourceAmortization,
+)
+from apps.lending.schedules import generate_capital_source_payments
+from apps.lending.synthetic import generate_loan_book
+
+from .mixins import LendingMixin
+
+
+class ExportTests(LendingMixin, TestCase):
+    """
+    Tests for the CSV exports of the amortization schedules and capital source
+    payments.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.borrowers = generate_loan_book(borrowers=12, term=4)
+        generate_capital_source_payments(
+            LoanSource.objects.filter(capital_source__provider__isnull=False)
+        )
+        LoanSourceAmortization.objects.bulk_create(
+            LoanSourceAmortization(
+                source=source,
+                due_date=source.loan.first_payment_date,
+                amount=source.monthly_amortization,
+                is_preterminated=False,
+            )
+            for source in LoanSource.objects.filter(
+                monthly_amortization__isnull=False
+            ).select_related("loan")
+        )
+        cls.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def export(self, name, **params):
+        """
+        Returns the status and the parsed rows of the export, consuming the stream.
+        """
+        response = self.client.get(reverse(name), params)
+        if response.status_code != 200:
+            return response.status_code, []
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        return response.status_code, list(csv.reader(io.StringIO(content)))
+
+    def assertMatchesList(self, due, list_name):
+        """
+        Asserts that the export has the same amortizations as the list page.
+        """
+        status, rows = self.export("lending:amortization-export", due=due)
+        self.assertEqual(status, 200)
+        listed = self.client.get(reverse(list_name)).context["amortizations"]
+        self.assertTrue(listed)
+        self.assertEqual(
+            sorted((row[3], row[5]) for row in rows[1:]),
+            sorted((str(amort.loan_id), str(amort.due_date)) for amort in listed),
+        )
+
+    def test_amortization_export(self):
+        status, rows = self.export("lending:amortization-export")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            rows[0], [header for header, field in EXPORT_COLUMNS[Amortization]]
+        )
+        self.assertEqual(len(rows) - 1, Amortization.objects.count())
+        amortization = Amortization.objects.select_related("loan__borrower").get(
+            loan_id=rows[1][3], due_date=rows[1][5]
+        )
+        self.assertEqual(rows[1][0], amortization.loan.borrower.email)
+        self.assertEqual(rows[1][6], str(amortization.amount_due))
+
+    def test_past_due_export(self):
+        self.assertMatchesList("past-due", "lending:past-due-list")
+
+    def test_upcoming_export(self):
+        self.assertMatchesList("upcoming", "lending:upcoming-due-list")
+
+    def test_unknown_due_filter(self):
+        status, rows = self.export("lending:amortization-export", due="overdue")
+        self.assertEqual(status, 404)
+
+    def test_capital_source_exports(self):
+        for name, model in (
+            ("lending:capital-source-payment-export", CapitalSourcePayment),
+            ("lending:loan-source-amortization-export", LoanSourceAmortization),
+        ):
+            status, rows = self.export(name)
+            self.assertEqual(status, 200)
+            self.assertTrue(rows[1:])
+            self.assertEqual(len(rows) - 1, model.objects.count())
+
+    def test_borrower_exports(self):
+        borrower = self.borrowers[0]
+        self.client.force_login(borrower)
+        status, rows = self.export("lending:amortization-export")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            len(rows) - 1, Amortization.objects.filter(loan__borrower=borrower).count()
+        )
+        self.assertEqual({row[0] for row in rows[1:]}, {borrower.email})
+
+        for name in (
+            "lending:capital-source-payment-export",
+            "lending:loan-source-amortization-export",
+        ):
+            status, rows = self.export(name)
+            self.assertEqual(status, 403)
+
+    def test_constant_queries(self):
+        """
+        The rows are streamed from a single query regardless of their number.
+        """
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                status, rows = self.export("lending:amortization-export")
+            return len(queries), len(rows)
+
+        queries, rows = count_queries()
+        generate_loan_book(borrowers=10, term=4, seed=1)
+        grown_queries, grown_rows = count_queries()
+        self.assertGreater(grown_rows, rows)
+        self.assertEqual(grown_queries, queries)
+
+    def test_admin_export_action(self):
+        loans = Loan.objects.filter(borrower=self.borrowers[1])
+        response = self.client.post(
+            reverse("admin:lending_loan_changelist"),
+            {
+                "action": "export_amortizations",
+                "index": 0,
+                "_selected_action": [
+                    str(pk) for pk in loans.values_list("pk", flat=True)
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment", response["Content-Disposition"])
+        rows = list(
+            csv.reader(io.StringIO(b"".join(response.streaming_content).decode()))
+        )
+        self.assertEqual(
+            len(rows) - 1, Amortization.objects.filter(loan__in=loans).count()
+        )
+        self.assertEqual({row[0] for row in rows[1:]}, {self.borrowers[1].email})
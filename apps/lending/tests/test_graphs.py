@@ -0,0 +1,240 @@
+import datetime
+import json
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import F, Q, Sum
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.lending.analytics import monthly_series
+from apps.lending.models import Amortization, CapitalSource, Loan, LoanSource
+
+from .mixins import LendingMixin, thread_sensitive_graphs
+
+
+def legacy_monthly_series(date_field, start, months=12, active_only=False):
+    """
+    The month by month implementation previously used by the earnings and money
+    returned graphs. Kept as the reference for the grouped implementation.
+    """
+    active = Q(loan__borrower__is_borrower_active=True) if active_only else Q()
+    loan_date = start
+    labels = []
+    interest_data = []
+    principal_data = []
+    for i in range(months):
+        labels.append(loan_date.strftime("%b %Y"))
+        in_month = {
+            f"{date_field}__month": loan_date.month,
+            f"{date_field}__year": loan_date.year,
+        }
+
+        amortizations = Amortization.objects.filter(
+            ~Q(amort_type=Amortization.AMORTIZATION_TYPES.principal_only),
+            active,
+            is_preterminated=False,
+            **in_month,
+        ).aggregate(total_gained=Sum("amount_gained"))
+
+        interest_data.append(amortizations["total_gained"])
+
+        principal_amortization = Amortization.objects.filter(
+            ~Q(amort_type=Amortization.AMORTIZATION_TYPES.interest_only),
+            active,
+            **in_month,
+        ).distinct()
+
+        receivable = (
+            LoanSource.objects.filter(
+                loan__amortizations__in=principal_amortization,
+                capital_source__source=CapitalSource.SOURCES.savings,
+                capital_source__provider__isnull=True,
+            )
+            .distinct()
+            .annotate(receivables=F("amount") / F("loan__term"))
+            .aggregate(total=Sum("receivables"))
+        )
+
+        principal_data.append(receivable["total"])
+
+        loan_date += relativedelta(months=1)
+
+    return {
+        "labels": labels,
+        "interest_data": interest_data,
+        "principal_data": principal_data,
+    }
+
+
+@thread_sensitive_graphs
+class MonthlySeriesTests(LendingMixin, TestCase):
+    """
+    Tests for the monthly series used by the dashboard graphs.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=8, loans_per_borrower=4)
+
+    def test_matches_legacy_series(self):
+        for date_field, active_only in (("due_date", True), ("paid_date", False)):
+            for start in (
+                datetime.date(2020, 10, 1),
+                datetime.date(2021, 3, 1),
+                datetime.date(2021, 9, 15),
+            ):
+                for months in (12, 24, 36):
+                    with self.subTest(
+                        date_field=date_field, start=start, months=months
+                    ):
+                        filters = (
+                            Q(loan__borrower__is_borrower_active=True)
+                            if active_only
+                            else None
+                        )
+                        self.assertEqual(
+                            monthly_series(date_field, start, months, filters),
+                            legacy_monthly_series(
+                                date_field, start, months, active_only
+                            ),
+                        )
+
+    def test_single_query(self):
+        for months in (12, 36):
+            with self.assertNumQueries(1):
+                monthly_series("due_date", datetime.date(2021, 1, 1), months)
+
+    def get_graph(self, url_name, now):
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            return self.client.get(
+                reverse(url_name),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            )
+
+    def test_earnings_graph(self):
+        now = timezone.make_aware(datetime.datetime(2021, 6, 10))
+        response = self.get_graph("lending:earnings-graph", now)
+
+        self.assertEqual(response.status_code, 200)
+        expected = legacy_monthly_series(
+            "due_date", datetime.date(2021, 1, 10), active_only=True
+        )
+        self.assertEqual(
+            response.json(),
+            json.loads(json.dumps(expected, default=str)),
+        )
+
+    def test_money_returned_graph(self):
+        now = timezone.make_aware(datetime.datetime(2021, 12, 10))
+        response = self.get_graph("lending:money-returned-graph", now)
+
+        self.assertEqual(response.status_code, 200)
+        expected = legacy_monthly_series("paid_date", datetime.date(2021, 1, 10))
+        self.assertEqual(
+            response.json(),
+            json.loads(json.dumps(expected, default=str)),
+        )
+
+
+@thread_sensitive_graphs
+class GraphCachingTests(LendingMixin, TestCase):
+    """
+    Tests for the HTTP caching of the graph views.
+    """
+
+    URL_NAMES = (
+        "lending:earnings-graph",
+        "lending:money-returned-graph",
+        "lending:loan-sources-graph",
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=2, loans_per_borrower=2)
+
+    def get_graph(self, url_name, **headers):
+        return self.client.get(
+            reverse(url_name), HTTP_X_REQUESTED_WITH="XMLHttpRequest", **headers
+        )
+
+    def test_not_modified(self):
+        for url_name in self.URL_NAMES:
+            with self.subTest(url_name=url_name):
+                response = self.get_graph(url_name)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("no-cache", response["Cache-Control"])
+
+                revalidated = self.get_graph(
+                    url_name, HTTP_IF_NONE_MATCH=response["ETag"]
+                )
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated["ETag"], response["ETag"])
+
+                revalidated = self.get_graph(
+                    url_name, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+                self.assertEqual(revalidated.status_code, 304)
+
+    def test_modified(self):
+        etags = {name: self.get_graph(name)["ETag"] for name in self.URL_NAMES}
+
+        loan = Loan.objects.first()
+        loan.sources.first().save()
+        for url_name, etag in etags.items():
+            with self.subTest(url_name=url_name):
+                response = self.get_graph(url_name, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+
+    def test_capital_source_changes_etag(self):
+        etags = {name: self.get_graph(name)["ETag"] for name in self.URL_NAMES}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            capital_source = LoanSource.objects.first().capital_source
+            capital_source.provider = self.create_user(is_capital_source_provider=True)
+            capital_source.save()
+
+        for url_name, etag in etags.items():
+            with self.subTest(url_name=url_name):
+                response = self.get_graph(url_name, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_deletion_changes_etag(self):
+        response = self.get_graph("lending:money-returned-graph")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Amortization.objects.filter(paid_date__isnull=False).first().delete()
+
+        revalidated = self.get_graph(
+            "lending:money-returned-graph", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(revalidated.status_code, 200)
+
+    def test_requires_ajax(self):
+        for url_name in self.URL_NAMES:
+            with self.subTest(url_name=url_name):
+                self.assertEqual(self.client.get(reverse(url_name)).status_code, 404)
+
+
+class ConcurrentGraphTests(LendingMixin, TransactionTestCase):
+    """
+    Tests the graph views running their queries concurrently on their own
+    connections, which only see committed data.
+    """
+
+    def test_earnings_graph(self):
+        self.create_portfolio(borrowers=2, loans_per_borrower=2)
+        now = timezone.make_aware(datetime.datetime(2021, 6, 10))
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            response = self.client.get(
+                reverse("lending:earnings-graph"),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        expected = legacy_monthly_series(
+            "due_date", datetime.date(2021, 1, 10), active_only=True
+        )
+        self.assertEqual(response.json(), json.loads(json.dumps(expected, default=str)))
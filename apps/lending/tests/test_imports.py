@@ -0,0 +1,222 @@
+import csv
+import io
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.models import EmailUser
+from apps.lending.imports import import_loans
+from apps.lending.models import Amortization, CapitalSource, Loan, LoanSource
+
+from .mixins import LendingMixin
+
+COLUMNS = (
+    "loan",
+    "borrower",
+    "loan_date",
+    "first_payment_date",
+    "amount",
+    "interest_rate",
+    "term",
+    "payment_schedule",
+    "bank",
+    "capital_source",
+    "source_amount",
+    "source_interest_rate",
+    "monthly_amortization",
+)
+
+
+class ImportLoansTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.imports.import_loans`.
+    """
+
+    def setUp(self):
+        self.savings = self.create_capital_source(
+            source=CapitalSource.SOURCES.savings, name="Savings"
+        )
+        self.credit_card = self.create_capital_source(
+            source=CapitalSource.SOURCES.credit_card,
+            name="Credit Card",
+            bank=self.savings.bank,
+        )
+        self.borrowers = [
+            self.create_user(email=f"import{index}@example.com", is_borrower=True)
+            for index in range(3)
+        ]
+
+    def row(self, reference, user, **kwargs):
+        row = {
+            "loan": reference,
+            "borrower": user.email,
+            "loan_date": "2021-01-01",
+            "first_payment_date": "2021-02-01",
+            "amount": "10000",
+            "interest_rate": "5",
+            "term": "6",
+            "payment_schedule": "monthly",
+            "bank": self.savings.bank.name,
+            "capital_source": "Savings",
+            "source_amount": "10000",
+            "source_interest_rate": "",
+            "monthly_amortization": "",
+        }
+        row.update(kwargs)
+        return row
+
+    def loan_rows(self, count):
+        """
+        Returns the rows of `count` loans, each funded by the savings account and a
+        credit card.
+        """
+        rows = []
+        for index in range(count):
+            borrower = self.borrowers[index % len(self.borrowers)]
+            rows += [
+                self.row(f"L{index}", borrower, source_amount="6000"),
+                self.row(
+                    f"L{index}",
+                    borrower,
+                    capital_source="credit card",
+                    source_amount="4000",
+                    source_interest_rate="3",
+                    monthly_amortization="700",
+                ),
+            ]
+        return rows
+
+    def to_csv(self, rows):
+        file = io.StringIO()
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+        file.seek(0)
+        return file
+
+    def test_import(self):
+        report = import_loans(self.to_csv(self.loan_rows(4)), batch_size=3)
+        self.assertEqual(report.errors, [])
+        self.assertEqual(report.rows, 8)
+        self.assertEqual(
+            (report.loans, report.sources, report.amortizations), (4, 8, 24)
+        )
+        self.assertEqual(Loan.objects.count(), 4)
+        self.assertEqual(LoanSource.objects.count(), 8)
+        self.assertEqual(Amortization.objects.count(), 24)
+
+        loan = Loan.objects.with_financials().get(borrower=self.borrowers[1])
+        amortization = loan.amortizations.first()
+        self.assertEqual(amortization.amount_due, loan.amortization_amount_due)
+        self.assertEqual(loan.unpaid_amortizations, 6)
+        self.assertEqual(
+            loan.sources.get(capital_source=self.credit_card).monthly_amortization,
+            700,
+        )
+
+    def test_errors(self):
+        rows = self.loan_rows(3)
+        rows[0]["term"] = "0"
+        rows[3]["capital_source"] = "Unknown"
+        rows[5]["amount"] = "12000"
+        rows.append(self.row("L9", self.borrowers[0], borrower="nobody@example.com"))
+        rows.append(self.row("L0", self.borrowers[0]))
+
+        report = import_loans(self.to_csv(rows))
+        bank = self.savings.bank
+        self.assertEqual(
+            report.errors,
+            [
+                (2, "L0", "term: Ensure this value is greater than or equal to 1."),
+                (3, "L0", "loan: The details differ from line 2."),
+                (5, "L1", f"capital_source: No capital source Unknown in {bank}."),
+                (7, "L2", "loan: The details differ from line 6."),
+                (8, "L9", "borrower: No borrower with the email nobody@example.com."),
+                (9, "L0", "loan: The rows of a loan must be consecutive."),
+            ],
+        )
+        self.assertEqual((report.rows, report.loans), (8, 0))
+        self.assertFalse(Loan.objects.exists())
+
+    def test_skips_invalid_loans(self):
+        rows = self.loan_rows(3)
+        rows[2]["amount"] = "abc"
+        rows[3]["amount"] = "abc"
+
+        report = import_loans(self.to_csv(rows))
+        self.assertEqual([error[:2] for error in report.errors], [(4, "L1")])
+        self.assertTrue(report.errors[0][2].startswith("amount: "))
+        self.assertEqual(report.loans, 2)
+        self.assertEqual(
+            set(Loan.objects.values_list("borrower", flat=True)),
+            {self.borrowers[0].pk, self.borrowers[2].pk},
+        )
+
+    def test_missing_columns(self):
+        with self.assertRaisesMessage(ValueError, "Missing column(s): term."):
+            import_loans(io.StringIO(",".join(set(COLUMNS) - {"term"})))
+
+    def test_dry_run(self):
+        report = import_loans(self.to_csv(self.loan_rows(2)), dry_run=True)
+        self.assertEqual((report.loans, report.amortizations), (2, 12))
+        self.assertFalse(Loan.objects.exists())
+        self.assertFalse(Amortization.objects.exists())
+
+    def test_queries_per_batch(self):
+        """
+        The number of queries depends on the number of batches, not on the number of
+        rows.
+        """
+
+        def count_queries(loans):
+            with CaptureQueriesContext(connection) as queries:
+                report = import_loans(self.to_csv(self.loan_rows(loans)))
+            self.assertEqual(report.loans, loans)
+            return len(queries)
+
+        self.assertEqual(count_queries(5), count_queries(50))
+
+    def test_command(self):
+        rows = self.loan_rows(2)
+        rows[0]["loan_date"] = "01/01/2021"
+        rows[1]["loan_date"] = "01/01/2021"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "loans.csv")
+            errors = os.path.join(directory, "errors.csv")
+            with open(path, "w", newline="") as file:
+                file.write(self.to_csv(rows).getvalue())
+
+            out = io.StringIO()
+            call_command("import_loans", path, "--errors", errors, stdout=out)
+            with open(errors, newline="") as file:
+                error_rows = list(csv.reader(file))
+
+        self.assertIn("Imported 1 loan(s), 2 loan source(s)", out.getvalue())
+        self.assertEqual(error_rows[0], ["line", "loan", "error"])
+        self.assertEqual([row[:2] for row in error_rows[1:]], [["2", "L0"]])
+        self.assertEqual(Loan.objects.get().borrower, self.borrowers[1])
+
+    def test_admin_upload(self):
+        admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+        self.client.force_login(admin)
+        url = reverse("admin:lending_loan_import")
+        content = self.to_csv(self.loan_rows(2)).getvalue().encode()
+
+        response = self.client.post(
+            url, {"file": SimpleUploadedFile("loans.csv", content), "dry_run": "on"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"].loans, 2)
+        self.assertFalse(Loan.objects.exists())
+
+        response = self.client.post(
+            url, {"file": SimpleUploadedFile("loans.csv", content)}
+        )
+        self.assertRedirects(response, reverse("admin:lending_loan_changelist"))
+        self.assertEqual(Loan.objects.count(), 2)
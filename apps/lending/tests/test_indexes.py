@@ -0,0 +1,144 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+
+from .mixins import LendingMixin, thread_sensitive_graphs
+
+ANALYZED_TABLES = (
+    "accounts_emailuser",
+    "lending_amortization",
+    "lending_capitalsource",
+    "lending_loan",
+    "lending_loansource",
+)
+
+
+@thread_sensitive_graphs
+class AmortizationIndexTests(LendingMixin, TestCase):
+    """
+    Tests that the hot queries on amortizations can be answered from an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=8, loans_per_borrower=3)
+        cls.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+        # Plans depend on the statistics of the tables, which would otherwise be
+        # whatever autovacuum last gathered while other tests ran. The indexes are
+        # rebuilt too, as the rows other tests rolled back still take up their pages
+        # until they are vacuumed, which makes the partial index look as costly as
+        # the full ones.
+        with connection.cursor() as cursor:
+            cursor.execute("REINDEX TABLE lending_amortization")
+        cls.analyze()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        # Statistics are not rolled back with the seeded data, and the other tests
+        # would otherwise be planned as if the tables still held it.
+        cls.analyze()
+
+    @classmethod
+    def analyze(cls):
+        with connection.cursor() as cursor:
+            for table in ANALYZED_TABLES:
+                cursor.execute(f"ANALYZE {table}")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def get_plans(self, url):
+        """
+        Returns the queries on amortizations made by the page, with their plans.
+
+        Sequential scans are disabled so the planner picks an index whenever the
+        filters allow one, regardless of the size of the seeded tables. Nested loops
+        are disabled too, otherwise the planner may just look up the amortizations
+        of each of the few seeded loans. Both are only disabled within a savepoint
+        which is rolled back, so the next pages are planned as usual.
+        """
+        now = timezone.make_aware(datetime.datetime(2021, 6, 10))
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_nestloop = off")
+            for query in queries:
+                if '"lending_amortization"' in query["sql"]:
+                    cursor.execute(f"EXPLAIN {query['sql']}")
+                    plan = "\n".join(row[0] for row in cursor.fetchall())
+                    plans.append((query["sql"], plan))
+            transaction.set_rollback(True)
+
+        return plans
+
+    def test_hot_queries_use_indexes(self):
+        """
+        Each hot query on amortizations finds them from the index meant for it.
+        """
+        borrower = EmailUser.objects.filter(is_borrower=True).first()
+        for url, query, index in (
+            (
+                reverse("dashboard"),
+                'SELECT COUNT(*) AS "__count" FROM "lending_amortization"',
+                "amortization_unpaid_due_idx",
+            ),
+            (
+                reverse("dashboard"),
+                'SELECT SUM("lending_amortization"."amount_gained")',
+                "amortization_due_type_idx",
+            ),
+            (
+                reverse("lending:past-due-list"),
+                'SELECT "lending_amortization"."id"',
+                "amortization_unpaid_due_idx",
+            ),
+            (
+                reverse("lending:upcoming-due-list"),
+                'SELECT "lending_amortization"."id"',
+                "amortization_unpaid_due_idx",
+            ),
+            (
+                reverse("lending:borrowers-detail", args=(borrower.pk,)),
+                'SELECT SUM("payable")',
+                "amortization_loan_due_idx",
+            ),
+            (
+                reverse("lending:borrowers-detail", args=(borrower.pk,)),
+                'SELECT "lending_amortization"."id"',
+                "amortization_unpaid_due_idx",
+            ),
+            (
+                reverse("lending:earnings-graph"),
+                'SELECT DATE_TRUNC(\'month\', "lending_amortization"."due_date")',
+                "amortization_due_type_idx",
+            ),
+            (
+                reverse("lending:money-returned-graph"),
+                'SELECT DATE_TRUNC(\'month\', "lending_amortization"."paid_date")',
+                "amortization_paid_type_idx",
+            ),
+        ):
+            with self.subTest(url=url, query=query):
+                cache.clear()
+                plans = self.get_plans(url)
+
+                matching = [plan for sql, plan in plans if sql.startswith(query)]
+                self.assertEqual(len(matching), 1, [sql for sql, plan in plans])
+                self.assertRegex(matching[0], rf"(using|on) {index}\b")
+                for sql, plan in plans:
+                    self.assertNotIn("Seq Scan on lending_amortization", plan)
@@ -0,0 +1,241 @@
+import datetime
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.admin import site
+from django.contrib.auth.models import Permission
+from django.contrib.messages import get_messages
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+from apps.lending.jobs import STALE_AFTER, TASKS, Task, claim_job, enqueue, run_job
+from apps.lending.models import Amortization, Job, Loan
+
+from .mixins import LendingMixin
+
+
+class JobTests(LendingMixin, TestCase):
+    """
+    Tests for the queue of `apps.lending.jobs`.
+    """
+
+    def setUp(self):
+        self.loans = [self.create_loan(term=3) for _ in range(5)]
+
+    def failing(self, failures):
+        """
+        Returns the amortization task patched to fail on its calls at the given
+        positions, and the list of the loans of each call.
+        """
+        calls = []
+        task = TASKS["generate_amortizations"]
+
+        def func(queryset):
+            calls.append(set(queryset.values_list("pk", flat=True)))
+            if len(calls) in failures:
+                raise RuntimeError("Lost connection")
+            return task.func(queryset)
+
+        patched = mock.patch.dict(
+            TASKS, {"generate_amortizations": Task(task.model, func, task.description)}
+        )
+        return patched, calls
+
+    def test_run(self):
+        job = enqueue("generate_amortizations", Loan.objects.all())
+        self.assertEqual((job.status, job.total, job.progress), ("queued", 5, 0))
+
+        job = run_job(claim_job(), chunk_size=2)
+        self.assertEqual(job.status, Job.STATUSES.succeeded)
+        self.assertEqual((job.processed, job.progress, job.attempts), (5, 100, 1))
+        self.assertEqual(job.result, {"count": 15})
+        self.assertEqual(Amortization.objects.count(), 15)
+        self.assertIsNone(claim_job())
+
+    def test_retry_resumes(self):
+        job = enqueue("generate_amortizations", Loan.objects.all())
+        patched, calls = self.failing({2})
+        with patched:
+            job = run_job(claim_job(), chunk_size=2)
+
+        self.assertEqual((job.status, job.processed, job.attempts), ("queued", 2, 1))
+        self.assertIn("RuntimeError: Lost connection", job.error)
+        # Only the chunk which was processed is kept.
+        self.assertEqual(Amortization.objects.count(), 6)
+
+        # The job is retried after a delay, from the chunk which failed.
+        self.assertIsNone(claim_job())
+        later = timezone.now() + datetime.timedelta(hours=1)
+        with patched:
+            job = run_job(claim_job(now=later), chunk_size=2)
+
+        self.assertEqual((job.status, job.processed, job.attempts), ("succeeded", 5, 2))
+        self.assertEqual(calls[2], calls[1])
+        self.assertEqual(set.union(*calls), {loan.pk for loan in self.loans})
+        self.assertEqual(Amortization.objects.count(), 15)
+
+    def test_fails_after_max_attempts(self):
+        enqueue("generate_amortizations", Loan.objects.all(), max_attempts=2)
+        patched, calls = self.failing({1, 2})
+        later = timezone.now() + datetime.timedelta(hours=1)
+        with patched:
+            run_job(claim_job())
+            job = run_job(claim_job(now=later))
+
+        self.assertEqual((job.status, job.attempts), ("failed", 2))
+        self.assertIsNotNone(job.finished)
+        self.assertIsNone(claim_job(now=later + datetime.timedelta(hours=1)))
+
+    def test_abandoned_job_reclaimed(self):
+        enqueue("generate_amortizations", Loan.objects.all())
+        job = claim_job()
+        self.assertIsNone(claim_job())
+
+        later = timezone.now() + datetime.timedelta(hours=1)
+        self.assertEqual(claim_job(now=later), job)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+
+    def test_reclaimed_job_left_to_new_worker(self):
+        enqueue("generate_amortizations", Loan.objects.all())
+        job = claim_job()
+        later = timezone.now() + datetime.timedelta(hours=1)
+        self.assertEqual(claim_job(now=later), job)
+
+        job = run_job(job, chunk_size=2)
+        self.assertEqual((job.status, job.processed, job.attempts), ("running", 0, 2))
+        self.assertFalse(Amortization.objects.exists())
+
+    def test_command(self):
+        enqueue("generate_amortizations", Loan.objects.all())
+        enqueue("pre_terminate", Loan.objects.filter(pk=self.loans[0].pk))
+        out = StringIO()
+        # Like the test client, keep the connection of the test's transaction open.
+        with mock.patch(
+            "apps.lending.management.commands.run_lending_worker.close_old_connections"
+        ):
+            call_command("run_lending_worker", "--once", stdout=out)
+
+        self.assertEqual(out.getvalue().count("Succeeded"), 2)
+        self.assertTrue(Loan.objects.get(pk=self.loans[0].pk).is_completed)
+        self.assertEqual(Amortization.objects.filter(is_preterminated=True).count(), 3)
+
+
+class JobAdminTests(LendingMixin, TestCase):
+    """
+    Tests that the bulk actions of the admin queue jobs.
+    """
+
+    def setUp(self):
+        self.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+        self.client.force_login(self.admin)
+        self.loans = [self.create_loan(term=3) for _ in range(2)]
+
+    def test_actions_queue_jobs(self):
+        source = self.create_loan_source(loan=self.loans[0])
+        for url, action, pks in (
+            (
+                "admin:lending_loan_changelist",
+                "generate_amortization",
+                [loan.pk for loan in self.loans],
+            ),
+            ("admin:lending_loan_changelist", "pre_terminate", [self.loans[0].pk]),
+            (
+                "admin:lending_loansource_changelist",
+                "generate_capital_source_payments",
+                [source.pk],
+            ),
+        ):
+            response = self.client.post(
+                reverse(url), {"action": action, "_selected_action": pks}
+            )
+            self.assertEqual(response.status_code, 302)
+            job = Job.objects.order_by("created").last()
+            self.assertEqual(job.object_ids, sorted(str(pk) for pk in pks))
+            self.assertEqual((job.status, job.created_by), ("queued", self.admin))
+            self.assertIn(
+                reverse("admin:lending_job_change", args=(job.pk,)),
+                str(list(get_messages(response.wsgi_request))[-1]),
+            )
+
+        # Nothing is done until a worker runs the jobs.
+        self.assertFalse(Amortization.objects.exists())
+        self.assertFalse(Loan.objects.filter(is_completed=True).exists())
+
+    def test_status_page(self):
+        job = enqueue("generate_amortizations", Loan.objects.all())
+        url = reverse("admin:lending_job_change", args=(job.pk,))
+        response = self.client.get(url)
+        self.assertContains(response, "0 of 2 (0%)")
+        self.assertContains(response, 'http-equiv="refresh"')
+
+        run_job(claim_job())
+        response = self.client.get(url)
+        self.assertContains(response, "2 of 2 (100%)")
+        self.assertNotContains(response, 'http-equiv="refresh"')
+
+    def test_retry_needs_change_permission(self):
+        job_admin = site._registry[Job]
+        user = self.create_user()
+        for codename, allowed in (("view_job", False), ("change_job", True)):
+            user.user_permissions.add(Permission.objects.get(codename=codename))
+            request = RequestFactory().get(reverse("admin:lending_job_changelist"))
+            # Reloaded as the permissions of a user are cached.
+            request.user = EmailUser.objects.get(pk=user.pk)
+            with self.subTest(codename=codename):
+                self.assertIs("retry" in job_admin.get_actions(request), allowed)
+
+    def test_retry(self):
+        job = enqueue("generate_amortizations", Loan.objects.all())
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUSES.failed)
+        self.client.post(
+            reverse("admin:lending_job_changelist"),
+            {"action": "retry", "_selected_action": [job.pk]},
+        )
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("queued", 0))
+
+        # The page of the job stays read-only.
+        response = self.client.get(reverse("admin:lending_job_change", args=(job.pk,)))
+        self.assertNotContains(response, 'name="_save"')
+
+
+class ConcurrentJobTests(LendingMixin, TransactionTestCase):
+    """
+    Tests the jobs claimed by workers on their own connections.
+    """
+
+    def test_running_chunk_not_reclaimed(self):
+        self.create_loan(term=3)
+        enqueue("generate_amortizations", Loan.objects.all())
+        task = TASKS["generate_amortizations"]
+        later = timezone.now() + STALE_AFTER * 2
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.append(claim_job(now=later))
+            finally:
+                connection.close()
+
+        def func(queryset):
+            # Another worker looks for a job while the chunk runs past the time
+            # after which the job is assumed to be abandoned.
+            thread = threading.Thread(target=other_worker)
+            thread.start()
+            thread.join()
+            return task.func(queryset)
+
+        with mock.patch.dict(
+            TASKS, {"generate_amortizations": Task(task.model, func, task.description)}
+        ):
+            job = run_job(claim_job())
+
+        self.assertEqual(claimed, [None])
+        self.assertEqual((job.status, job.attempts), ("succeeded", 1))
+        self.assertEqual(Amortization.objects.count(), 3)
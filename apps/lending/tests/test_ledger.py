@@ -0,0 +1,113 @@
+import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.lending.analytics import ledger_series, monthly_series
+from apps.lending.ledger import rebuild_ledger
+from apps.lending.models import Amortization, CapitalSource, Loan, MonthlyLedger
+
+from .mixins import LendingMixin, thread_sensitive_graphs
+
+
+def ledger_rows():
+    return list(
+        MonthlyLedger.objects.order_by("month", "borrower").values_list(
+            "month",
+            "borrower",
+            "amount_due",
+            "amount_gained",
+            "interest_gained",
+            "principal_receivable",
+            "amount_paid",
+            "interest_returned",
+            "principal_returned",
+        )
+    )
+
+
+@thread_sensitive_graphs
+class MonthlyLedgerTests(LendingMixin, TestCase):
+    """
+    Tests for the maintenance of :model:`lending.MonthlyLedger`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=6, loans_per_borrower=3)
+
+    def assertSeriesEqual(self, ledger, amortizations):
+        self.assertEqual(ledger["labels"], amortizations["labels"])
+        for key in ("interest_data", "principal_data"):
+            for from_ledger, expected in zip(ledger[key], amortizations[key]):
+                if expected is None:
+                    self.assertIsNone(from_ledger)
+                else:
+                    # The ledger stores each borrower's principal rounded to cents.
+                    self.assertAlmostEqual(from_ledger, expected, delta=Decimal("0.1"))
+
+    def test_incremental_updates_match_rebuild(self):
+        amortization = Amortization.objects.filter(paid_date=None).first()
+        amortization.paid_date = amortization.due_date + datetime.timedelta(days=40)
+        amortization.save()
+        amortization.loan.sources.first().delete()
+        Amortization.objects.filter(paid_date__isnull=False).first().delete()
+        loan = self.create_loan(borrower=amortization.loan.borrower)
+        loan.borrower = self.create_user(is_borrower=True)
+        loan.save()
+        Loan.objects.filter(pk=amortization.loan_id).pre_terminate()
+        capital_source = CapitalSource.objects.filter(provider__isnull=True).first()
+        capital_source.provider = self.create_user(is_capital_source_provider=True)
+        capital_source.save()
+
+        incremental = ledger_rows()
+        self.assertTrue(incremental)
+        rebuild_ledger()
+        self.assertEqual(incremental, ledger_rows())
+
+    def test_loan_save_rebuilds_on_term_change(self):
+        loan = Amortization.objects.first().loan
+
+        def rebuilds():
+            with CaptureQueriesContext(connection) as queries:
+                loan.save()
+            return any("lending_monthlyledger" in query["sql"] for query in queries)
+
+        loan.is_completed = True
+        self.assertFalse(rebuilds())
+        loan.term += 1
+        self.assertTrue(rebuilds())
+
+    def test_matches_amortizations(self):
+        for date_field, active in (("due_date", True), ("paid_date", False)):
+            with self.subTest(date_field=date_field):
+                self.assertSeriesEqual(
+                    ledger_series(
+                        date_field,
+                        datetime.date(2021, 1, 1),
+                        24,
+                        Q(borrower__is_borrower_active=True) if active else None,
+                    ),
+                    monthly_series(
+                        date_field,
+                        datetime.date(2021, 1, 1),
+                        24,
+                        Q(loan__borrower__is_borrower_active=True) if active else None,
+                    ),
+                )
+
+    @override_settings(LENDING_USE_LEDGER=True)
+    def test_graph_reads_ledger(self):
+        # The latest modifications of amortizations, capital sources, loans and loan
+        # sources, then the ledger.
+        with self.assertNumQueries(5):
+            response = self.client.get(
+                reverse("lending:earnings-graph"),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            )
+
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,248 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from apps.lending.models import Amortization, Loan, LoanQuerySet
+
+from .mixins import LendingMixin
+
+
+class LoanRollupTests(LendingMixin, TestCase):
+    """
+    Tests for the amortization rollup fields of :model:`lending.Loan`
+    """
+
+    def setUp(self):
+        self.loan = self.create_loan(term=3)
+        self.amortizations = [
+            self.create_amortization(
+                loan=self.loan,
+                amount_due=Decimal("1000"),
+                due_date=datetime.date(2021, month, 1),
+            )
+            for month in (2, 3, 4)
+        ]
+
+    def test_rollups_follow_amortizations(self):
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.payments_made, "0 out of 3")
+        self.assertEqual(self.loan.remaining_payment_terms, 3)
+        self.assertEqual(self.loan.next_payment_due_date, datetime.date(2021, 2, 1))
+        self.assertEqual(self.loan.outstanding_amount_due, 3000)
+
+        first = self.amortizations[0]
+        first.paid_date = datetime.date(2021, 2, 1)
+        first.save()
+        self.amortizations[2].delete()
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.payments_made, "1 out of 3")
+        self.assertEqual(self.loan.remaining_payment_terms, 1)
+        self.assertEqual(self.loan.next_payment_due_date, datetime.date(2021, 3, 1))
+        self.assertEqual(self.loan.outstanding_amount_due, 1000)
+
+    def test_save_keeps_rollups(self):
+        # Loaded before its amortizations were created.
+        self.loan.amount = Decimal("12000")
+        self.loan.save()
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.amount, Decimal("12000"))
+        self.assertEqual(self.loan.payments_made, "0 out of 3")
+        self.assertEqual(self.loan.remaining_payment_terms, 3)
+        self.assertEqual(self.loan.next_payment_due_date, datetime.date(2021, 2, 1))
+
+    def test_refresh_in_amortization_transaction(self):
+        first = self.amortizations[0]
+        first.paid_date = datetime.date(2021, 2, 1)
+        with mock.patch.object(
+            LoanQuerySet, "refresh_rollups", side_effect=RuntimeError("Lost connection")
+        ):
+            with self.assertRaises(RuntimeError):
+                first.save()
+
+        self.assertIsNone(Amortization.objects.get(pk=first.pk).paid_date)
+
+    def test_pre_terminate(self):
+        self.loan.pre_terminate()
+
+        self.assertEqual(self.loan.remaining_payment_terms, 0)
+        self.assertIsNone(self.loan.next_payment_due_date)
+        self.assertEqual(self.loan.outstanding_amount_due, 0)
+
+    def test_rebuild_command(self):
+        Loan.objects.update(paid_amortizations=5, next_unpaid_due_date=None)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_loan_rollups", check=True, stdout=StringIO())
+
+        call_command("rebuild_loan_rollups", stdout=StringIO())
+        call_command("rebuild_loan_rollups", check=True, stdout=StringIO())
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.paid_amortizations, 0)
+        self.assertEqual(self.loan.next_unpaid_due_date, datetime.date(2021, 2, 1))
+
+
+class LoanFinancialsTests(LendingMixin, TestCase):
+    """
+    Tests for `LoanQuerySet.with_financials`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=8, loans_per_borrower=4)
+        # Amounts whose interest and amortization land exactly on a half cent.
+        loan = cls().create_loan(
+            amount=Decimal("10.50"),
+            interest_rate=Decimal("5"),
+            term=2,
+            payment_schedule=Loan.PAYMENT_SCHEDULES.bi_monthly,
+        )
+        cls().create_loan_source(loan=loan, amount=Decimal("10.50"))
+
+    def test_matches_properties(self):
+        fields = (
+            "amortization_amount_due",
+            "interest_amount",
+            "total_deductibles",
+            "interest_gained",
+            "total_interest_gained",
+            "remaining_payment_terms",
+            "total_principal_receivables",
+        )
+        for annotated in Loan.objects.with_financials():
+            loan = Loan.objects.get(pk=annotated.pk)
+            for field in fields:
+                with self.subTest(loan=loan, field=field):
+                    self.assertEqual(getattr(annotated, field), getattr(loan, field))
+
+    def test_no_query_per_loan(self):
+        loans = list(Loan.objects.with_financials())
+        with self.assertNumQueries(0):
+            for loan in loans:
+                loan.interest_gained
+                loan.total_principal_receivables
+
+
+class AmortizationPaymentStageTests(LendingMixin, TestCase):
+    """
+    Tests for `AmortizationQuerySet.with_payment_stage`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=4, loans_per_borrower=2)
+
+    def test_matches_property(self):
+        unpaid = Amortization.objects.filter(paid_date__isnull=True)
+        for annotated in unpaid.with_payment_stage():
+            amortization = Amortization.objects.get(pk=annotated.pk)
+            with self.subTest(amortization=amortization):
+                self.assertEqual(annotated.payment_stage, amortization.payment_stage)
+
+    def test_no_query_per_amortization(self):
+        amortizations = list(Amortization.objects.with_payment_stage())
+        with self.assertNumQueries(0):
+            for amortization in amortizations:
+                amortization.payment_stage
+
+
+class AmortizationDueTests(LendingMixin, TestCase):
+    """
+    Tests for `DueQuerySet.past_due` and `DueQuerySet.upcoming`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.as_of = datetime.date(2021, 3, 10)
+        cls.loan = cls().create_loan()
+        cls.amortizations = {
+            days: cls().create_amortization(
+                loan=cls.loan, due_date=cls.as_of + datetime.timedelta(days=days)
+            )
+            for days in (-30, 0, 1, 7, 8, 14)
+        }
+        # Neither paid amortizations nor those of inactive borrowers are due.
+        cls().create_amortization(
+            loan=cls.loan, due_date=cls.as_of, paid_date=cls.as_of
+        )
+        inactive = cls().create_user(is_borrower=True, is_borrower_active=False)
+        cls().create_amortization(
+            loan=cls().create_loan(borrower=inactive), due_date=cls.as_of
+        )
+
+    def due(self, queryset):
+        return {
+            days
+            for days, amortization in self.amortizations.items()
+            if amortization in queryset
+        }
+
+    def test_past_due(self):
+        self.assertEqual(self.due(Amortization.objects.past_due(self.as_of)), {-30, 0})
+        self.assertEqual(Amortization.objects.past_due(self.as_of).count(), 2)
+
+    def test_upcoming(self):
+        self.assertEqual(self.due(Amortization.objects.upcoming(self.as_of)), {1, 7})
+        self.assertEqual(
+            self.due(Amortization.objects.upcoming(self.as_of, days=14)), {1, 7, 8, 14}
+        )
+        self.assertEqual(Amortization.objects.upcoming(self.as_of).count(), 2)
+
+    def test_current_date(self):
+        """
+        Without a date, the rows are filtered as of the date of the query rather
+        than a date fixed once.
+        """
+        queryset = Amortization.objects.all()
+        with mock.patch("django.utils.timezone.localdate", return_value=self.as_of):
+            self.assertEqual(self.due(queryset.past_due()), {-30, 0})
+            self.assertEqual(self.due(queryset.upcoming()), {1, 7})
+
+        as_of = self.as_of + datetime.timedelta(days=7)
+        with mock.patch("django.utils.timezone.localdate", return_value=as_of):
+            self.assertEqual(self.due(queryset.past_due()), {-30, 0, 1, 7})
+            self.assertEqual(self.due(queryset.upcoming()), {8, 14})
+
+
+class LoanPreTerminateTests(LendingMixin, TestCase):
+    """
+    Tests for `LoanQuerySet.pre_terminate`.
+    """
+
+    def setUp(self):
+        self.loans = [
+            self.create_loan(amount=Decimal("10000.50"), term=3),
+            self.create_loan(amount=Decimal("25000"), term=6),
+        ]
+        for loan in self.loans:
+            for month, paid in ((2, True), (3, False), (4, False)):
+                self.create_amortization(
+                    loan=loan,
+                    due_date=datetime.date(2021, month, 1),
+                    paid_date=datetime.date(2021, month, 1) if paid else None,
+                )
+
+    def test_pre_terminate(self):
+        # The summary and the two updates, then the ledger rebuild of the borrowers,
+        # each wrapped in a savepoint.
+        with self.assertNumQueries(11):
+            summary = Loan.objects.all().pre_terminate()
+
+        for loan in self.loans:
+            expected = round(loan.amount * Decimal("0.01") + loan.principal_amount, 2)
+            self.assertEqual(
+                summary[loan.pk], {"amortizations": 2, "amount_due": expected}
+            )
+            loan.refresh_from_db()
+            self.assertTrue(loan.is_completed)
+            self.assertEqual(loan.remaining_payment_terms, 0)
+            preterminated = loan.amortizations.filter(is_preterminated=True)
+            self.assertEqual(
+                list(preterminated.values_list("amount_due", flat=True)),
+                [expected, expected],
+            )
+            self.assertEqual(loan.amortizations.filter(paid_date=None).count(), 0)
@@ -0,0 +1,248 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+from apps.lending.models import Amortization, Loan
+from apps.lending.pagination import decode_cursor, encode_cursor, paginate
+
+from .mixins import LendingMixin
+
+
+class PaginateTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.pagination.paginate`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Loans sharing loan dates, so the primary key breaks the ties.
+        for index in range(11):
+            cls().create_loan(loan_date=datetime.date(2021, 1, 1 + index % 4))
+
+    def walk(self, ordering, per_page):
+        """
+        Returns the pages followed forward from the first page, then backward from
+        the last one.
+        """
+        queryset = Loan.objects.all()
+        pages = [paginate(queryset, ordering, per_page)]
+        while pages[-1].has_next():
+            pages.append(paginate(queryset, ordering, per_page, pages[-1].next_cursor))
+
+        backward = [pages[-1]]
+        while backward[0].has_previous():
+            backward.insert(
+                0,
+                paginate(
+                    queryset, ordering, per_page, before=backward[0].previous_cursor
+                ),
+            )
+
+        return pages, backward
+
+    def test_walk(self):
+        for ordering in (("loan_date", "pk"), ("-loan_date", "-pk")):
+            expected = list(
+                Loan.objects.order_by(*ordering).values_list("pk", flat=True)
+            )
+            with self.subTest(ordering=ordering):
+                pages, backward = self.walk(ordering, 3)
+                self.assertEqual(len(pages), 4)
+                self.assertEqual([obj.pk for page in pages for obj in page], expected)
+                self.assertEqual(
+                    [[obj.pk for obj in page] for page in backward],
+                    [[obj.pk for obj in page] for page in pages],
+                )
+                self.assertFalse(pages[0].has_previous())
+                self.assertFalse(pages[-1].has_next())
+
+    def test_single_page(self):
+        page = paginate(Loan.objects.all(), ("loan_date", "pk"), 20)
+        self.assertEqual(len(page), 11)
+        self.assertFalse(page.has_other_pages())
+
+    def test_cursor(self):
+        cursor = (datetime.date(2021, 1, 2), uuid.uuid4())
+        self.assertEqual(
+            decode_cursor(Loan, "loan_date", encode_cursor(cursor)), cursor
+        )
+        self.assertEqual(
+            decode_cursor(
+                Amortization, "loan__amount", encode_cursor(("10.5", cursor[1]))
+            ),
+            (Decimal("10.5"), cursor[1]),
+        )
+        for token in (
+            "invalid",
+            encode_cursor(("2021-13-01", cursor[1])),
+            encode_cursor(("2021-01-01", 1)),
+            encode_cursor(("",)),
+        ):
+            with self.subTest(token=token):
+                with self.assertRaises(ValueError):
+                    decode_cursor(Loan, "loan_date", token)
+
+
+class KeysetListTests(LendingMixin, TestCase):
+    """
+    Tests that the lists of loans and amortizations are paged by keyset, searched
+    and sorted on the server.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+        today = timezone.now().date()
+        cls.borrowers = [
+            cls().create_user(
+                email=f"keyset{index}@example.com",
+                first_name=name,
+                is_borrower=True,
+            )
+            for index, name in enumerate(("Alice", "Bob"))
+        ]
+        for index in range(10):
+            loan = cls().create_loan(
+                borrower=cls.borrowers[index % 2],
+                amount=Decimal(1000 * (index + 1)),
+                loan_date=today - datetime.timedelta(days=index % 3),
+            )
+            cls().create_amortization(
+                loan=loan, due_date=today - datetime.timedelta(days=index % 4)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def get(self, name, **params):
+        return self.client.get(reverse(name), params)
+
+    def walk(self, name, **params):
+        """
+        Returns the primary keys listed on every page followed from the first one.
+        """
+        response = self.get(name, **params)
+        pages = [[obj.pk for obj in response.context["page_obj"]]]
+        while response.context["page_obj"].has_next():
+            cursor = response.context["page_obj"].next_cursor
+            response = self.get(name, after=cursor, **params)
+            pages.append([obj.pk for obj in response.context["page_obj"]])
+
+        return pages
+
+    def test_pages(self):
+        pages = self.walk("lending:past-due-list", length=4)
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertEqual(
+            [pk for page in pages for pk in page],
+            list(
+                Amortization.objects.order_by("due_date", "pk").values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+        pages = self.walk("lending:loans-active", length=3, sort="-amount")
+        self.assertEqual(
+            [pk for page in pages for pk in page],
+            list(Loan.objects.order_by("-amount").values_list("pk", flat=True)),
+        )
+
+    def test_pager_links(self):
+        response = self.get("lending:loans-active", length=4, q="alice")
+        page = response.context["page_obj"]
+        self.assertEqual(response.context["query_string"], "length=4&q=alice")
+        self.assertContains(
+            response, f'href="?length=4&amp;q=alice&amp;after={page.next_cursor}"'
+        )
+
+        response = self.get(
+            "lending:loans-active", length=4, q="alice", after=page.next_cursor
+        )
+        self.assertTrue(response.context["page_obj"].has_previous())
+        response = self.get(
+            "lending:loans-active",
+            length=4,
+            q="alice",
+            before=response.context["page_obj"].previous_cursor,
+        )
+        self.assertEqual(
+            [obj.pk for obj in response.context["page_obj"]],
+            [obj.pk for obj in page],
+        )
+
+    def test_search(self):
+        response = self.get("lending:past-due-list", q="alice")
+        self.assertEqual(
+            {obj.loan.borrower for obj in response.context["amortizations"]},
+            {self.borrowers[0]},
+        )
+        self.assertEqual(len(response.context["amortizations"]), 5)
+
+    def test_json(self):
+        response = self.get(
+            "lending:upcoming-due-list", format="json", draw=3, length=2
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"draw": 3, "data": [], "previous": None, "next": None}
+        )
+
+        response = self.get("lending:loans-active", format="json", length=4, q="bob")
+        data = response.json()
+        self.assertEqual(len(data["data"]), 4)
+        self.assertIsNone(data["previous"])
+        self.assertIsNotNone(data["next"])
+        loan = Loan.objects.filter(borrower=self.borrowers[1]).latest("loan_date", "pk")
+        self.assertEqual(
+            data["data"][0][:3],
+            [
+                self.borrowers[1].get_full_name(),
+                loan.loan_date.strftime("%b %d, %Y"),
+                f"{int(loan.amount):,}",
+            ],
+        )
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"sort": "borrower"},
+            {"after": "invalid"},
+            {"before": "invalid"},
+            {"length": "all"},
+        ):
+            with self.subTest(params=params):
+                response = self.get("lending:past-due-list", **params)
+                self.assertEqual(response.status_code, 404)
+
+    def test_queries_per_page(self):
+        """
+        Every page costs the same number of queries, however deep it is.
+        """
+
+        def count_queries(**params):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get("lending:loans-active", length=2, **params)
+            self.assertEqual(len(response.context["loans"]), 2)
+            return len(queries)
+
+        response = self.get("lending:loans-active", length=2)
+        first = count_queries()
+        for _ in range(3):
+            page = response.context["page_obj"]
+            response = self.get(
+                "lending:loans-active", length=2, after=page.next_cursor
+            )
+
+        self.assertEqual(
+            count_queries(after=response.context["page_obj"].next_cursor), first
+        )
@@ -0,0 +1,133 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.lending.models import CapitalSource, Loan
+from apps.lending.projection import Portfolio
+
+from .mixins import LendingMixin
+
+
+class PortfolioTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.projection.Portfolio`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=8, loans_per_borrower=4)
+        # Amounts whose interest and installments land exactly on a half cent.
+        loan = cls().create_loan(
+            amount=Decimal("10.50"),
+            interest_rate=Decimal("5"),
+            term=2,
+            payment_schedule=Loan.PAYMENT_SCHEDULES.bi_monthly,
+        )
+        cls().create_loan_source(loan=loan, amount=Decimal("10.50"))
+        Loan.objects.filter(pk__in=Loan.objects.all()[:3]).update(is_completed=True)
+
+    def test_totals_match_properties(self):
+        with self.assertNumQueries(2):
+            portfolio = Portfolio.load()
+
+        loans = Loan.objects.filter(is_completed=False)
+        self.assertEqual(len(portfolio), loans.count())
+        self.assertEqual(
+            portfolio.total_interest_gained(),
+            sum(loan.total_interest_gained for loan in loans),
+        )
+        self.assertEqual(
+            portfolio.total_principal_receivables(),
+            sum(loan.total_principal_receivables for loan in loans),
+        )
+
+    def test_capital_source_payments_match_properties(self):
+        portfolio = Portfolio.load()
+        for index, pk in enumerate(portfolio.loans):
+            sources = Loan.objects.get(pk=pk).sources.select_related("loan")
+            with self.subTest(loan=pk):
+                self.assertEqual(
+                    Decimal(portfolio.payments[index]).scaleb(-2),
+                    sum(source.capital_source_payment_amount for source in sources),
+                )
+
+    def test_projection_covers_unpaid_installments(self):
+        portfolio = Portfolio.load()
+        with self.assertNumQueries(0):
+            projection = portfolio.project(months=60, start=datetime.date(2021, 1, 1))
+
+        self.assertEqual(len(projection["months"]), 60)
+        loans = Loan.objects.filter(is_completed=False).with_financials()
+        self.assertEqual(
+            sum(projection["interest_gained"]),
+            sum(loan.interest_gained * loan.unpaid_amortizations for loan in loans),
+        )
+        self.assertEqual(
+            sum(projection["principal_receivable"]),
+            portfolio.total_principal_receivables(),
+        )
+
+    def test_projection_by_month(self):
+        capital_source = self.create_capital_source(
+            source=CapitalSource.SOURCES.savings
+        )
+        monthly = self.create_loan(
+            amount=Decimal("12000"),
+            interest_rate=Decimal("5"),
+            term=3,
+            first_payment_date=datetime.date(2021, 1, 20),
+        )
+        bi_monthly = self.create_loan(
+            amount=Decimal("6000"),
+            interest_rate=Decimal("5"),
+            term=2,
+            payment_schedule=Loan.PAYMENT_SCHEDULES.bi_monthly,
+            first_payment_date=datetime.date(2021, 2, 10),
+        )
+        for loan in (monthly, bi_monthly):
+            self.create_loan_source(
+                loan=loan, capital_source=capital_source, amount=loan.amount
+            )
+            due_date = loan.first_payment_date
+            for _ in range(loan.term * (1 if loan.is_payment_schedule_monthly else 2)):
+                self.create_amortization(
+                    loan=loan, due_date=due_date, amount_due=Decimal("1")
+                )
+                if loan.is_payment_schedule_monthly:
+                    due_date = due_date.replace(month=due_date.month + 1)
+                else:
+                    due_date += datetime.timedelta(days=15)
+
+        portfolio = Portfolio.load(
+            Loan.objects.filter(pk__in=[monthly.pk, bi_monthly.pk])
+        )
+        # The first monthly installment is past due and expected in the first month.
+        projection = portfolio.project(months=3, start=datetime.date(2021, 2, 5))
+        self.assertEqual(
+            projection["months"],
+            [
+                datetime.date(2021, 2, 1),
+                datetime.date(2021, 3, 1),
+                datetime.date(2021, 4, 1),
+            ],
+        )
+        # Monthly: 2 installments in February and 1 in March, each with 4,000 of
+        # principal and 600 of interest. Bi-monthly: installments on Feb 10, Feb 25,
+        # Mar 12 and Mar 27, each with 1,500 of principal and 150 of interest.
+        self.assertEqual(
+            projection["principal_receivable"],
+            [Decimal("11000.00"), Decimal("7000.00"), Decimal("0.00")],
+        )
+        self.assertEqual(
+            projection["interest_gained"],
+            [Decimal("1500.00"), Decimal("900.00"), Decimal("0.00")],
+        )
+        self.assertEqual(
+            portfolio.totals(months=2, start=datetime.date(2021, 2, 5)),
+            {
+                "interest_gained": Decimal("2400.00"),
+                "principal_receivable": Decimal("18000.00"),
+                "capital_source_payments": Decimal("0.00"),
+            },
+        )
@@ -0,0 +1,119 @@
+import os
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+from apps.lending.synthetic import generate_loan_book
+
+from .mixins import LendingMixin, thread_sensitive_graphs
+
+# Multiplies the seeded volume. A scale of 20 seeds 1k borrowers, 5k loans and about
+# 100k amortizations.
+SCALE = int(os.environ.get("LENDING_TEST_SCALE", 1))
+
+
+@thread_sensitive_graphs
+class QueryBudgetTests(LendingMixin, TestCase):
+    """
+    Tests that the number of queries made by each page stays within a fixed budget
+    regardless of the volume of lending data.
+    """
+
+    BUDGETS = {
+        "dashboard": 7,
+        "lending:loans-active": 6,
+        "lending:past-due-list": 6,
+        "lending:upcoming-due-list": 6,
+        "lending:borrowers-detail": 12,
+        "lending:earnings-graph": 5,
+        "lending:money-returned-graph": 5,
+        "lending:loan-sources-graph": 4,
+        "admin:lending_loan_changelist": 6,
+        "admin:lending_loansource_changelist": 6,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.borrower = generate_loan_book(borrowers=50 * SCALE, term=14)[0]
+        cls.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def count_queries(self):
+        counts = {}
+        for name in self.BUDGETS:
+            args = (self.borrower.pk,) if name == "lending:borrowers-detail" else ()
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    reverse(name, args=args), HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+                )
+
+            self.assertEqual(response.status_code, 200, name)
+            counts[name] = len(queries)
+
+        return counts
+
+    def grow(self):
+        """
+        Adds more of everything, including loans and past due amortizations of the
+        borrower whose page is checked.
+        """
+        generate_loan_book(borrowers=10 * SCALE, term=14, seed=1)
+        today = timezone.now().date()
+        capital_source = self.create_capital_source()
+        for index in range(3):
+            loan = self.create_loan(borrower=self.borrower)
+            self.create_loan_source(loan=loan, capital_source=capital_source)
+            for months in (1, 2):
+                self.create_amortization(
+                    loan=loan, due_date=today - relativedelta(months=months)
+                )
+
+    def test_budgets(self):
+        counts = self.count_queries()
+        for name, budget in self.BUDGETS.items():
+            with self.subTest(name=name):
+                self.assertLessEqual(counts[name], budget)
+
+        self.grow()
+        self.assertEqual(self.count_queries(), counts)
+
+    def test_sorted_loan_changelist(self):
+        """
+        Every computed column of the loan changelist can be sorted by without
+        querying per row.
+        """
+        url = reverse("admin:lending_loan_changelist")
+        budget = self.BUDGETS["admin:lending_loan_changelist"]
+        for column, field in (
+            ("interest_amount", "interest_amount"),
+            ("interest_gained", "interest_gained"),
+            ("next_payment_due_date", "next_unpaid_due_date"),
+            ("remaining_payment_terms", "unpaid_amortizations"),
+            ("total_principal_receivables", "total_principal_receivables"),
+        ):
+            with self.subTest(column=column):
+                index = self.client.get(url).context["cl"].list_display.index(column)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, {"o": f"-{index}"})
+
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(queries), budget)
+                values = [
+                    getattr(loan, field) for loan in response.context["cl"].result_list
+                ]
+                self.assertEqual(len(values), 100)
+                self.assertEqual(
+                    values,
+                    sorted(
+                        values, key=lambda value: (value is None, value), reverse=True
+                    ),
+                )
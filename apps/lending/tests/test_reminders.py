@@ -0,0 +1,127 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.lending.models import DueReminder
+from apps.lending.reminders import send_due_reminders
+
+from .mixins import LendingMixin
+
+
+class SendDueRemindersTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.reminders.send_due_reminders`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.as_of = datetime.date(2021, 3, 10)
+        cls.borrowers = [
+            cls().create_user(
+                email=f"reminder{index}@example.com",
+                first_name=f"Borrower {index}",
+                is_borrower=True,
+            )
+            for index in range(3)
+        ]
+        for index, borrower in enumerate(cls.borrowers):
+            loan = cls().create_loan(borrower=borrower)
+            for days in (-3, 0, 5, 30):
+                cls().create_amortization(
+                    loan=loan, due_date=cls.as_of + datetime.timedelta(days=days)
+                )
+            cls().create_amortization(
+                loan=loan,
+                due_date=cls.as_of - datetime.timedelta(days=10),
+                paid_date=cls.as_of,
+            )
+
+        inactive = cls().create_user(is_borrower=True, is_borrower_active=False)
+        cls().create_amortization(
+            loan=cls().create_loan(borrower=inactive), due_date=cls.as_of
+        )
+        # Imported loans may have no borrower.
+        cls().create_amortization(
+            loan=cls().create_loan(borrower=None), due_date=cls.as_of
+        )
+
+    def test_send(self):
+        # The amortizations, then the log of the only batch.
+        with self.assertNumQueries(2):
+            report = send_due_reminders(as_of=self.as_of)
+
+        self.assertEqual((report.messages, report.past_due, report.upcoming), (3, 6, 3))
+        self.assertEqual(
+            sorted(message.to for message in mail.outbox),
+            [[borrower.email] for borrower in self.borrowers],
+        )
+        message = mail.outbox[0]
+        self.assertIn("past due as of Mar 10, 2021", message.body)
+        self.assertIn("due on Mar 15, 2021", message.body)
+        self.assertNotIn("Apr 09, 2021", message.body)
+        self.assertEqual(message.alternatives[0][1], "text/html")
+        self.assertEqual(DueReminder.objects.count(), 9)
+
+    def test_idempotent(self):
+        send_due_reminders(as_of=self.as_of)
+        mail.outbox = []
+
+        report = send_due_reminders(as_of=self.as_of)
+        self.assertEqual(report.messages, 0)
+        self.assertEqual(mail.outbox, [])
+
+        # The upcoming amortizations are reminded of again once past due, and the
+        # past due ones are not.
+        report = send_due_reminders(as_of=self.as_of + datetime.timedelta(days=5))
+        self.assertEqual((report.messages, report.past_due, report.upcoming), (3, 3, 0))
+        self.assertEqual(DueReminder.objects.count(), 12)
+
+    def test_batches(self):
+        connections = []
+
+        def send_messages(backend, messages):
+            connections.append(backend)
+            return len(messages)
+
+        with mock.patch.object(
+            EmailBackend, "send_messages", autospec=True, side_effect=send_messages
+        ):
+            send_due_reminders(as_of=self.as_of, batch_size=2)
+
+        self.assertEqual(len(connections), 2)
+        self.assertIs(connections[0], connections[1])
+        self.assertEqual(DueReminder.objects.count(), 9)
+
+    def test_failed_batch_not_logged(self):
+        with mock.patch.object(
+            EmailBackend, "send_messages", side_effect=[1, OSError("Disconnected")]
+        ):
+            with self.assertRaises(OSError):
+                send_due_reminders(as_of=self.as_of, batch_size=1)
+
+        # Only the amortizations of the borrower reminded before the failure.
+        self.assertEqual(DueReminder.objects.count(), 3)
+        report = send_due_reminders(as_of=self.as_of)
+        self.assertEqual(report.messages, 2)
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            "send_due_reminders", "--date", "2021-03-10", "--dry-run", stdout=out
+        )
+        self.assertIn(
+            "Would send 3 reminder(s) of 6 past due and 3 upcoming", out.getvalue()
+        )
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(DueReminder.objects.exists())
+
+        call_command(
+            "send_due_reminders", "--date", "2021-03-10", "--days", "30", stdout=out
+        )
+        self.assertIn("Sent 3 reminder(s) of 6 past due and 6 upcoming", out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
@@ -0,0 +1,123 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.lending.models import (
+    Amortization,
+    CapitalSource,
+    CapitalSourcePayment,
+    Loan,
+    LoanSource,
+)
+from apps.lending.schedules import (
+    generate_amortizations,
+    generate_capital_source_payments,
+)
+
+from .mixins import LendingMixin
+
+
+class GenerateAmortizationsTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.schedules.generate_amortizations`.
+    """
+
+    def setUp(self):
+        self.monthly = self.create_loan(
+            term=3, first_payment_date=datetime.date(2021, 1, 31)
+        )
+        self.bi_monthly = self.create_loan(
+            term=2, payment_schedule=Loan.PAYMENT_SCHEDULES.bi_monthly
+        )
+        for loan in (self.monthly, self.bi_monthly):
+            self.create_loan_source(loan=loan, amount=loan.amount / 2)
+            self.create_loan_source(
+                loan=loan,
+                amount=loan.amount / 2,
+                capital_source=self.create_capital_source(
+                    source=CapitalSource.SOURCES.credit_card
+                ),
+                monthly_amortization=Decimal("900"),
+            )
+
+    def test_generates_schedule(self):
+        created = generate_amortizations(Loan.objects.all())
+
+        self.assertEqual(created, 7)
+        self.assertEqual(
+            list(self.monthly.amortizations.values_list("due_date", flat=True)),
+            [
+                datetime.date(2021, 1, 31),
+                datetime.date(2021, 2, 28),
+                datetime.date(2021, 3, 28),
+            ],
+        )
+        for loan in (self.monthly, self.bi_monthly):
+            expected_gained = (
+                loan.amortization_amount_due - loan.sources.all().total_deductibles()
+            )
+            for amortization in loan.amortizations.all():
+                self.assertEqual(amortization.amount_due, loan.amortization_amount_due)
+                self.assertEqual(amortization.amount_gained, expected_gained)
+
+        self.monthly.refresh_from_db()
+        self.assertEqual(self.monthly.remaining_payment_terms, 3)
+
+    def test_idempotent(self):
+        Amortization.objects.create(
+            loan=self.monthly,
+            amount_due=Decimal("1"),
+            amount_gained=Decimal("1"),
+            due_date=datetime.date(2021, 1, 31),
+        )
+        self.assertEqual(generate_amortizations(Loan.objects.all()), 6)
+        self.assertEqual(generate_amortizations(Loan.objects.all()), 0)
+        self.assertEqual(Amortization.objects.count(), 7)
+
+    def test_query_count(self):
+        for index in range(10):
+            self.create_loan(term=12)
+
+        # Loans, existing schedules, one insert, rollups and the ledger rebuild of the
+        # borrowers, each wrapped in a savepoint.
+        with self.assertNumQueries(12):
+            generate_amortizations(Loan.objects.all())
+
+
+class GenerateCapitalSourcePaymentsTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.schedules.generate_capital_source_payments`.
+    """
+
+    def setUp(self):
+        provider = self.create_user(is_capital_source_provider=True)
+        capital_source = self.create_capital_source(provider=provider)
+        self.sources = [
+            self.create_loan_source(
+                loan=self.create_loan(term=term, payment_schedule=schedule),
+                capital_source=capital_source,
+            )
+            for term, schedule in ((3, "monthly"), (2, "bi_monthly"))
+        ]
+
+    def test_generates_payments(self):
+        created = generate_capital_source_payments(LoanSource.objects.all())
+
+        self.assertEqual(created, 7)
+        for source in self.sources:
+            amounts = source.capital_source_payments.values_list("amount", flat=True)
+            self.assertEqual(
+                set(amounts), {round(source.capital_source_payment_amount, 2)}
+            )
+
+    def test_idempotent(self):
+        generate_capital_source_payments(LoanSource.objects.all())
+        self.assertEqual(generate_capital_source_payments(LoanSource.objects.all()), 0)
+        self.assertEqual(CapitalSourcePayment.objects.count(), 7)
+
+    def test_command(self):
+        call_command("generate_capital_source_payments", stdout=StringIO())
+        self.assertEqual(CapitalSourcePayment.objects.count(), 7)
@@ -0,0 +1,119 @@
+import datetime
+import math
+from unittest import mock
+
+from django.db.models import F, Sum
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import EmailUser
+from apps.lending.models import Amortization, CapitalSource, LoanSource
+from apps.lending.summaries import borrower_summary, past_due_totals
+
+from .mixins import LendingMixin
+
+
+def legacy_past_due_totals(borrower, today):
+    """
+    The totals previously computed by the borrower page, one query each. Kept as the
+    reference for `past_due_totals`.
+    """
+    amortizations = Amortization.objects.filter(
+        loan__borrower=borrower, due_date__lte=today, paid_date__isnull=True
+    )
+    receivable = (
+        LoanSource.objects.filter(
+            loan__amortizations__in=amortizations,
+            capital_source__source=CapitalSource.SOURCES.savings,
+            capital_source__provider__isnull=True,
+        )
+        .distinct()
+        .annotate(receivables=F("amount") / F("loan__term"))
+        .aggregate(total=Sum("receivables"))
+    )
+    return {
+        "total_payable": math.ceil(
+            amortizations.aggregate(total=Sum("amount_due"))["total"] or 0
+        ),
+        "total_amount_earned": math.ceil(
+            amortizations.aggregate(total=Sum("amount_gained"))["total"] or 0
+        ),
+        "total_principal": math.ceil(receivable["total"] or 0),
+    }
+
+
+class BorrowerSummaryTests(LendingMixin, TestCase):
+    """
+    Tests for `apps.lending.summaries`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=6, loans_per_borrower=3)
+        cls.borrowers = list(EmailUser.objects.filter(is_borrower=True))
+
+    def test_matches_legacy_totals(self):
+        for today in (
+            datetime.date(2021, 1, 1),
+            datetime.date(2021, 6, 10),
+            datetime.date(2022, 12, 31),
+        ):
+            for borrower in self.borrowers:
+                with self.subTest(today=today, borrower=borrower):
+                    self.assertEqual(
+                        past_due_totals(borrower, today),
+                        legacy_past_due_totals(borrower, today),
+                    )
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            past_due_totals(self.borrowers[0], datetime.date(2021, 6, 10))
+
+    def test_borrower_without_loans(self):
+        borrower = self.create_user(is_borrower=True)
+        summary = borrower_summary(borrower)
+
+        self.assertEqual(summary["total_payable"], 0)
+        self.assertEqual(summary["total_amount_earned"], 0)
+        self.assertEqual(summary["total_principal"], 0)
+        self.assertEqual(summary["active_loans"], [])
+        self.assertFalse(summary["amortizations"])
+
+    def test_borrower_page(self):
+        borrower = self.borrowers[0]
+        self.client.force_login(borrower)
+        response = self.client.get(
+            reverse("lending:borrowers-detail", args=(borrower.pk,))
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["borrower"], borrower)
+        self.assertEqual(
+            len(response.context["active_loans"]),
+            borrower.loans.filter(is_completed=False).count(),
+        )
+        self.assertEqual(
+            response.context["total_payable"],
+            legacy_past_due_totals(borrower, timezone.localdate())["total_payable"],
+        )
+
+    def test_local_date(self):
+        """
+        The borrower page and the list of past due amortizations agree on what is
+        past due early in the morning, when the date in UTC is still the day before.
+        """
+        borrower = self.create_user(is_borrower=True)
+        amortization = self.create_amortization(
+            loan=self.create_loan(borrower=borrower),
+            due_date=datetime.date(2021, 3, 10),
+        )
+        # 01:00 on Mar 10 in Asia/Manila.
+        now = datetime.datetime(2021, 3, 9, 17, tzinfo=datetime.timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            summary = borrower_summary(borrower)
+            past_due = list(Amortization.objects.past_due())
+
+        self.assertEqual(list(summary["amortizations"]), [amortization])
+        self.assertIn(amortization, past_due)
+        self.assertEqual(summary["total_payable"], math.ceil(amortization.amount_due))
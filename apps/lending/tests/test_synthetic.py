@@ -0,0 +1,95 @@
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase
+
+from apps.accounts.models import EmailUser
+from apps.lending.models import Amortization, Bank, CapitalSource, Loan, LoanSource
+from apps.lending.synthetic import generate_loan_book
+
+
+def loan_book():
+    loans = (
+        "borrower__email",
+        "amount",
+        "interest_rate",
+        "payment_schedule",
+        "first_payment_date",
+        "paid_amortizations",
+    )
+    amortizations = (
+        "loan__borrower__email",
+        "due_date",
+        "paid_date",
+        "amort_type",
+        "amount_due",
+        "amount_gained",
+    )
+    return (
+        list(Loan.objects.order_by(*loans).values_list(*loans)),
+        list(Amortization.objects.order_by(*amortizations).values_list(*amortizations)),
+    )
+
+
+class GenerateLoanBookTests(TestCase):
+    """
+    Tests for `apps.lending.synthetic.generate_loan_book`.
+    """
+
+    def test_generates_loan_book(self):
+        borrowers = generate_loan_book(borrowers=10, loans_per_borrower=3, term=6)
+
+        self.assertEqual(len(borrowers), 10)
+        self.assertEqual(Loan.objects.count(), 30)
+        self.assertEqual(LoanSource.objects.count(), 60)
+        self.assertEqual(
+            set(Loan.objects.values_list("payment_schedule", flat=True)),
+            {choice[0] for choice in Loan.PAYMENT_SCHEDULES},
+        )
+        self.assertEqual(
+            set(LoanSource.objects.values_list("capital_source__source", flat=True)),
+            {choice[0] for choice in CapitalSource.SOURCES},
+        )
+        for loan in Loan.objects.all():
+            self.assertEqual(
+                loan.amortizations.count(),
+                6 if loan.is_payment_schedule_monthly else 12,
+            )
+        self.assertTrue(Amortization.objects.filter(paid_date__isnull=True).exists())
+        self.assertTrue(Amortization.objects.filter(paid_date__isnull=False).exists())
+
+    def test_is_deterministic(self):
+        generate_loan_book(borrowers=5, seed=3)
+        generated = loan_book()
+
+        EmailUser.objects.all().delete()
+        Bank.objects.all().delete()
+        generate_loan_book(borrowers=5, seed=3)
+        self.assertEqual(loan_book(), generated)
+
+        generate_loan_book(borrowers=5, seed=4)
+        self.assertNotEqual(loan_book(), generated)
+
+    def test_as_of(self):
+        as_of = datetime.date(2021, 6, 30)
+        generate_loan_book(borrowers=5, seed=3, as_of=as_of)
+
+        first_payment_dates = Loan.objects.values_list("first_payment_date", flat=True)
+        self.assertTrue(
+            all(
+                as_of - relativedelta(months=6)
+                <= date
+                <= as_of - relativedelta(months=6, days=-30)
+                for date in first_payment_dates
+            )
+        )
+        self.assertFalse(
+            Amortization.objects.filter(
+                due_date__gt=as_of, paid_date__isnull=False
+            ).exists()
+        )
+        self.assertTrue(
+            Amortization.objects.filter(
+                due_date__lte=as_of, paid_date__isnull=True
+            ).exists()
+        )
@@ -5,8 +5,11 @@ from django.urls import path
 
 from .views import (
     ActiveLoans,
+    AmortizationExport,
     BorrowerDetail,
+    CapitalSourcePaymentExport,
     EarningsGraph,
+    LoanSourceAmortizationExport,
     LoanSourcesGraph,
     MoneyReturnedGraph,
     PastDueList,
@@ -28,6 +31,19 @@ urlpatterns = [
         UpcomingDueList.as_view(),
         name="upcoming-due-list",
     ),
+    path(
+        "amortization/export/", AmortizationExport.as_view(), name="amortization-export"
+    ),
+    path(
+        "loan-sources/amortizations/export/",
+        LoanSourceAmortizationExport.as_view(),
+        name="loan-source-amortization-export",
+    ),
+    path(
+        "capital-source-payments/export/",
+        CapitalSourcePaymentExport.as_view(),
+        name="capital-source-payment-export",
+    ),
     path("loans/active/", ActiveLoans.as_view(), name="loans-active"),
     path("borrowers/<uuid:pk>/", BorrowerDetail.as_view(), name="borrowers-detail"),
 ]
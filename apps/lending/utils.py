@@ -1,5 +1,53 @@
+from django.db.models import DecimalField, Func
+
+
 def month_difference(date1, date2):
     """
     Returns the month difference between two dates.
     """
     return ((date1.year - date2.year) * 12) + (date1.month - date2.month)
+
+
+class annotated_property:
+    """
+    Works like a read-only `property`, except that a value annotated under the same
+    name by a queryset takes precedence over the computed one. This lets querysets
+    provide in SQL what the property would otherwise compute one object at a time.
+    """
+
+    def __init__(self, fget):
+        self.fget = fget
+        self.__doc__ = fget.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        return self.fget(instance)
+
+
+class RoundHalfEven(Func):
+    """
+    Rounds a decimal expression to the given number of decimal places using the same
+    half-even rounding Python applies with `round()` on a `Decimal`. PostgreSQL's
+    `ROUND` rounds halves away from zero instead.
+    """
+
+    output_field = DecimalField()
+
+    def __init__(self, expression, places=2, **extra):
+        super().__init__(expression, **extra)
+        self.places = places
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        scale = 10 ** self.places
+        scaled = f"({sql}) * {scale}"
+        template = (
+            f"(CASE WHEN MOD({scaled}, 2) = 0.5 "
+            f"THEN ROUND(FLOOR({scaled}) / {scale}, {self.places}) "
+            f"WHEN MOD({scaled}, 2) = -0.5 "
+            f"THEN ROUND(CEIL({scaled}) / {scale}, {self.places}) "
+            f"ELSE ROUND({sql}, {self.places}) END)"
+        )
+        return template, tuple(params) * 5
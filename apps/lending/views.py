@@ -1,26 +1,135 @@
-import math
-from decimal import Decimal
-from typing import Any, Dict, List, Union
+import asyncio
+import datetime
+import hashlib
+from functools import partial, update_wrapper
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
 
+from asgiref.sync import sync_to_async
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.humanize.templatetags.humanize import intcomma
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count, F, Q, QuerySet, Sum
+from django.db import connection, models
+from django.db.models import Count, Max, Q
 from django.http import Http404
-from django.http.response import JsonResponse
+from django.http.response import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.defaultfilters import date as date_filter
+from django.template.defaultfilters import floatformat, pluralize
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.html import escape, format_html, format_html_join
+from django.utils.http import http_date
 from django.views.generic import DetailView, ListView, View
 
 from apps.accounts.models import EmailUser
-from apps.lending.models import Amortization, CapitalSource, Loan, LoanSource
+from apps.lending.analytics import ledger_series, monthly_series
+from apps.lending.cache import get_data_version, get_user_snapshot
+from apps.lending.exports import DUE_FILTERS, csv_response, export_queryset
+from apps.lending.models import (
+    Amortization,
+    CapitalSource,
+    CapitalSourcePayment,
+    Loan,
+    LoanSource,
+    LoanSourceAmortization,
+)
+from apps.lending.pagination import paginate
+from apps.lending.summaries import borrower_summary
+
+T = TypeVar("T")
+
+
+def run_query(func: Callable[[], T]) -> T:
+    """
+    Runs the queries of `func` on the connection of the current thread and closes it
+    afterwards, since the worker threads of `sync_to_async` are not tied to a request
+    which would otherwise close it.
+    """
+    try:
+        return func()
+    finally:
+        connection.close()
 
 
-class EarningsGraph(View):
+def latest_modification(model: Type[models.Model]) -> Optional[datetime.datetime]:
     """
-    Returns data for plotting the earnings graph in dashboard page.
+    Returns when an object of the model was last created or modified.
+    """
+    return model.objects.aggregate(latest=Max("modified"))["latest"]
+
+
+class GraphView(View):
     """
+    Base async view returning the data for plotting a graph in dashboard page as
+    JSON. Only accepts aJax requests.
+
+    Responses carry an ETag and a Last-Modified header derived from the most recent
+    modification of the lending data, so browsers revalidate them and get a 304 when
+    nothing has changed. The data version(see `apps.lending.cache`) is part of the
+    ETag as well since deletions and borrower status changes leave no modification
+    date behind.
+
+    Unless `thread_sensitive` is set, the queries run in a worker thread with its own
+    connection rather than the thread shared by every sync view, so the graphs
+    requested together by the dashboard are computed concurrently.
+    """
+
+    tracked_models = (Amortization, CapitalSource, Loan, LoanSource)
+    # Whether the queries run in the thread shared by every sync view, whose
+    # connection is the only one seeing the data of an uncommitted transaction.
+    thread_sensitive = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        Returns a coroutine function so Django awaits the view, class-based views
+        can't be async on their own in this version of Django.
+        """
+        view = super().as_view(**initkwargs)
 
-    def get(self, request, *args, **kwargs):
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+            return response
+
+        return update_wrapper(async_view, view)
+
+    def get_data(self) -> Dict[str, Any]:
+        """
+        Returns the data of the graph.
+        """
+        raise NotImplementedError
+
+    def get_validators(self) -> Tuple[str, Optional[datetime.datetime]]:
+        """
+        Returns the ETag and the last modification date of the graph data.
+        """
+        modifications = [latest_modification(model) for model in self.tracked_models]
+        state = [get_data_version(), timezone.localdate(), settings.LENDING_USE_LEDGER]
+        etag = hashlib.sha256(repr(state + modifications).encode()).hexdigest()[:32]
+        last_modified = max(filter(None, modifications), default=None)
+        return quote_etag(etag), last_modified
+
+    def get_response(self, request) -> HttpResponse:
+        """
+        Returns the data of the graph, or a 304 if the client has it already.
+        """
+        etag, last_modified = self.get_validators()
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = JsonResponse(self.get_data())
+
+        response["ETag"] = etag
+        if timestamp:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    async def get(self, request, *args, **kwargs):
         """
         Handles the GET request to this view. Only accepts aJax requests.
         """
@@ -28,131 +137,83 @@ class EarningsGraph(View):
         if not is_ajax:
             raise Http404()
 
-        now = timezone.now()
-        loan_date = now - relativedelta(months=5)
-        labels = []
-        interest_data = []
-        principal_data = []
-        for i in range(12):
-            labels.append(loan_date.strftime("%b %Y"))
-
-            amortizations = Amortization.objects.filter(
-                ~Q(amort_type=Amortization.AMORTIZATION_TYPES.principal_only),
-                due_date__month=loan_date.month,
-                due_date__year=loan_date.year,
-                is_preterminated=False,
-                loan__borrower__is_borrower_active=True,
-            ).aggregate(total_gained=Sum("amount_gained"))
-
-            interest_data.append(amortizations["total_gained"])
-
-            principal_amortization = Amortization.objects.filter(
-                ~Q(amort_type=Amortization.AMORTIZATION_TYPES.interest_only),
-                due_date__month=loan_date.month,
-                due_date__year=loan_date.year,
-                loan__borrower__is_borrower_active=True,
-            ).distinct()
-
-            receivable = (
-                LoanSource.objects.filter(
-                    loan__amortizations__in=principal_amortization,
-                    capital_source__source=CapitalSource.SOURCES.savings,
-                    capital_source__provider__isnull=True,
-                    loan__borrower__is_borrower_active=True,
-                )
-                .distinct()
-                .annotate(receivables=F("amount") / F("loan__term"))
-                .aggregate(total=Sum("receivables"))
-            )
+        get_response = partial(self.get_response, request)
+        if self.thread_sensitive:
+            return await sync_to_async(get_response)()
 
-            principal_data.append(receivable["total"])
+        return await sync_to_async(
+            partial(run_query, get_response), thread_sensitive=False
+        )()
 
-            loan_date += relativedelta(months=1)
 
-        return JsonResponse(
-            {
-                "labels": labels,
-                "interest_data": interest_data,
-                "principal_data": principal_data,
-            }
-        )
-
-
-class MoneyReturnedGraph(View):
+class MonthlySeriesGraph(GraphView):
     """
-    Returns data for plotting the money returned graph in dashboard page. This graph
-    displays the amount returned(interest and principal) based on the date paid on the
-    amortization.
+    Base view returning the monthly interest and principal series of amortizations
+    for plotting a graph in dashboard page. Subclasses only need to define which date
+    field to bucket on and which amortizations to consider.
+
+    The series are read from :model:`lending.MonthlyLedger` instead of the
+    amortizations when the `LENDING_USE_LEDGER` setting is enabled.
     """
 
-    def get(self, request, *args, **kwargs):
+    date_field = "due_date"
+    months = 12
+    months_before = 0
+    active_borrowers_only = False
+
+    def get_series(self, start: datetime.date) -> Dict[str, List[Any]]:
         """
-        Handles the GET request to this view. Only accepts aJax requests.
+        Returns the series of the graph starting from the month of `start`.
         """
-        is_ajax = request.META.get("HTTP_X_REQUESTED_WITH") == "XMLHttpRequest"
-        if not is_ajax:
-            raise Http404()
+        if settings.LENDING_USE_LEDGER:
+            filters = (
+                Q(borrower__is_borrower_active=True)
+                if self.active_borrowers_only
+                else None
+            )
+            return ledger_series(self.date_field, start, self.months, filters)
+
+        filters = (
+            Q(loan__borrower__is_borrower_active=True)
+            if self.active_borrowers_only
+            else None
+        )
+        return monthly_series(self.date_field, start, self.months, filters)
 
+    def get_data(self) -> Dict[str, Any]:
         now = timezone.now()
-        paid_date = now - relativedelta(months=11)
-        labels = []
-        interest_data = []
-        principal_data = []
-        for i in range(12):
-            labels.append(paid_date.strftime("%b %Y"))
-
-            amortizations = Amortization.objects.filter(
-                ~Q(amort_type=Amortization.AMORTIZATION_TYPES.principal_only),
-                paid_date__month=paid_date.month,
-                paid_date__year=paid_date.year,
-                is_preterminated=False,
-            ).aggregate(total_gained=Sum("amount_gained"))
-
-            interest_data.append(amortizations["total_gained"])
-
-            principal_amortization = Amortization.objects.filter(
-                ~Q(amort_type=Amortization.AMORTIZATION_TYPES.interest_only),
-                paid_date__month=paid_date.month,
-                paid_date__year=paid_date.year,
-            ).distinct()
-
-            receivable = (
-                LoanSource.objects.filter(
-                    loan__amortizations__in=principal_amortization,
-                    capital_source__source=CapitalSource.SOURCES.savings,
-                    capital_source__provider__isnull=True,
-                )
-                .distinct()
-                .annotate(receivables=F("amount") / F("loan__term"))
-                .aggregate(total=Sum("receivables"))
-            )
+        return self.get_series(now - relativedelta(months=self.months_before))
 
-            principal_data.append(receivable["total"])
 
-            paid_date += relativedelta(months=1)
+class EarningsGraph(MonthlySeriesGraph):
+    """
+    Returns data for plotting the earnings graph in dashboard page.
+    """
 
-        return JsonResponse(
-            {
-                "labels": labels,
-                "interest_data": interest_data,
-                "principal_data": principal_data,
-            }
-        )
+    date_field = "due_date"
+    months_before = 5
+    active_borrowers_only = True
 
 
-class LoanSourcesGraph(View):
+class MoneyReturnedGraph(MonthlySeriesGraph):
+    """
+    Returns data for plotting the money returned graph in dashboard page. This graph
+    displays the amount returned(interest and principal) based on the date paid on the
+    amortization.
+    """
+
+    date_field = "paid_date"
+    months_before = 11
+
+
+class LoanSourcesGraph(GraphView):
     """
     Returns data for plotting the loan sources graph in dashboard page.
     """
 
-    def get(self, request, *args, **kwargs):
-        """
-        Handles the GET request to this view. Only accepts aJax requests.
-        """
-        is_ajax = request.META.get("HTTP_X_REQUESTED_WITH") == "XMLHttpRequest"
-        if not is_ajax:
-            raise Http404()
+    tracked_models = (CapitalSource, Loan, LoanSource)
 
+    def get_data(self) -> Dict[str, Any]:
         labels = [source[1] for source in CapitalSource.SOURCES]
         data = Loan.objects.aggregate(
             savings=Count(
@@ -172,14 +233,195 @@ class LoanSourcesGraph(View):
         )
         graph_data = [value for key, value in data.items()]
 
+        return {
+            "labels": labels,
+            "graph_data": graph_data,
+        }
+
+
+class KeysetListMixin:
+    """
+    Paginates the list by keyset, see `apps.lending.pagination`, and searches and
+    sorts it on the server from the query parameters:
+
+    - `q`: text searched in `search_fields`.
+    - `sort`: a key of `sort_fields`, prefixed with "-" for descending order.
+    - `after` and `before`: the cursors of the next and previous pages.
+    - `length`: the number of rows per page, at most `max_paginate_by`.
+
+    With `format=json` the page is returned as JSON for DataTables in server-side
+    mode: the cells of each row from `get_row`, the cursors of the previous and
+    next pages and the `draw` counter sent by DataTables.
+    """
+
+    paginate_by = 50
+    max_paginate_by = 100
+    search_fields: Sequence[str] = ()
+    # The sort parameters and the non-nullable field each one sorts by.
+    sort_fields: Dict[str, str] = {}
+    default_sort: str
+
+    def get_sort(self) -> str:
+        sort = self.request.GET.get("sort") or self.default_sort
+        if sort.lstrip("-") not in self.sort_fields:
+            raise Http404(f"Unknown sort: {sort}")
+
+        return sort
+
+    def get_paginate_by(self, queryset) -> int:
+        try:
+            length = int(self.request.GET.get("length", self.paginate_by))
+        except ValueError:
+            raise Http404("The length must be a number.")
+
+        return min(max(length, 1), self.max_paginate_by)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        search = self.request.GET.get("q", "").strip()
+        if search:
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f"{field}__icontains": search})
+            queryset = queryset.filter(condition)
+
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        sort = self.get_sort()
+        field = self.sort_fields[sort.lstrip("-")]
+        direction = "-" if sort.startswith("-") else ""
+        try:
+            page = paginate(
+                queryset,
+                (f"{direction}{field}", f"{direction}pk"),
+                page_size,
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+            )
+        except ValueError as error:
+            raise Http404(str(error))
+
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # The parameters kept when following the cursors of the pager.
+        params = self.request.GET.copy()
+        for name in ("after", "before", "format", "draw"):
+            params.pop(name, None)
+        context.update(
+            {
+                "search": self.request.GET.get("q", ""),
+                "sort": self.get_sort(),
+                "query_string": params.urlencode(),
+            }
+        )
+        return context
+
+    def get_row(self, obj) -> List[str]:
+        """
+        Returns the HTML of the cells of an object in the JSON variant of the list,
+        the same columns as the table of the page.
+        """
+        raise NotImplementedError
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get("format") != "json":
+            return super().render_to_response(context, **response_kwargs)
+
+        page = context["page_obj"]
+        try:
+            draw = int(self.request.GET.get("draw", 0))
+        except ValueError:
+            draw = 0
+
         return JsonResponse(
             {
-                "labels": labels,
-                "graph_data": graph_data,
+                "draw": draw,
+                "data": [self.get_row(obj) for obj in page],
+                "previous": page.previous_cursor,
+                "next": page.next_cursor,
             }
         )
 
 
+class CachedListMixin:
+    """
+    Caches the pages listed by the view per user until the lending data visible to
+    the user changes, see `apps.lending.cache.get_user_snapshot`. Changes to the data
+    of a borrower only invalidate the lists of that borrower and of superusers.
+    """
+
+    cache_name: str
+
+    def paginate_queryset(self, queryset, page_size):
+        params = sorted(
+            (name, value)
+            for name, value in self.request.GET.items()
+            if name in ("q", "sort", "after", "before")
+        )
+        key = hashlib.sha256(repr((params, page_size)).encode()).hexdigest()[:32]
+        paginate_queryset = super().paginate_queryset
+        return get_user_snapshot(
+            f"{self.cache_name}:{key}",
+            self.request.user,
+            lambda: paginate_queryset(queryset, page_size),
+        )
+
+
+def date_cell(value) -> str:
+    return date_filter(value, "M d, Y")
+
+
+def amount_cell(value) -> str:
+    return intcomma(floatformat(value, 0))
+
+
+def sources_cell(loan: Loan) -> str:
+    return format_html(
+        "<ul>{}</ul>",
+        format_html_join(
+            "",
+            "<li>{}</li>",
+            ((source.capital_source.name,) for source in loan.sources.all()),
+        ),
+    )
+
+
+class AmortizationListMixin(KeysetListMixin):
+    """
+    Searches and sorts the lists of amortizations.
+    """
+
+    search_fields = (
+        "loan__borrower__first_name",
+        "loan__borrower__last_name",
+        "loan__borrower__email",
+    )
+    sort_fields = {
+        "due_date": "due_date",
+        "loan_date": "loan__loan_date",
+        "amount": "loan__amount",
+        "amount_due": "amount_due",
+        "amount_gained": "amount_gained",
+    }
+    default_sort = "due_date"
+
+    def get_row(self, obj: Amortization) -> List[str]:
+        superuser = self.request.user.is_superuser
+        return [
+            *([escape(obj.loan.borrower.get_full_name())] if superuser else []),
+            date_cell(obj.loan.loan_date),
+            amount_cell(obj.loan.amount),
+            *([sources_cell(obj.loan)] if superuser else []),
+            escape(obj.payment_stage),
+            amount_cell(obj.amount_due),
+            amount_cell(obj.amount_gained),
+            date_cell(obj.due_date),
+        ]
+
+
 class ShowAmortizationContextMixin:
     def get_context_data(self, **kwargs):
         data = super().get_context_data(**kwargs)
@@ -187,7 +429,13 @@ class ShowAmortizationContextMixin:
         return data
 
 
-class PastDueList(LoginRequiredMixin, ShowAmortizationContextMixin, ListView):
+class PastDueList(
+    LoginRequiredMixin,
+    CachedListMixin,
+    AmortizationListMixin,
+    ShowAmortizationContextMixin,
+    ListView,
+):
     """
     Displays a list of amortization that are past due.
     """
@@ -201,29 +449,30 @@ class PastDueList(LoginRequiredMixin, ShowAmortizationContextMixin, ListView):
             "loan__sources",
             "loan__sources__capital_source",
         )
-        .filter(
-            due_date__lte=timezone.now().date(),
-            paid_date__isnull=True,
-        )
-        .exclude(
-            loan__borrower__is_borrower_active=False,
-        )
+        .with_payment_stage()
     )
     template_name = "lending/amortization/past_due.html"
     context_object_name = "amortizations"
+    cache_name = "past-due"
 
     def get_queryset(self, *args, **kwargs):
         """
         Custom queryset for past due list.
         """
-        queryset = super().get_queryset(*args, **kwargs)
+        queryset = super().get_queryset(*args, **kwargs).past_due()
         if self.request.user.is_superuser:
             return queryset
 
         return queryset.filter(loan__borrower=self.request.user)
 
 
-class UpcomingDueList(LoginRequiredMixin, ShowAmortizationContextMixin, ListView):
+class UpcomingDueList(
+    LoginRequiredMixin,
+    CachedListMixin,
+    AmortizationListMixin,
+    ShowAmortizationContextMixin,
+    ListView,
+):
     """
     Displays a list of amortization that are due in the next 7 days.
     """
@@ -237,32 +486,24 @@ class UpcomingDueList(LoginRequiredMixin, ShowAmortizationContextMixin, ListView
             "loan__sources",
             "loan__sources__capital_source",
         )
-        .filter(
-            due_date__range=(
-                timezone.now().date() + relativedelta(days=1),
-                timezone.now().date() + relativedelta(days=7),
-            ),
-            paid_date__isnull=True,
-        )
-        .exclude(
-            loan__borrower__is_borrower_active=False,
-        )
+        .with_payment_stage()
     )
     template_name = "lending/amortization/upcoming_due.html"
     context_object_name = "amortizations"
+    cache_name = "upcoming-due"
 
     def get_queryset(self, *args, **kwargs):
         """
         Custom queryset for upcoming due list.
         """
-        queryset = super().get_queryset(*args, **kwargs)
+        queryset = super().get_queryset(*args, **kwargs).upcoming()
         if self.request.user.is_superuser:
             return queryset
 
         return queryset.filter(loan__borrower=self.request.user)
 
 
-class ActiveLoans(LoginRequiredMixin, ListView):
+class ActiveLoans(LoginRequiredMixin, CachedListMixin, KeysetListMixin, ListView):
     """
     Displays list of active loans.
     """
@@ -281,9 +522,24 @@ class ActiveLoans(LoginRequiredMixin, ListView):
         .exclude(
             borrower__is_borrower_active=False,
         )
+        .with_financials()
     )
     template_name = "lending/loan/list.html"
     context_object_name = "loans"
+    cache_name = "active-loans"
+    search_fields = (
+        "borrower__first_name",
+        "borrower__last_name",
+        "borrower__email",
+        "borrower_name",
+    )
+    sort_fields = {
+        "loan_date": "loan_date",
+        "amount": "amount",
+        "interest_rate": "interest_rate",
+        "term": "term",
+    }
+    default_sort = "-loan_date"
 
     def get_queryset(self, *args, **kwargs):
         """
@@ -295,6 +551,24 @@ class ActiveLoans(LoginRequiredMixin, ListView):
 
         return queryset.filter(borrower=self.request.user)
 
+    def get_row(self, obj: Loan) -> List[str]:
+        superuser = self.request.user.is_superuser
+        return [
+            *([escape(obj.borrower.get_full_name())] if superuser else []),
+            date_cell(obj.loan_date),
+            amount_cell(obj.amount),
+            f"{obj.interest_rate}%",
+            *(
+                [amount_cell(obj.interest_gained), sources_cell(obj)]
+                if superuser
+                else []
+            ),
+            amount_cell(obj.amortization_amount_due),
+            f"{obj.term} month{pluralize(obj.term)}",
+            escape(obj.payments_made),
+            date_cell(obj.next_payment_due_date),
+        ]
+
 
 class BorrowerDetail(LoginRequiredMixin, DetailView):
     """
@@ -312,73 +586,69 @@ class BorrowerDetail(LoginRequiredMixin, DetailView):
 
         raise PermissionDenied()
 
-    def get_past_due_amortizations(self) -> Union[QuerySet, List[Amortization]]:
-        """
-        Returns the past due amortizations of the selected borrower.
-        """
-        obj = self.get_object()
-        return (
-            Amortization.objects.select_related(
-                "loan",
-                "loan__borrower",
-            )
-            .prefetch_related(
-                "loan__sources",
-                "loan__sources__capital_source",
-            )
-            .filter(
-                loan__borrower=obj,
-                due_date__lte=timezone.now().date(),
-                paid_date__isnull=True,
-            )
-        )
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context.update(borrower_summary(self.object))
+        return context
 
-    def get_total_past_due_payables(self) -> Union[int, Decimal]:
-        """
-        Returns the total payable of the borrower from loans which are already past due.
-        """
-        amortizations = self.get_past_due_amortizations().aggregate(
-            total_payable=Sum("amount_due")
-        )
-        return math.ceil(amortizations["total_payable"] or 0)
 
-    def get_total_principal_receivables(self) -> Union[int, Decimal]:
-        """
-        Returns the total principal receivables of the borrower from loans which are
-        already past due.
-        """
-        amortizations = self.get_past_due_amortizations()
-        receivable = (
-            LoanSource.objects.filter(
-                loan__amortizations__in=amortizations,
-                capital_source__source=CapitalSource.SOURCES.savings,
-                capital_source__provider__isnull=True,
-            )
-            .distinct()
-            .annotate(receivables=F("amount") / F("loan__term"))
-            .aggregate(total=Sum("receivables"))
-        )
-        return math.ceil(receivable["total"] or 0)
+class ExportView(LoginRequiredMixin, View):
+    """
+    Streams the rows of a model as a CSV file. The `due` parameter narrows down the
+    rows to those in the past due(`past-due`) or upcoming(`upcoming`) lists.
+    Borrowers only export their own rows unless `superuser_only` is set, in which
+    case only superusers may export.
+    """
 
-    def get_total_past_due_amount_earned(self) -> Union[int, Decimal]:
-        """
-        Returns the total amount earned based on the past due amortizations.
-        """
-        amortizations = self.get_past_due_amortizations().aggregate(
-            total_earned=Sum("amount_gained")
-        )
-        return math.ceil(amortizations["total_earned"] or 0)
+    model: Type[models.Model]
+    filename: str
+    superuser_only = False
 
-    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
-        context = super().get_context_data(**kwargs)
+    def get_queryset(self) -> models.QuerySet:
+        due = self.request.GET.get("due")
+        if due and due not in DUE_FILTERS:
+            raise Http404(f"Unknown due filter: {due}")
 
-        context.update(
-            {
-                "total_amount_earned": self.get_total_past_due_amount_earned(),
-                "total_payable": self.get_total_past_due_payables(),
-                "total_principal": self.get_total_principal_receivables(),
-                "active_loans": self.get_object().loans.filter(is_completed=False),
-                "amortizations": self.get_past_due_amortizations(),
-            }
-        )
-        return context
+        user = self.request.user
+        if user.is_superuser:
+            return export_queryset(self.model, due=due)
+        if self.superuser_only:
+            raise PermissionDenied()
+
+        return export_queryset(self.model, due=due, borrower=user)
+
+    def get(self, request, *args, **kwargs) -> StreamingHttpResponse:
+        queryset = self.get_queryset()
+        due = request.GET.get("due")
+        suffix = f"-{due}" if due else ""
+        filename = f"{self.filename}{suffix}-{timezone.localdate():%Y%m%d}.csv"
+        return csv_response(self.model, queryset, filename)
+
+
+class AmortizationExport(ExportView):
+    """
+    Exports the amortization schedules of the loans.
+    """
+
+    model = Amortization
+    filename = "amortizations"
+
+
+class LoanSourceAmortizationExport(ExportView):
+    """
+    Exports the amortizations of the loan sources to the capital sources.
+    """
+
+    model = LoanSourceAmortization
+    filename = "loan-source-amortizations"
+    superuser_only = True
+
+
+class CapitalSourcePaymentExport(ExportView):
+    """
+    Exports the payments to the capital source providers.
+    """
+
+    model = CapitalSourcePayment
+    filename = "capital-source-payments"
+    superuser_only = True
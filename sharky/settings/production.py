@@ -5,6 +5,7 @@ Base settings, extended by the dev/staging/production settings.
 import os
 from copy import deepcopy
 
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.log import DEFAULT_LOGGING
 
 DEBUG = False
@@ -136,7 +137,49 @@ LOGGING["loggers"]["django"]["handlers"] = ["console"]
 
 
 # Caching
-CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+# The cache backend is chosen with CACHE_BACKEND, and where it stores entries with
+# CACHE_LOCATION. Only the shared backends let every worker process use the same
+# cache:
+# - "locmem"(default): the memory of each process.
+# - "file": the directory given by CACHE_LOCATION.
+# - "database": the table given by CACHE_LOCATION. Run
+#   `./manage.py createcachetable` once before using it.
+# - "redis": the Redis, or compatible, server given by CACHE_LOCATION as a URL, e.g.
+#   redis://127.0.0.1:6379/1. Requires the django-redis package.
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", ""),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        "/var/tmp/sharky_cache",
+    ),
+    "database": ("django.core.cache.backends.db.DatabaseCache", "sharky_cache"),
+    "redis": ("django_redis.cache.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"Unknown CACHE_BACKEND {CACHE_BACKEND}, use {', '.join(CACHE_BACKENDS)}."
+    )
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.environ.get("CACHE_LOCATION", CACHE_BACKENDS[CACHE_BACKEND][1]),
+        "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", "sharky"),
+    }
+}
+if CACHE_BACKEND != "redis":
+    # Versioned entries are left to expire rather than deleted, so the default of 300
+    # entries would soon evict the current ones.
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000))
+    }
+# Maximum age in seconds of the cached lending snapshots such as the dashboard
+# figures. Snapshots are invalidated whenever lending data changes, this only bounds
+# how stale they can get while the cache is not shared between worker processes.
+LENDING_CACHE_TIMEOUT = int(os.environ.get("LENDING_CACHE_TIMEOUT", 300))
+# Whether reports read the monthly totals from the monthly ledger instead of scanning
+# amortizations. Run `./manage.py rebuild_monthly_ledger` once before enabling it.
+LENDING_USE_LEDGER = bool(os.environ.get("LENDING_USE_LEDGER"))
 
 
 # Templates
@@ -0,0 +1,71 @@
+// Runs the tables of the lending lists as DataTables in server-side mode. Rows are
+// fetched a page at a time from the JSON variant of the list, which pages with
+// cursors instead of offsets and never counts the rows, see `KeysetListMixin`.
+$(document).ready(function() {
+  $('table[data-source]').each(function() {
+    var table = $(this);
+    var source = table.data('source');
+    // The sort parameter of each column, if it can be sorted by.
+    var sorts = table.find('thead th').map(function() {
+      return $(this).data('sort') || '';
+    }).get();
+    // The last page fetched, to tell which cursor leads to the requested one.
+    var last = null;
+
+    table.closest('.table-responsive').find('.keyset-pager').remove();
+    table.DataTable({
+      serverSide: true,
+      processing: true,
+      pagingType: 'simple',
+      info: false,
+      pageLength: 50,
+      lengthMenu: [25, 50, 100],
+      order: [],
+      columns: sorts.map(function(sort) {
+        return {orderable: sort !== ''};
+      }),
+      ajax: function(data, callback) {
+        var order = data.order[0];
+        var params = {
+          format: 'json',
+          draw: data.draw,
+          length: data.length,
+          q: data.search.value,
+        };
+        if (order) {
+          params.sort = (order.dir === 'desc' ? '-' : '') + sorts[order.column];
+        }
+
+        var same = last && last.q === params.q && last.sort === params.sort &&
+          last.length === params.length;
+        if (same && data.start > last.start && last.next) {
+          params.after = last.next;
+        } else if (same && data.start < last.start && data.start > 0) {
+          params.before = last.previous;
+        } else if (same && data.start === last.start) {
+          params.after = last.after;
+          params.before = last.before;
+        } else {
+          data.start = 0;
+        }
+
+        $.getJSON(source, params, function(response) {
+          last = $.extend({}, params, {
+            start: data.start,
+            next: response.next,
+            previous: response.previous,
+          });
+          // Only whether there is a next page is known, which is all the simple
+          // pager needs.
+          var count = data.start + response.data.length + (response.next ? 1 : 0);
+          callback({
+            draw: response.draw,
+            data: response.data,
+            recordsTotal: count,
+            recordsFiltered: count,
+          });
+        });
+      },
+    });
+  });
+});
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.models import EmailUser
+from apps.lending.tests.mixins import LendingMixin
+
+
+class DashboardTests(LendingMixin, TestCase):
+    """
+    Tests for the dashboard page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls().create_portfolio(borrowers=4, loans_per_borrower=2)
+        cls.admin = EmailUser.objects.create_superuser("admin@example.com", "password")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def get_dashboard(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("dashboard"))
+
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_figures_are_cached_until_data_changes(self):
+        response, computed = self.get_dashboard()
+        self.assertEqual(response.context["active_loans"], 6)
+
+        # The four figures and the borrowers list of the sidebar are cached.
+        response, cached = self.get_dashboard()
+        self.assertEqual(cached, computed - 5)
+        self.assertEqual(response.context["active_loans"], 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_loan(borrower=EmailUser.objects.filter(is_borrower=True)[0])
+
+        response, count = self.get_dashboard()
+        self.assertEqual(count, computed - 1)
+        self.assertEqual(response.context["active_loans"], 7)
+
+    def test_borrower_status_invalidates_figures(self):
+        response, computed = self.get_dashboard()
+        borrower = EmailUser.objects.filter(
+            is_borrower=True, is_borrower_active=True
+        ).first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            borrower.first_name = "Renamed"
+            borrower.save()
+
+        response, count = self.get_dashboard()
+        self.assertEqual(count, computed - 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            borrower.is_borrower_active = False
+            borrower.save()
+
+        response, count = self.get_dashboard()
+        self.assertEqual(response.context["active_loans"], 4)
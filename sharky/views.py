@@ -1,13 +1,23 @@
+import datetime
 import math
 from typing import Any, Dict, Optional
 
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.generic import RedirectView, TemplateView
 
-from apps.lending.models import Amortization, CapitalSource, Loan, LoanSource
+from apps.lending.cache import get_snapshot
+from apps.lending.models import (
+    Amortization,
+    CapitalSource,
+    Loan,
+    LoanSource,
+    MonthlyLedger,
+)
 
 
 class Dashboard(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
@@ -24,16 +34,7 @@ class Dashboard(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         """
         Returns the number of past due amortizations.
         """
-        return (
-            Amortization.objects.filter(
-                due_date__lte=timezone.now(),
-                paid_date__isnull=True,
-            )
-            .exclude(
-                loan__borrower__is_borrower_active=False,
-            )
-            .count()
-        )
+        return Amortization.objects.past_due().count()
 
     def get_active_loans(self) -> int:
         """
@@ -54,10 +55,25 @@ class Dashboard(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         Returns the earnings from all loans for the current month.
         """
         now = timezone.now()
+        month = datetime.date(now.year, now.month, 1)
+        if settings.LENDING_USE_LEDGER:
+            ledgers = (
+                MonthlyLedger.objects.filter(
+                    month=month,
+                )
+                .exclude(
+                    borrower__is_borrower_active=False,
+                )
+                .aggregate(
+                    total_gained=Sum("amount_gained"),
+                )
+            )
+            return ledgers["total_gained"] or 0
+
         amortizations = (
             Amortization.objects.filter(
-                due_date__month=now.month,
-                due_date__year=now.year,
+                due_date__gte=month,
+                due_date__lt=month + relativedelta(months=1),
                 is_preterminated=False,
             )
             .exclude(
@@ -120,16 +136,20 @@ class Dashboard(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
 
         return math.floor(sources["total"] or 0)
 
+    def get_kpis(self) -> Dict[str, Any]:
+        """
+        Returns the figures displayed in the dashboard.
+        """
+        return {
+            "active_loans": self.get_active_loans(),
+            "current_month_earnings": self.get_earnings_for_current_month(),
+            "total_principal_receivables": self.get_total_principal_receivables(),
+            "past_due_amortizations": self.get_past_due_amortizations(),
+        }
+
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context.update(
-            {
-                "active_loans": self.get_active_loans(),
-                "current_month_earnings": self.get_earnings_for_current_month(),
-                "total_principal_receivables": self.get_total_principal_receivables(),
-                "past_due_amortizations": self.get_past_due_amortizations(),
-            }
-        )
+        context.update(get_snapshot("dashboard", self.get_kpis))
         return context
 
 